@@ -0,0 +1,104 @@
+"""
+响应解码基准测试：对比旧版双重解析与单次解析（可选 orjson、可选跳过校验）在 FILE_LIST_V2 大响应上的单次开销。
+
+用法：
+    python -m benchmarks.bench_decode --items 100 --pages 2000
+"""
+
+import argparse
+import json
+import logging
+import time
+from typing import Any, Callable
+
+from requests.models import Response
+
+from x123pan.src import tool
+from x123pan.src.type import DataResponse
+
+log = logging.getLogger("bench_decode")
+log.setLevel(logging.INFO)
+
+
+def make_response(items: int) -> Response:
+    """构造一个 FILE_LIST_V2 响应。"""
+    file_list = [
+        {
+            "fileId": 10000000 + i,
+            "filename": f"文件名称-{i:06d}.mp4",
+            "parentFileId": 9999999,
+            "type": i % 2,
+            "etag": f"{i:032x}",
+            "size": 1024 * 1024 * i,
+            "category": 2,
+            "status": 0,
+            "punishFlag": 0,
+            "s3KeyFlag": f"1819000-0-{i}",
+            "storageNode": "m88",
+            "trashed": 0,
+            "createAt": "2025-01-17 12:00:00",
+            "updateAt": "2025-01-17 12:00:00",
+        }
+        for i in range(items)
+    ]
+    body = {
+        "code": 0,
+        "message": "ok",
+        "data": {"lastFileId": 10000000 + items, "fileList": file_list},
+        "x-traceID": "bench",
+    }
+    response = Response()
+    response._content = json.dumps(body, ensure_ascii=False).encode()
+    response.status_code = 200
+    response.encoding = "utf-8"
+    return response
+
+
+def legacy(response: Response) -> Any:
+    """旧版流程：调试日志的 f-string 解析一次，DataResponse 再解析一次。"""
+    log.debug(f"[RESPONSE] Status: {response.status_code} | Response: {response.json()}")
+    return DataResponse(**response.json()).data
+
+
+def single(fast: bool, validate: bool) -> Callable[[Response], Any]:
+    """新版流程：只解析一次，日志惰性格式化。"""
+
+    def decode(response: Response) -> Any:
+        payload = tool.loads(response.content, fast)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("[RESPONSE] Status: %s | Response: %s", response.status_code, payload)
+        return tool.unpack(payload, validate)[2]
+
+    return decode
+
+
+def measure(name: str, func: Callable[[Response], Any], response: Response, pages: int) -> float:
+    """重复解码 pages 次并输出单次耗时。"""
+    func(response)
+    begin = time.perf_counter()
+    for _ in range(pages):
+        func(response)
+    cost = (time.perf_counter() - begin) / pages * 1e6
+    print(f"{name:<28} {cost:10.1f} us/call")
+    return cost
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=100, help="每页文件数")
+    parser.add_argument("--pages", type=int, default=2000, help="重复次数")
+    args = parser.parse_args()
+
+    response = make_response(args.items)
+    print(f"响应大小 {len(response.content) / 1024:.1f} KiB | 每页 {args.items} 条")
+    base = measure("legacy (json x2 + pydantic)", legacy, response, args.pages)
+    cases = [("single json + pydantic", False, True), ("single json, no validate", False, False)]
+    if tool.orjson is not None:
+        cases += [("orjson + pydantic", True, True), ("orjson, no validate", True, False)]
+    for name, fast, validate in cases:
+        cost = measure(name, single(fast, validate), response, args.pages)
+        print(f"{'':<28} {base / cost:10.2f} x")
+
+
+if __name__ == "__main__":
+    main()
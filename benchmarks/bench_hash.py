@@ -0,0 +1,70 @@
+"""
+上传前哈希基准测试：对比旧版整文件MD5（4KiB 读取）加逐分片 getMD5 的两遍读取，与 tool.digest 一遍读取同时计算整文件与分片MD5的耗时。
+
+用法：
+    python -m benchmarks.bench_hash --size 1024 --slice 16
+"""
+
+import argparse
+import hashlib
+import os
+import tempfile
+import time
+from typing import Any, Callable, List
+
+from x123pan.src import tool
+from x123pan.src.type import Ctx
+
+
+def legacy(path: str, sliceSize: int) -> List[str]:
+    """旧版：size_md5 按4KiB读取整个文件，再为每个分片打开读取器计算MD5。"""
+    with open(path, "rb") as f:
+        md5_hash = hashlib.md5()
+        for byte_block in iter(lambda: f.read(4096), b""):
+            md5_hash.update(byte_block)
+        size = f.tell()
+    result = [md5_hash.hexdigest()]
+    for start in range(0, size, sliceSize):
+        with tool.read(path, (start, min(start + sliceSize, size)), Ctx()) as reader:
+            result.append(reader.getMD5())
+    return result
+
+
+def fused(path: str, sliceSize: int) -> List[str]:
+    """一遍读取同时计算整文件与分片MD5。"""
+    result = tool.digest(path, sliceSize)
+    return [result.md5, *result.sliceMD5s]
+
+
+def measure(name: str, func: Callable[[str, int], Any], path: str, sliceSize: int) -> Any:
+    """执行一次并输出耗时与吞吐。"""
+    size = os.path.getsize(path)
+    begin = time.perf_counter()
+    result = func(path, sliceSize)
+    cost = time.perf_counter() - begin
+    print(f"{name:<12} {cost:8.2f} s {size / cost / 2**20:10.1f} MiB/s")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=1024, help="文件大小（MiB）")
+    parser.add_argument("--slice", type=int, default=16, help="分片大小（MiB）")
+    args = parser.parse_args()
+
+    sliceSize = args.slice * 2**20
+    fd, path = tempfile.mkstemp(suffix=".bin")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            block = os.urandom(2**20)
+            for _ in range(args.size):
+                f.write(block)
+        print(f"文件大小 {args.size} MiB | 分片 {args.slice} MiB（系统页缓存已预热）")
+        expected = measure("legacy", legacy, path, sliceSize)
+        assert measure("digest", fused, path, sliceSize) == expected
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
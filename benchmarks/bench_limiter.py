@@ -0,0 +1,90 @@
+"""
+QPS 限流器基准测试：对比旧版 Queue + Timer 实现与令牌桶实现的线程开销和实际 QPS。
+
+用法：
+    python -m benchmarks.bench_limiter --qps 50 --requests 500 --workers 16
+"""
+
+import argparse
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
+from x123pan.src.limiter import TokenBucket
+
+
+class LegacyLimiter:
+    """旧版 API_INFO 的限流逻辑：每个请求占用一个队列槽，并创建 Timer 线程 1 秒后释放。"""
+
+    def __init__(self, qps: int) -> None:
+        self.queue = queue.Queue(maxsize=qps)
+
+    def acquire(self) -> None:
+        self.queue.put(None)
+        threading.Timer(1, self.queue.get).start()
+
+
+class ThreadCounter:
+    """统计运行期间启动的线程数与同时存活线程数峰值。"""
+
+    def __init__(self) -> None:
+        self.started = 0
+        self.peak = threading.active_count()
+        self._lock = threading.Lock()
+        self._origin = threading.Thread.start
+
+    def __enter__(self) -> "ThreadCounter":
+        counter = self
+
+        def start(thread: threading.Thread) -> None:
+            with counter._lock:
+                counter.started += 1
+            counter._origin(thread)
+            counter.peak = max(counter.peak, threading.active_count())
+
+        threading.Thread.start = start  # type: ignore[method-assign]
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        threading.Thread.start = self._origin  # type: ignore[method-assign]
+
+
+def run(name: str, acquire: Callable[[], object], total: int, workers: int) -> Dict[str, float]:
+    """用 workers 个线程发起 total 次限流请求并统计结果。"""
+    with ThreadCounter() as counter, ThreadPoolExecutor(max_workers=workers) as executor:
+        begin = time.perf_counter()
+        list(executor.map(lambda _: acquire(), range(total)))
+        elapsed = time.perf_counter() - begin
+    # 排除线程池本身的工作线程
+    extra = counter.started - workers
+    result = {
+        "elapsed": elapsed,
+        "qps": total / elapsed,
+        "threads": max(extra, 0),
+        "peak": counter.peak,
+    }
+    print(
+        f"{name:<12} 耗时 {elapsed:7.2f}s | 实际QPS {result['qps']:8.2f} | "
+        f"额外线程 {result['threads']:6d} | 存活线程峰值 {result['peak']:4d}"
+    )
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--qps", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    print(f"目标QPS {args.qps} | 请求数 {args.requests} | 工作线程 {args.workers}")
+    run("Queue+Timer", LegacyLimiter(args.qps).acquire, args.requests, args.workers)
+    # 旧实现的 Timer 线程在 1 秒后才退出，等待其清理完毕再测下一项
+    time.sleep(1.5)
+    run("TokenBucket", TokenBucket(args.qps).acquire, args.requests, args.workers)
+
+
+if __name__ == "__main__":
+    main()
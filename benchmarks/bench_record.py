@@ -0,0 +1,74 @@
+"""
+文件记录内存基准测试：对比 list_v2 原始字典、FileRecord 与 FileTable 保存大量文件信息时的内存占用与筛选耗时。
+
+用法：
+    python -m benchmarks.bench_record --items 1000000
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from x123pan.src.record import FileRecord, FileTable
+
+
+def make_items(items: int) -> List[Dict[str, Any]]:
+    """构造 list_v2 格式的文件信息（经过一次 JSON 往返，与真实解析结果一致）。"""
+    file_list = [
+        {
+            "fileId": 10000000 + i,
+            "filename": f"文件名称-{i % 1000:06d}.mp4",
+            "parentFileId": 9999999 - i % 100,
+            "type": int(i % 50 == 0),
+            "etag": f"{i:032x}",
+            "size": 1024 * i,
+            "category": 2,
+            "status": 0,
+            "punishFlag": 0,
+            "s3KeyFlag": f"1819000-0-{i}",
+            "storageNode": "m88",
+            "trashed": 0,
+            "createAt": "2025-01-17 12:00:00",
+            "updateAt": "2025-01-17 12:00:00",
+        }
+        for i in range(items)
+    ]
+    return json.loads(json.dumps(file_list, ensure_ascii=False))
+
+
+def measure(name: str, build: Callable[[], Any], items: int) -> Any:
+    """构建容器并输出峰值之外保留的内存。"""
+    gc.collect()
+    tracemalloc.start()
+    begin = time.perf_counter()
+    result = build()
+    cost = time.perf_counter() - begin
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{name:<16} {size / 2**20:10.1f} MiB {size / items:8.1f} B/file {cost:8.2f} s")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=1000000, help="文件数")
+    args = parser.parse_args()
+
+    raw = json.dumps(make_items(args.items), ensure_ascii=False)
+    dicts = measure("dict", lambda: json.loads(raw), args.items)
+    records = measure("FileRecord", lambda: [FileRecord.from_dict(i) for i in dicts], args.items)
+    table = measure("FileTable", lambda: FileTable(records), args.items)
+    for name, func in (
+        ("dict filter", lambda: [i for i in dicts if i["size"] >= 1024 * args.items // 2]),
+        ("table filter", lambda: table.filter(min_size=1024 * args.items // 2)),
+    ):
+        begin = time.perf_counter()
+        func()
+        print(f"{name:<16} {time.perf_counter() - begin:8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
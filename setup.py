@@ -28,7 +28,9 @@ REQUIRED = [
 
 # What packages are optional?
 EXTRAS = {
-    # 'fancy feature': ['django'],
+    'async': ['httpx>=0.26.0'],
+    'numpy': ['numpy>=1.20.0'],
+    'orjson': ['orjson>=3.6.0'],
 }
 
 # The rest you shouldn't have to touch too much :)
@@ -0,0 +1,156 @@
+"""
+测试共用的模拟网盘与夹具。
+"""
+
+import json
+import threading
+import time
+
+import pytest
+from requests.models import Response
+
+from x123pan.src.const import ConstAPI
+from x123pan.src.limiter import TokenBucket
+from x123pan.src.type import API_INFO
+
+
+def reply(body):
+    """构造模拟响应。"""
+    response = Response()
+    response.status_code = 200
+    response._content = json.dumps(body).encode()
+    return response
+
+
+class FakeDrive:
+    """替换 Access.session.request 的模拟网盘，支持列表、查询与常用修改。
+
+    Attributes:
+        files: fileId 到文件信息的映射
+        calls: 按顺序记录请求的接口路径
+        lists: 按顺序记录被列出的目录ID（每个目录只在请求首页时记录）
+        delay: 每个请求的模拟耗时（秒）
+    """
+
+    def __init__(self):
+        self.files = {}
+        self.calls = []
+        self.lists = []
+        self.delay = 0.0
+        self.lock = threading.Lock()
+        self._next = 100
+
+    @classmethod
+    def flat(cls, count=150):
+        """根目录下有 count 个文件 f1..fN 的网盘。"""
+        drive = cls()
+        for i in range(1, count + 1):
+            drive.add(i, 0, f"f{i}")
+        return drive
+
+    def add(self, fileId, parent, name, isDir=False, etag="", size=None):
+        self.files[fileId] = {
+            "fileId": fileId,
+            "parentFileId": parent,
+            "filename": name,
+            "type": int(isDir),
+            "size": size if size is not None else 0 if isDir else 10,
+            "etag": etag or ("" if isDir else f"{fileId:032x}"),
+            "trashed": 0,
+        }
+
+    def __call__(self, _method, url, params=None, json=None, **_kwargs):
+        path = url.split("123pan.com")[1]
+        with self.lock:
+            self.calls.append(path)
+        if self.delay:
+            time.sleep(self.delay)
+        data = None
+        if path == "/api/v2/file/list":
+            parent, start = params["parentFileId"], params["lastFileId"]
+            if start == 0:
+                with self.lock:
+                    self.lists.append(parent)
+            children = [f for f in self.files.values() if f["parentFileId"] == parent]
+            page = [f for f in children if f["fileId"] > start][: params["limit"]]
+            last = page[-1]["fileId"] if page and page[-1] is not children[-1] else -1
+            data = {"fileList": [dict(f) for f in page], "lastFileId": last}
+        elif path == "/api/v1/file/detail":
+            if params["fileID"] not in self.files:
+                return reply({"code": 5066, "message": "文件不存在"})
+            f = self.files[params["fileID"]]
+            data = {
+                "fileID": f["fileId"],
+                "parentFileID": f["parentFileId"],
+                "filename": f["filename"],
+            }
+        elif path == "/api/v1/file/infos":
+            data = {"fileList": [dict(self.files[i]) for i in json["fileIds"] if i in self.files]}
+        elif path == "/api/v1/file/move":
+            for i in json["fileIDs"]:
+                self.files[i]["parentFileId"] = json["toParentFileID"]
+        elif path == "/api/v1/file/trash":
+            for i in json["fileIDs"]:
+                self.files[i]["trashed"] = 1
+        elif path == "/api/v1/file/delete":
+            for i in json["fileIDs"]:
+                self.delete(i)
+        elif path == "/api/v1/file/name":
+            self.files[json["fileId"]]["filename"] = json["fileName"]
+        elif path == "/upload/v1/file/mkdir":
+            self._next += 1
+            self.add(self._next, json["parentID"], json["name"], True)
+            data = {"dirID": self._next}
+        return reply({"code": 0, "data": data})
+
+    def delete(self, fileId):
+        for child in [f for f, v in self.files.items() if v["parentFileId"] == fileId]:
+            self.delete(child)
+        del self.files[fileId]
+
+
+class FakeTree:
+    """替换 Access.session.request 的模拟目录树，每页返回 pageSize 项，记录并发请求数。"""
+
+    def __init__(self, pageSize=3):
+        self.pageSize = pageSize
+        self.slow = set()
+        self.items = []
+        self.active = self.peak = self.calls = 0
+        self.lock = threading.Lock()
+        self._next = 1
+
+    def add(self, parent, name, isDir=False, trashed=0):
+        fileId = self._next
+        self._next += 1
+        self.items.append(
+            {
+                "fileId": fileId,
+                "filename": name,
+                "parentFileId": parent,
+                "type": int(isDir),
+                "trashed": trashed,
+            }
+        )
+        return fileId
+
+    def __call__(self, _method, _url, params=None, **_kwargs):
+        with self.lock:
+            self.active += 1
+            self.calls += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.5 if params["parentFileId"] in self.slow else 0.01)
+        children = [i for i in self.items if i["parentFileId"] == params["parentFileId"]]
+        page = [i for i in children if i["fileId"] > params["lastFileId"]][: self.pageSize]
+        last = page[-1]["fileId"] if page and page[-1] is not children[-1] else -1
+        with self.lock:
+            self.active -= 1
+        return reply({"code": 0, "data": {"fileList": page, "lastFileId": last}})
+
+
+@pytest.fixture(autouse=True)
+def unlimited(monkeypatch):
+    """测试中不受接口的全局QPS限制。"""
+    for api in vars(ConstAPI).values():
+        if isinstance(api, API_INFO):
+            monkeypatch.setattr(api, "limiter", TokenBucket(0))
@@ -0,0 +1,253 @@
+"""
+x123pan异步API模块的单元测试。
+
+使用 httpx.MockTransport 作为本地模拟的123云盘服务。
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from x123pan.src.aio import AsyncAccess  # noqa: E402
+from x123pan.src.retry import RetryPolicy  # noqa: E402
+from x123pan.src.type import ApiResponseFailed, DeadlineExceeded  # noqa: E402
+
+
+class FakePan:
+    """模拟123云盘开放平台的最小服务端。"""
+
+    def __init__(self, total=250):
+        self.files = [
+            {"fileId": i, "filename": f"f{i}", "trashed": 0, "type": 0} for i in range(1, total + 1)
+        ]
+        self.token = "token-1"
+        self.calls = []
+        self.slices = {}
+        self.rejects = {}
+
+    def reply(self, data=None, code=0, message="ok"):
+        return httpx.Response(200, json={"code": code, "message": message, "data": data})
+
+    def handler(self, request):
+        path = request.url.path
+        self.calls.append(path)
+        if path == "/api/v1/access_token":
+            self.token = "token-2"
+            return self.reply({"accessToken": self.token})
+        if request.headers.get("Authorization") != f"Bearer {self.token}":
+            return self.reply(code=401, message="token expired")
+        if path == "/api/v1/user/info":
+            return self.reply({"nickName": "tester"})
+        if path == "/api/v2/file/list":
+            last = int(request.url.params["lastFileId"])
+            page = [f for f in self.files if f["fileId"] > last][:100]
+            nxt = page[-1]["fileId"] if page[-1] is not self.files[-1] else -1
+            return self.reply({"fileList": page, "lastFileId": nxt})
+        if path == "/api/v1/file/infos":
+            ids = json.loads(request.content)["fileIds"]
+            return self.reply({"fileList": [self.files[i - 1] for i in ids]})
+        if path == "/upload/v2/file/create":
+            return self.reply(
+                {
+                    "reuse": False,
+                    "preuploadID": "p1",
+                    "sliceSize": 4,
+                    "servers": ["http://upload.local"],
+                }
+            )
+        if path == "/upload/v2/file/slice":
+            boundary = request.headers["Content-Type"].split("boundary=")[1].encode()
+            fields = {}
+            for part in request.read().split(b"--" + boundary)[1:-1]:
+                head, _, value = part[2:-2].partition(b"\r\n\r\n")
+                fields[re.search(rb'name="(\w+)"', head).group(1).decode()] = value
+            sliceNo = int(fields["sliceNo"])
+            if self.rejects.get(sliceNo):
+                self.rejects[sliceNo] -= 1
+                return self.reply(code=1, message="checksum")
+            self.slices[sliceNo] = (fields["sliceMD5"].decode(), fields["slice"])
+            return self.reply(None)
+        if path == "/upload/v2/file/upload_complete":
+            return self.reply({"completed": True, "fileID": 42})
+        if path in ("/api/v1/file/trash", "/api/v1/file/move", "/api/v1/file/name"):
+            return self.reply(None)
+        if path == "/upload/v1/file/mkdir":
+            return self.reply({"dirID": 7})
+        return self.reply(code=404, message="not found")
+
+
+@pytest.fixture
+def fake():
+    return FakePan()
+
+
+def make_access(fake):
+    return AsyncAccess("id", "secret", "token-1", transport=httpx.MockTransport(fake.handler))
+
+
+class TestAsyncAccess:
+    """测试AsyncAccess类。"""
+
+    def test_surface(self, fake):
+        """测试与Access相同的接口布局。"""
+        access = make_access(fake)
+        for name in ("user", "file", "link", "upload", "uploadV2"):
+            assert hasattr(access, name)
+
+    def test_user_info(self, fake):
+        """测试获取用户信息。"""
+
+        async def main():
+            async with make_access(fake) as access:
+                return await access.user.info()
+
+        assert asyncio.run(main()) == {"nickName": "tester"}
+
+    def test_refresh_token(self, fake):
+        """测试令牌过期后自动刷新。"""
+        fake.token = "token-0"
+
+        async def main():
+            async with make_access(fake) as access:
+                await access.user.info()
+                return access.get_access_token()
+
+        assert asyncio.run(main()) == "token-2"
+        assert fake.calls.count("/api/v1/access_token") == 1
+
+    def test_list_v2_async_generator(self, fake):
+        """测试异步生成器分页列出文件。"""
+
+        async def main():
+            async with make_access(fake) as access:
+                return [f["fileId"] async for f in access.file.list_v2(0)]
+
+        assert asyncio.run(main()) == list(range(1, 251))
+
+    def test_list_v2_limit(self, fake):
+        """测试限制返回数量。"""
+
+        async def main():
+            async with make_access(fake) as access:
+                return [f async for f in access.file.list_v2(0, limit=150)]
+
+        assert len(asyncio.run(main())) == 150
+
+    def test_list_v2_prefetch(self, fake):
+        """测试预取下一页与每页数量。"""
+
+        async def main():
+            async with make_access(fake) as access:
+                ids = [
+                    f["fileId"] async for f in access.file.list_v2(0, pageSize=50, prefetch=True)
+                ]
+                first = [f async for f in access.file.list_v2(0, limit=10, prefetch=True)]
+                return ids, first
+
+        ids, first = asyncio.run(main())
+        assert ids == list(range(1, 251))
+        assert len(first) == 10
+
+    def test_concurrent_infos(self, fake):
+        """测试并发获取文件信息。"""
+
+        async def main():
+            async with make_access(fake) as access:
+                return await asyncio.gather(*(access.file.infos([i]) for i in range(1, 11)))
+
+        result = asyncio.run(main())
+        assert [r[0]["fileId"] for r in result] == list(range(1, 11))
+
+    def test_api_failed(self, fake):
+        """测试API错误码抛出异常。"""
+
+        async def main():
+            async with make_access(fake) as access:
+                await access.link.offline_download_process(1)
+
+        with pytest.raises(ApiResponseFailed):
+            asyncio.run(main())
+
+    def test_retry_budget(self, fake):
+        """测试网络异常重试次数与429截止时间。"""
+        calls = []
+
+        def black_hole(request):
+            calls.append(request)
+            raise httpx.ConnectError("black hole", request=request)
+
+        async def main(handler, exc):
+            transport = httpx.MockTransport(handler)
+            async with AsyncAccess("id", "secret", "token-1", transport=transport) as access:
+                access.set_retry(RetryPolicy(retries=2, backoff=0.01, jitter=0, deadline=0.5))
+                with pytest.raises(exc):
+                    await access.user.info()
+
+        asyncio.run(main(black_hole, httpx.ConnectError))
+        assert len(calls) == 3
+        asyncio.run(main(lambda _request: fake.reply(code=429), DeadlineExceeded))
+
+    def test_no_transport_retries(self):
+        """测试默认传输层不重试连接，重试只由 RetryPolicy 负责。"""
+
+        async def main():
+            async with AsyncAccess("id", "secret", "token-1") as access:
+                return access.client._transport._pool._retries
+
+        assert asyncio.run(main()) == 0
+
+    def test_upload_v2_put(self, fake):
+        """测试V2分片上传。"""
+        data = b"0123456789"
+
+        async def main():
+            async with make_access(fake) as access:
+                return await access.uploadV2.put(data, "a.bin")
+
+        assert asyncio.run(main()) == 42
+        assert sorted(fake.slices) == [1, 2, 3]
+        for sliceNo, chunk in ((1, data[0:4]), (2, data[4:8]), (3, data[8:10])):
+            assert fake.slices[sliceNo] == (hashlib.md5(chunk).hexdigest(), chunk)
+
+    def test_upload_v2_slice_retry(self, fake):
+        """测试服务端拒绝的分片重新发送，不中断上传。"""
+        fake.rejects = {2: 2}
+
+        async def main():
+            async with make_access(fake) as access:
+                access.set_retry(RetryPolicy(retries=2, backoff=0.01, jitter=0, deadline=5))
+                return await access.uploadV2.put(b"0123456789", "a.bin")
+
+        assert asyncio.run(main()) == 42
+        assert sorted(fake.slices) == [1, 2, 3] and fake.rejects == {2: 0}
+
+    def test_listeners(self, fake):
+        """测试修改文件与上传完成后发送变更事件。"""
+        events = []
+
+        async def main():
+            async with make_access(fake) as access:
+                access.add_listener(events.append)
+                await access.file.trash([1, 2])
+                await access.file.move(3, 5)
+                await access.file.name(4, "x")
+                await access.file.mkdir(5, "dir")
+                await access.uploadV2.put(b"0123456789", "a.bin", parentFileID=5)
+
+        asyncio.run(main())
+        assert [(m.kind, m.fileIDs, m.parentIDs) for m in events] == [
+            ("trash", [1, 2], None),
+            ("move", [3], [5]),
+            ("name", [4], None),
+            ("mkdir", [7], [5]),
+            ("upload", [42], [5]),
+        ]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,174 @@
+"""
+x123pan高级封装模块的单元测试。
+"""
+
+import json
+import threading
+import time
+
+import pytest
+from requests.models import Response
+
+from tests.conftest import FakeTree
+from x123pan.src.api import Access
+from x123pan.src.cache import MetaCache
+from x123pan.src.record import FileTable
+from x123pan.src.search import SearchIndex
+from x123pan.util.all import listMulti, listMultiIter, walk
+
+
+@pytest.fixture
+def tree():
+    tree = FakeTree()
+    a = tree.add(0, "a", True)
+    b = tree.add(0, "b", True)
+    for i in range(5):
+        tree.add(0, f"root{i}.txt")
+        tree.add(a, f"a{i}.mp4")
+    c = tree.add(a, "c", True)
+    tree.add(c, "deep.txt")
+    tree.add(b, "skip.tmp")
+    tree.add(b, "gone.txt", trashed=1)
+    return tree
+
+
+@pytest.fixture
+def access(tree):
+    access = Access("id", "secret", "token")
+    access.session.request = tree
+    return access
+
+
+def collect(results):
+    files = {}
+    for path, _, fs in results:
+        files.setdefault(path, []).extend(f["filename"] for f in fs)
+    return {k: sorted(v) for k, v in files.items()}
+
+
+class TestWalk:
+    """测试walk函数。"""
+
+    def test_walk_all(self, access, tree):
+        """测试遍历全部目录并跳过回收站文件。"""
+        files = collect(walk(access, workers=4))
+        assert files["/"] == [f"root{i}.txt" for i in range(5)]
+        assert files["/a"] == [f"a{i}.mp4" for i in range(5)]
+        assert files["/a/c"] == ["deep.txt"]
+        assert files["/b"] == ["skip.tmp"]
+        assert 1 < tree.peak <= 4
+
+    def test_maxdepth(self, access):
+        """测试最大深度。"""
+        assert "/a/c" not in collect(walk(access, maxdepth=1))
+        assert list(collect(walk(access, maxdepth=0))) == ["/"]
+
+    def test_filters(self, access):
+        """测试包含与排除过滤。"""
+        files = collect(walk(access, include="*.txt", exclude=["b", "*.mp4"]))
+        assert "/b" not in files
+        assert files["/a"] == []
+        assert files["/a/c"] == ["deep.txt"]
+
+    def test_prune(self, access):
+        """测试原地修改dirs跳过子目录。"""
+        paths = set()
+        for path, dirs, _ in walk(access):
+            paths.add(path)
+            dirs[:] = [d for d in dirs if d["filename"] != "a"]
+        assert paths == {"/", "/b"}
+
+    def test_bounded_frontier(self, access):
+        """测试待遍历目录超过上限时仍能完整遍历。"""
+        files = collect(walk(access, workers=1, max_frontier=0))
+        assert files["/a/c"] == ["deep.txt"]
+
+    def test_feeds_cache_and_search(self, access, tree):
+        """测试遍历经过 file.list_pages，结果写入缓存与搜索索引。"""
+        access.set_cache(MetaCache())
+        access.set_search(SearchIndex())
+        first = collect(walk(access, workers=2))
+        calls = tree.calls
+        assert collect(walk(access, workers=2)) == first
+        assert tree.calls == calls
+        assert len(access._search) == len(tree.items)
+
+    def test_early_stop(self, access, tree):
+        """测试提前停止时不等待进行中的请求。"""
+        tree.slow.add(1)
+        results = walk(access, workers=4)
+        next(results)
+        next(results)
+        start = time.monotonic()
+        results.close()
+        assert time.monotonic() - start < 0.3
+
+
+class FakePages:
+    """模拟V1分页列表接口，页码越小返回越慢，使完成顺序与页码顺序相反。"""
+
+    def __init__(self, total=23):
+        self.total = total
+        self.pages = []
+        self.lock = threading.Lock()
+
+    def __call__(self, _method, _url, params=None, **_kwargs):
+        p, limit = params["page"], params["limit"]
+        with self.lock:
+            self.pages.append(p)
+        time.sleep(0.02 / p)
+        ids = range((p - 1) * limit + 1, min(p * limit, self.total) + 1)
+        response = Response()
+        response.status_code = 200
+        body = {"code": 0, "data": {"total": self.total, "fileList": [{"fileId": i} for i in ids]}}
+        response._content = json.dumps(body).encode()
+        return response
+
+
+class TestListMulti:
+    """测试listMulti与listMultiIter函数。"""
+
+    @pytest.fixture
+    def pages(self):
+        return FakePages()
+
+    @pytest.fixture
+    def access(self, pages):
+        access = Access("id", "secret", "token")
+        access.session.request = pages
+        return access
+
+    def test_ordered(self, access):
+        """测试任意页大小下按页码顺序返回全部文件。"""
+        assert [f["fileId"] for f in listMulti(access, limit=7)] == list(range(1, 24))
+
+    def test_iter_pages(self, access):
+        """测试逐页生成。"""
+        sizes = [len(p) for p in listMultiIter(access, limit=5, workers=3)]
+        assert sizes == [5, 5, 5, 5, 3]
+
+    def test_window(self, access, pages):
+        """测试提前获取的页数不超过窗口。"""
+        it = listMultiIter(access, limit=2, workers=2, window=2)
+        next(it)
+        next(it)
+        time.sleep(0.05)
+        assert max(pages.pages) <= 4
+        it.close()
+        assert max(pages.pages) <= 4
+
+    def test_start_page(self, access, pages):
+        """测试从指定页开始。"""
+        ids = [f["fileId"] for f in listMulti(access, page=3, limit=10)]
+        assert ids == [21, 22, 23]
+        assert sorted(pages.pages) == [3]
+
+    def test_compact(self, access):
+        """测试返回按列存储的文件表。"""
+        table = listMulti(access, limit=7, compact=True)
+        assert isinstance(table, FileTable)
+        assert list(table.column("fileId")) == list(range(1, 24))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -1,10 +1,23 @@
 """
 x123pan API模块的单元测试。
 """
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+
 import pytest
 from unittest.mock import Mock, patch
+import requests
+from requests.models import Response
+from tests.conftest import reply
+from x123pan.src import tool
 from x123pan.src.api import Access
-from x123pan.src.type import API_INFO, Ctx, ApiResponseFailed
+from x123pan.src.const import ConstAPI
+from x123pan.src.retry import RetryPolicy
+from x123pan.src.type import API_INFO, Ctx, ApiResponseFailed, DeadlineExceeded
 
 
 class TestAPI_INFO:
@@ -99,5 +112,385 @@ class TestAccess:
         assert hasattr(access, 'user')
 
 
+
+class FakeServer:
+    """替换 Access.session.request 的模拟服务端。"""
+
+    def __init__(self, token="new"):
+        self.token = token
+        self.token_calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, _method, url, headers=None, **_kwargs):
+        response = Response()
+        response.status_code = 200
+        if url.endswith("/api/v1/access_token"):
+            with self.lock:
+                self.token_calls += 1
+            time.sleep(0.05)
+            body = {"code": 0, "data": {"accessToken": self.token, "expiredAt": "2099-01-01T00:00:00+08:00"}}
+        elif headers["Authorization"] == f"Bearer {self.token}":
+            body = {"code": 0, "data": {"nickName": "tester"}}
+        else:
+            body = {"code": 401, "message": "token expired"}
+        response._content = json.dumps(body).encode()
+        return response
+
+
+class TestTokenRefresh:
+    """测试访问令牌刷新。"""
+
+    def test_single_flight(self):
+        """测试并发请求遇到令牌过期时只刷新一次。"""
+        access = Access("id", "secret", "old")
+        server = FakeServer()
+        access.session.request = server
+        threads = [threading.Thread(target=access.user.info) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert server.token_calls == 1
+        assert access.get_access_token() == "new"
+        assert access._token_expire > time.time()
+
+    def test_proactive_refresh(self):
+        """测试令牌即将过期时主动刷新。"""
+        access = Access("id", "secret", "new")
+        server = FakeServer()
+        access.session.request = server
+        access._token_expire = time.time() + 10
+        access.user.info()
+        assert server.token_calls == 1
+        access.user.info()
+        assert server.token_calls == 1
+
+    def test_adopt_token_from_file(self, tmp_path):
+        """测试采用其它进程已写入文件的令牌而不重复刷新。"""
+        path = str(tmp_path / "token")
+        access = Access("id", "secret", "old", path_access=path)
+        server = FakeServer()
+        access.session.request = server
+        tool.write_token(path, "new", time.time() + 3600)
+        assert access.user.info() == {"nickName": "tester"}
+        assert server.token_calls == 0
+        assert access.get_access_token() == "new"
+
+    def test_persist_refreshed_token(self, tmp_path):
+        """测试刷新后的令牌与过期时间写入文件。"""
+        path = str(tmp_path / "token")
+        access = Access("id", "secret", "", path_access=path)
+        access.session.request = FakeServer()
+        access.user.info()
+        token, expire = tool.read_token(path)
+        assert token == "new"
+        assert expire == tool.parse_expire("2099-01-01T00:00:00+08:00")
+        assert Access("id", "secret", path_access=path).get_access_token() == "new"
+
+
+class TestRetry:
+    """测试请求的重试次数、截止时间与轮询。"""
+
+    @pytest.fixture
+    def access(self):
+        access = Access("id", "secret", "token")
+        access.set_retry(RetryPolicy(retries=2, backoff=0.01, jitter=0, deadline=1))
+        return access
+
+    def test_retry_budget(self, access):
+        """测试网络异常超过重试次数后抛出。"""
+        calls = []
+
+        def fake(method, url, **kwargs):
+            calls.append(kwargs["timeout"])
+            raise requests.ConnectionError("black hole")
+
+        access.session.request = fake
+        with pytest.raises(requests.ConnectionError):
+            access.user.info()
+        assert len(calls) == 3
+        assert all(read <= 1 for _, read in calls)
+
+    def test_recover_after_retry(self, access):
+        """测试解码失败后重试成功。"""
+        replies = [Response(), reply({"code": 0, "data": {"nickName": "tester"}})]
+        replies[0]._content, replies[0].status_code = b"<html>", 502
+        access.session.request = lambda _method, _url, **_kwargs: replies.pop(0)
+        assert access.user.info() == {"nickName": "tester"}
+
+    def test_validation_error_not_retried(self, access):
+        """测试响应结构校验失败时直接抛出，不按解码失败重试。"""
+        calls = []
+
+        def fake(_method, _url, **_kwargs):
+            calls.append(1)
+            return reply({"code": "not-a-number"})
+
+        access.session.request = fake
+        with pytest.raises(ValueError):
+            access.user.info()
+        assert len(calls) == 1
+
+    def test_throttle_deadline(self, access):
+        """测试持续429时在截止时间内失败。"""
+        access.session.request = lambda _method, _url, **_kwargs: reply({"code": 429})
+        begin = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            access.user.info()
+        assert time.monotonic() - begin < 1
+
+    def test_complete_polling(self, access):
+        """测试完成上传时轮询 20103 直到完成。"""
+        replies = [
+            reply({"code": 20103, "message": "checking"}),
+            reply({"code": 0, "data": {"completed": False}}),
+            reply({"code": 0, "data": {"completed": True, "fileID": 7}}),
+        ]
+        access.session.request = lambda _method, _url, **_kwargs: replies.pop(0)
+        assert access.uploadV2.complete("pre") == 7
+
+    def test_complete_timeout(self, access):
+        """测试完成上传轮询超时后失败，其它错误码直接抛出。"""
+        access.session.request = lambda _method, _url, **_kwargs: reply(
+            {"code": 0, "data": {"completed": False}}
+        )
+        with pytest.raises(DeadlineExceeded):
+            access.uploadV2.complete("pre", timeout=0.3)
+        access.session.request = lambda _method, _url, **_kwargs: reply({"code": 1, "message": "x"})
+        with pytest.raises(ApiResponseFailed):
+            access.uploadV2.complete("pre")
+
+    def test_explicit_deadline(self, access):
+        """测试单次调用传入截止时间。"""
+        access.session.request = lambda _method, _url, **_kwargs: reply({"code": 429})
+        with pytest.raises(DeadlineExceeded):
+            access.request(ConstAPI.USER_INFO, deadline=0.2)
+
+
+class FakeListV2:
+    """模拟 list_v2 游标分页接口，记录请求日志。"""
+
+    def __init__(self, total=10):
+        self.total = total
+        self.log = []
+
+    def __call__(self, _method, _url, params=None, **_kwargs):
+        self.log.append(("request", params["lastFileId"], params["limit"]))
+        time.sleep(0.02)
+        start = params["lastFileId"]
+        ids = [i for i in range(1, self.total + 1) if i > start][: params["limit"]]
+        last = ids[-1] if ids and ids[-1] < self.total else -1
+        files = [{"fileId": i, "trashed": 0} for i in ids]
+        return reply({"code": 0, "data": {"fileList": files, "lastFileId": last}})
+
+
+class TestListV2:
+    """测试list_v2的分页大小与预取。"""
+
+    @pytest.fixture
+    def server(self):
+        return FakeListV2()
+
+    @pytest.fixture
+    def access(self, server):
+        access = Access("id", "secret", "token")
+        access.session.request = server
+        return access
+
+    def test_page_size(self, access, server):
+        """测试每页数量。"""
+        ids = [i["fileId"] for i in access.file.list_v2(0, pageSize=4)]
+        assert ids == list(range(1, 11))
+        assert [entry[2] for entry in server.log] == [4, 4, 4]
+
+    def test_prefetch_overlap(self, access, server):
+        """测试处理当前页时下一页已在请求中。"""
+        ids = []
+        for i in access.file.list_v2(0, pageSize=5, prefetch=True):
+            if i["fileId"] == 5:
+                time.sleep(0.1)
+                server.log.append(("consumed", 5, 0))
+            ids.append(i["fileId"])
+        assert ids == list(range(1, 11))
+        assert server.log.index(("request", 5, 5)) < server.log.index(("consumed", 5, 0))
+
+    def test_prefetch_cancel(self, access, server):
+        """测试提前停止时不再继续请求。"""
+        items = access.file.list_v2(0, pageSize=2, prefetch=True)
+        next(items)
+        items.close()
+        time.sleep(0.1)
+        assert len(server.log) <= 2
+
+    def test_limit(self, access):
+        """测试预取时的数量限制。"""
+        assert len(list(access.file.list_v2(0, limit=3, pageSize=2, prefetch=True))) == 3
+
+    def test_compact(self, access):
+        """测试生成紧凑记录。"""
+        items = list(access.file.list_v2(0, limit=3, compact=True))
+        assert [type(i).__name__ for i in items] == ["FileRecord"] * 3
+        assert [i.fileId for i in items] == [1, 2, 3]
+
+
+class FakeSliceServer:
+    """模拟V2分片上传接口，记录同时上传的分片数。"""
+
+    def __init__(self, failures=None):
+        self.slices = {}
+        self.failures = dict(failures or {})
+        self.active = self.peak = 0
+        self.completed = False
+        self.lock = threading.Lock()
+
+    def __call__(self, _method, url, files=None, **_kwargs):
+        if url.endswith("/upload/v2/file/create"):
+            return reply(
+                {
+                    "code": 0,
+                    "data": {
+                        "reuse": False,
+                        "preuploadID": "p1",
+                        "sliceSize": 4,
+                        "servers": ["http://upload.local"],
+                    },
+                }
+            )
+        if url.endswith("/upload/v2/file/upload_complete"):
+            self.completed = True
+            return reply({"code": 0, "data": {"completed": True, "fileID": 42}})
+        sliceNo = files["sliceNo"][1]
+        body = files["slice"][1]
+        body = bytes(body.read() if hasattr(body, "read") else body)
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            failure = self.failures.pop(sliceNo, None)
+        try:
+            time.sleep(0.02)
+            if failure == "network":
+                raise requests.ConnectionError("reset")
+            if failure is not None:
+                return reply({"code": 1, "message": failure})
+            self.slices[sliceNo] = (files["sliceMD5"][1], body)
+            return reply({"code": 0, "data": None})
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+class TestUploadV2Put:
+    """测试V2分片并发上传。"""
+
+    data = bytes(range(40))
+
+    @pytest.fixture
+    def access(self):
+        access = Access("id", "secret", "token")
+        access.set_retry(RetryPolicy(retries=2, backoff=0.01, jitter=0, deadline=5))
+        return access
+
+    def check(self, server):
+        assert sorted(server.slices) == list(range(1, 11))
+        for sliceNo, (md5, body) in server.slices.items():
+            chunk = self.data[(sliceNo - 1) * 4 : sliceNo * 4]
+            assert (md5, body) == (hashlib.md5(chunk).hexdigest(), chunk)
+
+    def test_parallel(self, access):
+        """测试分片按线程数并发上传。"""
+        server = FakeSliceServer()
+        access.session.request = server
+        assert access.uploadV2.put(self.data, "a.bin", threads=4) == 42
+        self.check(server)
+        assert server.peak == 4
+
+    def test_max_inflight(self, access):
+        """测试同时上传的分片字节数上限。"""
+        server = FakeSliceServer()
+        access.session.request = server
+        assert access.uploadV2.put(self.data, "a.bin", threads=8, max_inflight=9) == 42
+        assert server.peak == 2
+
+    @pytest.mark.parametrize("sliceSize", [4, 16])
+    def test_slice_retry(self, access, sliceSize):
+        """测试网络异常与服务端拒绝后重新发送完整分片（分片MD5预先计算或发送时计算）。"""
+        access._slice_size = sliceSize
+        server = FakeSliceServer({2: "network", 3: "checksum"})
+        access.session.request = server
+        assert access.uploadV2.put(self.data, "a.bin") == 42
+        self.check(server)
+
+    def test_precomputed_slice_md5(self, access, monkeypatch):
+        """测试分片大小与预先计算时相同时不再为分片单独计算MD5。"""
+        server = FakeSliceServer()
+        access.session.request = server
+        access.uploadV2.put(self.data, "a.bin")
+        assert access._slice_size == 4
+        server.slices.clear()
+
+        def forbidden(_):
+            raise AssertionError("slice hashed again")
+
+        monkeypatch.setattr(tool, "size_md5", forbidden)
+        assert access.uploadV2.put(self.data, "a.bin") == 42
+        self.check(server)
+
+    @pytest.mark.parametrize("sliceSize", [4, 16])
+    def test_shared_descriptor(self, access, tmp_path, monkeypatch, sliceSize):
+        """测试上传文件时所有分片共享一个文件描述符。"""
+        path = tmp_path / "data.bin"
+        path.write_bytes(self.data)
+        opened = []
+
+        def counting(func):
+            return lambda file, *args, **kwargs: opened.append(file) or func(file, *args, **kwargs)
+
+        monkeypatch.setattr("builtins.open", counting(open))
+        monkeypatch.setattr(os, "open", counting(os.open))
+        access._slice_size = sliceSize
+        server = FakeSliceServer()
+        access.session.request = server
+        assert access.uploadV2.put(str(path), "a.bin", threads=4) == 42
+        self.check(server)
+        # 一次计算摘要，一次共享给全部10个分片
+        assert opened == [str(path), str(path)]
+
+    @pytest.mark.parametrize("source", ["bytearray", "memoryview", "BytesIO", "file"])
+    def test_buffer_sources(self, access, tmp_path, source):
+        """测试上传 bytearray、memoryview 与文件对象（从当前位置读取）。"""
+        path = tmp_path / "data.bin"
+        path.write_bytes(b"head" + self.data)
+        server = FakeSliceServer()
+        access.session.request = server
+        with open(path, "rb") as f:
+            file_info = {
+                "bytearray": bytearray(self.data),
+                "memoryview": memoryview(self.data),
+                "BytesIO": io.BytesIO(b"head" + self.data),
+                "file": f,
+            }[source]
+            if hasattr(file_info, "seek"):
+                file_info.seek(4)
+            assert access.uploadV2.put(file_info, "a.bin", threads=4) == 42
+            self.check(server)
+            if hasattr(file_info, "seek"):
+                assert file_info.tell() == 4
+
+    def test_failure_cancels(self, access):
+        """测试分片重试用尽后取消其余分片且不完成上传。"""
+        server = FakeSliceServer({1: "rejected"})
+
+        def always_fail(method, url, files=None, **kwargs):
+            if files:
+                server.failures.setdefault(1, "rejected")
+            return server(method, url, files=files, **kwargs)
+
+        access.session.request = always_fail
+        with pytest.raises(ApiResponseFailed):
+            access.uploadV2.put(self.data, "a.bin", threads=1)
+        assert not server.completed
+        assert server.slices == {}
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
\ No newline at end of file
@@ -0,0 +1,107 @@
+"""
+x123pan请求合并模块的单元测试。
+"""
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from requests.models import Response
+
+from x123pan.src.api import Access
+from x123pan.src.batch import DetailLoader, info_to_detail
+from x123pan.src.type import ApiResponseFailed
+
+
+def test_info_to_detail():
+    """测试infos字段转换为detail格式。"""
+    detail = info_to_detail({"fileId": 1, "parentFileId": 0, "filename": "a", "etag": "e"})
+    assert detail == {"fileID": 1, "parentFileID": 0, "filename": "a", "etag": "e"}
+
+
+class TestDetailLoader:
+    """测试DetailLoader类。"""
+
+    def test_coalesce(self):
+        """测试并发请求合并为一次批量查询且去重。"""
+        calls = []
+
+        def fetch(ids):
+            calls.append(sorted(ids))
+            return [{"fileId": i, "parentFileId": 0} for i in ids]
+
+        loader = DetailLoader(fetch, lambda _: {}, window=0.05)
+        ids = [1, 2, 3, 1, 2, 3, 4]
+        with ThreadPoolExecutor(max_workers=len(ids)) as executor:
+            results = list(executor.map(loader.load, ids))
+        assert [r["fileID"] for r in results] == ids
+        assert calls == [[1, 2, 3, 4]]
+        assert loader.batches == 1
+
+    def test_max_batch(self):
+        """测试凑满批次后立即发起请求。"""
+        loader = DetailLoader(lambda ids: [{"fileId": i} for i in ids], lambda _: {}, 10, 2)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = list(executor.map(loader.load, [1, 2]))
+        assert [r["fileID"] for r in results] == [1, 2]
+
+    def test_missing_fallback(self):
+        """测试批量查询未返回的ID回退到单个查询。"""
+        loader = DetailLoader(lambda _: [], lambda i: {"fileID": i, "single": True})
+        assert loader.load(5) == {"fileID": 5, "single": True}
+
+    def test_error(self):
+        """测试批量查询失败时所有调用方收到异常。"""
+
+        def fetch(ids):
+            raise ApiResponseFailed(1, "boom")
+
+        loader = DetailLoader(fetch, lambda _: {}, window=0.05)
+        errors = []
+
+        def load(i):
+            try:
+                loader.load(i)
+            except ApiResponseFailed as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=load, args=(i,)) for i in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(errors) == 3
+
+
+class TestAccessBatch:
+    """测试Access.set_batch。"""
+
+    def test_detail_batched(self):
+        """测试file.detail合并为file.infos请求。"""
+        access = Access("id", "secret", "token")
+        access.set_batch(window=0.05)
+        urls = []
+
+        def fake(method, url, **kwargs):
+            urls.append(url)
+            response = Response()
+            response.status_code = 200
+            data = {
+                "fileList": [{"fileId": i, "parentFileId": 9} for i in kwargs["json"]["fileIds"]]
+            }
+            response._content = json.dumps({"code": 0, "data": data}).encode()
+            return response
+
+        access.session.request = fake
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(access.file.detail, range(1, 9)))
+        assert [r["parentFileID"] for r in results] == [9] * 8
+        assert len(urls) == 1 and urls[0].endswith("/api/v1/file/infos")
+
+        access.set_batch(0)
+        assert access._detail_loader is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,162 @@
+"""
+x123pan元数据缓存模块的单元测试。
+"""
+
+import time
+
+import pytest
+
+from tests.conftest import FakeDrive
+from x123pan.src.api import Access
+from x123pan.src.cache import MetaCache
+from x123pan.src.type import Mutation
+
+
+class TestMetaCache:
+    """测试MetaCache类。"""
+
+    def test_detail_from_info(self):
+        """测试detail未命中时由info转换。"""
+        cache = MetaCache()
+        cache.put_infos([{"fileId": 1, "parentFileId": 0, "filename": "a"}])
+        assert cache.get_detail(1) == {"fileID": 1, "parentFileID": 0, "filename": "a"}
+        assert cache.get_detail(2) is None
+        stats = cache.stats()
+        assert stats["info"]["hits"] == 1
+        assert stats["detail"]["misses"] == 2
+
+    def test_ttl(self):
+        """测试过期。"""
+        cache = MetaCache(ttl=0.01)
+        cache.put_detail({"fileID": 1})
+        time.sleep(0.02)
+        assert cache.get_detail(1) is None
+
+    def test_lru(self):
+        """测试超过容量时淘汰最久未使用的项。"""
+        cache = MetaCache(maxsize=2)
+        cache.put_infos([{"fileId": 1}, {"fileId": 2}])
+        cache.get_infos([1])
+        cache.put_infos([{"fileId": 3}])
+        found, missing = cache.get_infos([1, 2, 3])
+        assert sorted(found) == [1, 3] and missing == [2]
+        assert cache.stats()["info"]["evictions"] == 1
+
+    def test_invalidate_parent_list(self):
+        """测试失效文件及其所在目录的列表。"""
+        cache = MetaCache()
+        cache.put_list(10, [{"fileId": 1, "parentFileId": 10}], cache.generation)
+        cache.put_list(20, [{"fileId": 2, "parentFileId": 20}], cache.generation)
+        cache.invalidate(Mutation("trash", [1]))
+        assert cache.get_list(10) is None
+        assert cache.get_list(20) is not None
+        assert cache.get_infos([1])[1] == [1]
+
+    def test_invalidate_unknown_parent(self):
+        """测试所在目录未知时清空全部列表。"""
+        cache = MetaCache()
+        cache.put_list(10, [], cache.generation)
+        cache.invalidate(Mutation("name", [99]))
+        assert cache.get_list(10) is None
+        cache.put_list(10, [], cache.generation)
+        cache.invalidate(Mutation("mkdir", [99], [20]))
+        assert cache.get_list(10) == []
+
+    def test_stale_list_not_stored(self):
+        """测试列出期间发生变更时不写入列表。"""
+        cache = MetaCache()
+        generation = cache.generation
+        cache.invalidate(Mutation("mkdir", [5], [10]))
+        cache.put_list(10, [{"fileId": 1}], generation)
+        assert cache.get_list(10) is None
+
+
+class TestAccessCache:
+    """测试Access.set_cache的读穿透与失效。"""
+
+    @pytest.fixture
+    def drive(self):
+        return FakeDrive.flat()
+
+    @pytest.fixture
+    def access(self, drive):
+        access = Access("id", "secret", "token")
+        access.session.request = drive
+        access.set_cache(MetaCache())
+        return access
+
+    def test_list_v2_cached(self, access, drive):
+        """测试完整列出后再次列出不发起请求。"""
+        assert len(list(access.file.list_v2(0))) == 150
+        assert len(list(access.file.list_v2(0))) == 150
+        assert drive.calls.count("/api/v2/file/list") == 2
+        assert access.file.detail(5)["parentFileID"] == 0
+        assert access.file.infos([5, 6])[0]["fileId"] == 5
+        assert "/api/v1/file/detail" not in drive.calls
+        assert "/api/v1/file/infos" not in drive.calls
+
+    def test_infos_order(self, access, drive):
+        """测试部分命中缓存时按请求的顺序返回。"""
+        access.file.infos([2, 4])
+        drive.calls.clear()
+        ids = [5, 4, 3, 2, 1]
+        assert [info["fileId"] for info in access.file.infos(ids)] == ids
+        assert drive.calls == ["/api/v1/file/infos"]
+
+    def test_partial_list_not_cached(self, access, drive):
+        """测试未完整列出的目录不写入缓存，且limit恰好为整页时不请求下一页。"""
+        assert len(list(access.file.list_v2(0, limit=100))) == 100
+        assert drive.calls.count("/api/v2/file/list") == 1
+        list(access.file.list_v2(0))
+        assert drive.calls.count("/api/v2/file/list") == 3
+
+    def test_trash_invalidates(self, access, drive):
+        """测试移入回收站后目录列表失效。"""
+        list(access.file.list_v2(0))
+        access.file.trash(1)
+        assert len(list(access.file.list_v2(0))) == 149
+        assert drive.calls.count("/api/v2/file/list") == 4
+
+    def test_move_invalidates(self, access):
+        """测试移动后源目录与目标目录的列表均失效。"""
+        list(access.file.list_v2(0))
+        list(access.file.list_v2(7))
+        access.file.move([1, 2], 7)
+        assert len(list(access.file.list_v2(7))) == 2
+        assert len(list(access.file.list_v2(0))) == 148
+
+    def test_detail_cached(self, access, drive):
+        """测试detail缓存与失效。"""
+        access.file.detail(3)
+        access.file.detail(3)
+        assert drive.calls.count("/api/v1/file/detail") == 1
+        access.file.move(3, 7)
+        assert access.file.detail(3)["parentFileID"] == 7
+
+    def test_listener(self, access):
+        """测试变更监听器收到事件。"""
+        events = []
+        access.add_listener(events.append)
+        access.file.move([1], 7)
+        assert events == [Mutation("move", [1], [7])]
+        access.remove_listener(events.append)
+        access.set_cache(None)
+        assert access._listeners == []
+
+    def test_pending_uploads(self, access):
+        """测试上传期间注册的监听器收到目标目录，未完成的上传记录有上限。"""
+        access.MAX_PENDING_UPLOADS = 2
+        for i in range(3):
+            access._uploadCreated({"reuse": False, "preuploadID": f"p{i}"}, 10 + i, False)
+        assert list(access._uploads) == ["p1", "p2"]
+        events = []
+        access.add_listener(events.append)
+        access._uploadCompleted("p2", {"completed": True, "fileID": 9})
+        access._uploadCompleted("p0", {"completed": True, "fileID": 8})
+        assert events == [Mutation("upload", [9], [12]), Mutation("upload", [8], None)]
+        access._uploadAbandoned("p1")
+        assert not access._uploads
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
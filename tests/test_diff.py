@@ -0,0 +1,134 @@
+"""
+x123pan快照比较模块的单元测试。
+"""
+
+import pytest
+
+from tests.conftest import FakeDrive
+from x123pan.src.api import Access
+from x123pan.src.record import FileRecord
+from x123pan.util.diff import ChangeTracker, diff, diff_live, summary
+from x123pan.util.snapshot import Snapshot, dump
+
+
+@pytest.fixture
+def account():
+    account = FakeDrive()
+    account.add(1, 0, "docs", True)
+    account.add(2, 1, "a.txt")
+    account.add(3, 1, "b.txt")
+    account.add(4, 0, "media", True)
+    account.add(5, 4, "c.mp4")
+    account.add(6, 0, "old", True)
+    account.add(7, 6, "inner", True)
+    account.add(8, 7, "deep.txt")
+    account.add(9, 0, "keep.txt")
+    return account
+
+
+@pytest.fixture
+def access(account):
+    access = Access("id", "secret", "token")
+    access.session.request = account
+    return access
+
+
+@pytest.fixture
+def base(access, tmp_path):
+    path = str(tmp_path / "base.snap")
+    dump(access, path, trashed=True)
+    with Snapshot(path) as snap:
+        yield snap
+
+
+def by_id(changes):
+    return {c.fileId: c.kinds for c in changes}
+
+
+def mutate(access, account):
+    """通过 Access 修改，并模拟一次外部替换。"""
+    access.file.move(3, 4)
+    access.file.name(5, "movie.mp4")
+    access.file.trash(9)
+    access.file.delete(6)
+    access.file.mkdir(1, "new")
+    del account.files[2]
+    account.add(50, 1, "a.txt", etag="f" * 32)
+
+
+EXPECTED = {
+    3: ("moved",),
+    5: ("renamed",),
+    9: ("trashed",),
+    6: ("removed",),
+    7: ("removed",),
+    8: ("removed",),
+    101: ("added",),
+    50: ("replaced",),
+}
+
+
+class TestDiff:
+    """测试两份清单的归并比较。"""
+
+    def test_records(self):
+        """测试各类变化。"""
+        old = [
+            FileRecord(1, 0, "a", size=1, etag="x"),
+            FileRecord(2, 0, "b"),
+            FileRecord(3, 0, "c"),
+        ]
+        new = [
+            FileRecord(1, 9, "a2", size=2, etag="y"),
+            FileRecord(3, 0, "c"),
+            FileRecord(4, 0, "b"),
+            FileRecord(5, 0, "d"),
+        ]
+        changes = list(diff(old, new))
+        assert by_id(changes) == {
+            1: ("moved", "renamed", "modified"),
+            4: ("replaced",),
+            5: ("added",),
+        }
+        replaced = [c for c in changes if c.kinds == ("replaced",)][0]
+        assert replaced.old.fileId == 2
+        assert summary(changes) == {
+            "moved": 1,
+            "renamed": 1,
+            "modified": 1,
+            "replaced": 1,
+            "added": 1,
+        }
+
+    def test_unsorted(self):
+        """测试未排序的清单报错。"""
+        with pytest.raises(ValueError):
+            list(diff([FileRecord(2), FileRecord(1)], []))
+
+    def test_snapshots(self, access, account, base, tmp_path):
+        """测试比较两个快照。"""
+        mutate(access, account)
+        path = str(tmp_path / "now.snap")
+        dump(access, path, trashed=True)
+        with Snapshot(path) as now:
+            assert by_id(diff(base, now)) == EXPECTED
+
+
+class TestDiffLive:
+    """测试快照与当前账号的比较。"""
+
+    def test_full(self, access, account, base):
+        """测试完整遍历比较。"""
+        mutate(access, account)
+        assert by_id(diff_live(access, base)) == EXPECTED
+
+    def test_tracked_dirs(self, access, account, base):
+        """测试只重新列出被修改的目录。"""
+        tracker = ChangeTracker(access, base)
+        mutate(access, account)
+        tracker.close()
+        assert tracker.dirs == {0, 1, 4}
+        account.lists.clear()
+        assert by_id(diff_live(access, base, tracker.dirs, tracker.fileIds)) == EXPECTED
+        assert sorted(account.lists) == [0, 1, 4, 101]
+        assert access._listeners == []
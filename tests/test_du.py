@@ -0,0 +1,92 @@
+"""
+x123pan目录占用统计模块的单元测试。
+"""
+
+import pytest
+
+from tests.conftest import FakeDrive
+from x123pan.src.api import Access
+from x123pan.src.cache import MetaCache
+from x123pan.util.du import DiskUsage, Usage, du
+
+
+@pytest.fixture
+def account():
+    account = FakeDrive()
+    account.add(1, 0, "projects", True)
+    account.add(2, 1, "alpha", True)
+    account.add(3, 2, "a.bin")
+    account.add(4, 2, "b.bin")
+    account.add(5, 1, "beta", True)
+    account.add(6, 5, "c.bin")
+    account.add(7, 5, "empty", True)
+    account.add(8, 0, "top.bin")
+    for i in range(150):
+        account.add(1000 + i, 7, f"{i}.bin")
+    account.files[1149]["trashed"] = 1
+    return account
+
+
+@pytest.fixture
+def access(account):
+    access = Access("id", "secret", "token")
+    access.session.request = account
+    return access
+
+
+class TestDiskUsage:
+    """测试DiskUsage的统计与缓存。"""
+
+    def test_usage(self, access):
+        """测试递归统计（跳过回收站中的文件）。"""
+        assert du(access, 7) == Usage(1490, 149, 0)
+        assert du(access) == Usage(10 * 153, 153, 4)
+
+    def test_reuse_children(self, access, account):
+        """测试统计父目录时复用已缓存的子目录小计。"""
+        usage = DiskUsage(access)
+        assert usage.usage(2) == Usage(20, 2, 0)
+        account.lists.clear()
+        assert usage.usage_many([1, 5]) == {1: Usage(1520, 152, 3), 5: Usage(1500, 150, 1)}
+        assert sorted(account.lists) == [1, 5, 7]
+        account.lists.clear()
+        assert usage.usage(0) == Usage(1530, 153, 4)
+        assert account.lists == [0]
+
+    def test_feeds_cache(self, access, account):
+        """测试经 walk 调度列出的目录写入元数据缓存。"""
+        access.set_cache(MetaCache())
+        assert du(access, 1) == Usage(1520, 152, 3)
+        calls = len(account.calls)
+        assert len(list(access.file.list_v2(7))) == 149
+        assert len(account.calls) == calls
+
+    def test_invalidate(self, access, account):
+        """测试修改后只重新列出所在目录，重命名不失效缓存。"""
+        usage = DiskUsage(access)
+        usage.usage(0)
+        account.lists.clear()
+        access.file.name(3, "renamed.bin")
+        assert usage.usage(0) == Usage(1530, 153, 4)
+        assert account.lists == []
+        access.file.trash(3)
+        assert usage.usage(1) == Usage(1510, 151, 3)
+        assert account.lists == [2]
+        access.file.move(6, 2)
+        assert usage.usage(2) == Usage(20, 2, 0)
+        assert usage.usage(5) == Usage(1490, 149, 1)
+        access.file.mkdir(2, "new")
+        assert usage.usage(0) == Usage(1520, 152, 5)
+        access.file.delete(5)
+        assert usage.usage(0) == Usage(30, 3, 3)
+        usage.close()
+        assert access._listeners == []
+
+    def test_unknown_parent(self, access, account):
+        """测试无法确定所在目录时清空缓存。"""
+        usage = DiskUsage(access)
+        usage.usage(2)
+        account.lists.clear()
+        access._notify("upload", [99], None)
+        usage.usage(2)
+        assert account.lists == [2]
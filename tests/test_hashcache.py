@@ -0,0 +1,135 @@
+"""
+x123pan文件摘要缓存模块的单元测试。
+"""
+
+import hashlib
+import os
+import time
+
+import pytest
+
+from tests.conftest import reply
+from x123pan.src import tool
+from x123pan.src.api import Access
+from x123pan.src.hashcache import HashCache
+
+
+def write(path, data, age=60):
+    """写入文件并将修改时间设为 age 秒前。"""
+    path.write_bytes(data)
+    past = time.time_ns() - age * 1_000_000_000
+    os.utime(path, ns=(past, past))
+    return str(path)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with HashCache(str(tmp_path / "hash.db")) as cache:
+        yield cache
+
+
+class TestHashCache:
+    """测试HashCache的命中、失效与淘汰。"""
+
+    def test_hit_without_read(self, cache, tmp_path):
+        """测试文件未变化时直接返回缓存结果。"""
+        path = write(tmp_path / "a.bin", b"x" * 10)
+        first = tool.digest(path, 4, cache=cache)
+        assert first.sliceMD5s == [hashlib.md5(b"xxxx").hexdigest()] * 2 + [
+            hashlib.md5(b"xx").hexdigest()
+        ]
+        # 内容改变但大小、修改时间与 inode 不变时仍命中，说明没有读取文件
+        stat = os.stat(path)
+        with open(path, "r+b") as f:
+            f.write(b"y")
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assert tool.digest(path, 4, cache=cache) == first
+        assert tool.size_md5(path, cache) == (10, first.md5)
+        assert cache.stats() == {
+            "hits": 2,
+            "misses": 1,
+            "invalidations": 0,
+            "evictions": 0,
+            "size": 1,
+        }
+
+    def test_invalidate_on_change(self, cache, tmp_path):
+        """测试修改时间或大小变化后重新计算。"""
+        path = write(tmp_path / "a.bin", b"old")
+        tool.size_md5(path, cache)
+        write(tmp_path / "a.bin", b"new", age=30)
+        assert tool.size_md5(path, cache) == tool.size_md5(b"new")
+        assert cache.stats()["invalidations"] == 1
+
+    def test_racy_file_not_cached(self, cache, tmp_path):
+        """测试刚修改过的文件不写入缓存。"""
+        path = write(tmp_path / "a.bin", b"data", age=0)
+        tool.size_md5(path, cache)
+        assert len(cache) == 0
+
+    def test_slice_size_mismatch(self, cache, tmp_path):
+        """测试分片大小不同时只返回整体MD5。"""
+        path = write(tmp_path / "a.bin", b"x" * 10)
+        tool.digest(path, 4, cache=cache)
+        result = tool.digest(path, 5, cache=cache)
+        assert result.md5 == hashlib.md5(b"x" * 10).hexdigest()
+        assert result.slices(5) is None and result.sliceMD5s == []
+
+    def test_evict_least_recently_used(self, tmp_path):
+        """测试超过上限时淘汰最久未使用的记录。"""
+        paths = [write(tmp_path / f"{i}.bin", bytes([i])) for i in range(3)]
+        with HashCache(str(tmp_path / "hash.db"), max_entries=2) as cache:
+            tool.size_md5(paths[0], cache)
+            tool.size_md5(paths[1], cache)
+            tool.size_md5(paths[0], cache)
+            tool.size_md5(paths[2], cache)
+            assert cache.get(paths[1]) is None
+            assert cache.get(paths[0]) is not None
+            assert cache.stats()["evictions"] == 1
+
+    def test_running_count(self, tmp_path):
+        """测试写入时维护记录数而不统计全表。"""
+        paths = [write(tmp_path / f"{i}.bin", bytes([i])) for i in range(3)]
+        statements = []
+        with HashCache(str(tmp_path / "hash.db"), max_entries=10) as cache:
+            cache._db.set_trace_callback(statements.append)
+            for path in paths + paths[:1]:
+                tool.size_md5(path, cache)
+            assert len(cache) == 3
+            cache.discard(paths[1])
+            cache.discard(paths[1])
+            assert cache.stats()["size"] == 2
+            cache._db.set_trace_callback(None)
+        assert not [s for s in statements if "COUNT" in s]
+        with HashCache(str(tmp_path / "hash.db")) as cache:
+            assert len(cache) == 2
+
+    def test_persistent(self, tmp_path):
+        """测试重新打开后缓存仍然有效。"""
+        path = write(tmp_path / "a.bin", b"data")
+        database = str(tmp_path / "hash.db")
+        with HashCache(database) as cache:
+            tool.size_md5(path, cache)
+        with HashCache(database) as cache:
+            assert cache.get(path).md5 == hashlib.md5(b"data").hexdigest()
+
+
+class TestAccessHashCache:
+    """测试上传时使用摘要缓存。"""
+
+    def test_rapid_upload(self, cache, tmp_path):
+        """测试秒传未变化的文件时不读取文件。"""
+        path = write(tmp_path / "a.bin", b"payload")
+        etags = []
+
+        def server(_method, _url, json=None, **_kwargs):
+            etags.append(json["etag"])
+            return reply({"code": 0, "data": {"reuse": True, "fileID": 7}})
+
+        access = Access("id", "secret", "token")
+        access.session.request = server
+        access.set_hash_cache(cache)
+        assert access.uploadV2.put(path, "a.bin") == 7
+        assert access.uploadV2.put(path, "a.bin") == 7
+        assert etags == [hashlib.md5(b"payload").hexdigest()] * 2
+        assert cache.stats()["hits"] == 1
@@ -0,0 +1,137 @@
+"""
+x123pan本地目录索引模块的单元测试。
+"""
+
+import pytest
+
+from tests.conftest import FakeDrive
+from x123pan.src.api import Access
+from x123pan.util.index import TreeIndex
+
+
+@pytest.fixture
+def drive():
+    drive = FakeDrive()
+    drive.add(1, 0, "docs", True)
+    drive.add(2, 1, "a.txt", etag="md5-2", size=20)
+    drive.add(3, 1, "sub", True)
+    drive.add(4, 3, "b.txt", etag="md5-4", size=40)
+    drive.add(5, 0, "c.txt", etag="md5-5", size=50)
+    return drive
+
+
+@pytest.fixture
+def access(drive):
+    access = Access("id", "secret", "token")
+    access.session.request = drive
+    return access
+
+
+@pytest.fixture
+def index(access):
+    with TreeIndex(access, ":memory:") as index:
+        index.crawl(workers=2)
+        yield index
+
+
+class TestTreeIndex:
+    """测试TreeIndex的完整遍历、增量同步与本地查询。"""
+
+    def test_crawl_and_lookup(self, index):
+        """测试完整遍历后按ID、路径、etag查询。"""
+        assert index.count() == 5
+        assert index.get(4)["filename"] == "b.txt"
+        assert index.get(99) is None
+        assert [f["filename"] for f in index.children(1)] == ["a.txt", "sub"]
+        assert index.resolve("/docs/sub/b.txt") == 4
+        assert index.resolve("/") == 0
+        assert index.resolve("/docs/missing") is None
+        assert index.path(4) == "/docs/sub/b.txt"
+        assert [f["fileId"] for f in index.by_etag("md5-2")] == [2]
+        assert sorted(f["fileId"] for f in index.walk(1)) == [2, 3, 4]
+
+    def test_mutation_marks_stale(self, index, access, drive):
+        """测试本客户端的修改只重新列出受影响的目录。"""
+        access.file.move(4, 0)
+        assert sorted(index.stale_dirs()) == [0, 3]
+        drive.calls.clear()
+        assert index.refresh() == 2
+        assert index.stale_dirs() == []
+        assert drive.calls == ["/api/v2/file/list"] * 2
+        assert index.path(4) == "/b.txt"
+        access.file.trash(2)
+        index.refresh()
+        assert index.get(2)["trashed"] == 1
+        assert index.resolve("/docs/a.txt") is None
+        assert index.resolve("/docs/a.txt", trashed=True) == 2
+
+    def test_removed_subtree(self, index, drive):
+        """测试目录被删除后其子孙从索引中移除。"""
+        del drive.files[3], drive.files[4]
+        index.mark_stale([1])
+        index.refresh()
+        assert index.get(3) is None
+        assert index.get(4) is None
+        assert index.count() == 3
+
+    def test_unknown_parent(self, index, access, drive):
+        """测试所在目录未知的新文件通过detail查找上级目录。"""
+        drive.files[6] = dict(drive.files[3], fileId=6, filename="new")
+        drive.files[7] = dict(drive.files[4], fileId=7, parentFileId=6, filename="x.txt")
+        access._notify("upload", [7])
+        index.refresh()
+        assert index.path(7) == "/docs/new/x.txt"
+
+    def test_deleted_unknown_file(self, index, access, drive):
+        """测试删除索引中没有的文件不影响 refresh，查询失败的待定文件被丢弃。"""
+        drive.add(8, 1, "d.txt")
+        access.file.delete(8)
+        access.file.trash(5)
+        drive.add(9, 1, "e.txt")
+        access._notify("upload", [9])
+        drive.delete(9)
+        drive.calls.clear()
+        assert index.refresh() == 1
+        assert drive.calls == ["/api/v1/file/detail", "/api/v2/file/list"]
+        assert index.refresh() == 0
+        assert index.get(5)["trashed"] == 1
+
+    def test_recrawl_and_persist(self, access, drive, tmp_path):
+        """测试重新遍历清除已删除的文件，数据库关闭后可重新打开。"""
+        path = str(tmp_path / "index.db")
+        with TreeIndex(access, path, listen=False) as index:
+            index.crawl()
+            del drive.files[5]
+            index.crawl()
+            assert index.get(5) is None
+        with TreeIndex(access, path) as index:
+            assert index.count() == 4
+            assert index.resolve("/docs/sub/b.txt") == 4
+        assert access._listeners == []
+
+    def test_new_subdir_listed(self, index, drive):
+        """测试同步时新出现的子目录会继续列出。"""
+        drive.files[6] = dict(drive.files[3], fileId=6, parentFileId=0, filename="moved")
+        drive.files[7] = dict(drive.files[4], fileId=7, parentFileId=6, filename="y.txt")
+        index.mark_stale([0])
+        assert index.refresh() == 2
+        assert index.resolve("/moved/y.txt") == 7
+
+    def test_mark_during_crawl(self, access):
+        """测试遍历只清除开始前的待同步标记，遍历期间的标记保留。"""
+        with TreeIndex(access, ":memory:") as index:
+            index.mark_stale([1])
+            request = access.session.request
+
+            def marking(*args, **kwargs):
+                index.mark_stale([3])
+                return request(*args, **kwargs)
+
+            access.session.request = marking
+            index.crawl(workers=1)
+            assert index.stale_dirs() == [3]
+
+    def test_walk_chunks(self, index):
+        """测试按块读取子树。"""
+        assert sorted(f["fileId"] for f in index.walk(chunk_size=2)) == [1, 2, 3, 4, 5]
+        assert [f["fileId"] for f in index.walk(3, chunk_size=1)] == [4]
@@ -0,0 +1,183 @@
+"""
+x123pan限流器模块的单元测试。
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from x123pan.src.limiter import AIMDController, TokenBucket
+from x123pan.src.type import API_INFO
+
+
+class TestTokenBucket:
+    """测试TokenBucket类。"""
+
+    def test_unlimited(self):
+        """测试rate为0时不限流。"""
+        bucket = TokenBucket(0)
+        assert all(bucket.try_acquire() for _ in range(1000))
+        assert bucket.acquire() == 0
+
+    def test_burst_capacity(self):
+        """测试突发容量。"""
+        bucket = TokenBucket(1, capacity=5)
+        assert all(bucket.try_acquire() for _ in range(5))
+        assert not bucket.try_acquire()
+
+    def test_reserve_wait_time(self):
+        """测试令牌耗尽后的预约等待时间。"""
+        bucket = TokenBucket(10, capacity=1)
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == pytest.approx(0.1, abs=0.02)
+        assert bucket.reserve() == pytest.approx(0.2, abs=0.02)
+
+    def test_acquire_rate(self):
+        """测试多线程下的实际速率且不创建额外线程。"""
+        bucket = TokenBucket(50, capacity=1)
+        before = threading.active_count()
+        begin = time.monotonic()
+        threads = [threading.Thread(target=bucket.acquire) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for _ in range(6):
+            bucket.acquire()
+        assert time.monotonic() - begin >= 0.17
+        assert threading.active_count() == before
+
+    def test_acquire_async(self):
+        """测试异步获取令牌。"""
+        bucket = TokenBucket(20, capacity=1)
+
+        async def main():
+            return await asyncio.gather(*(bucket.acquire_async() for _ in range(3)))
+
+        waits = asyncio.run(main())
+        assert max(waits) == pytest.approx(0.1, abs=0.02)
+
+    def test_set_rate(self):
+        """测试调整速率。"""
+        bucket = TokenBucket(1, capacity=1)
+        bucket.acquire()
+        assert not bucket.try_acquire()
+        bucket.set_rate(0)
+        assert bucket.try_acquire()
+
+    def test_invalid_rate(self):
+        """测试无效参数。"""
+        with pytest.raises(ValueError):
+            TokenBucket(-1)
+
+
+class TestAPIInfoLimiter:
+    """测试API_INFO的限流接口。"""
+
+    def test_try_require(self):
+        """测试非阻塞请求访问权限。"""
+        api_info = API_INFO("http://example.com/api", "GET", 2)
+        assert api_info.try_require()
+        assert api_info.try_require()
+        assert not api_info.try_require()
+
+    def test_burst(self):
+        """测试突发上限配置。"""
+        api_info = API_INFO("http://example.com/api", "GET", 1, burst=3)
+        assert api_info.limiter.capacity == 3
+
+
+class TestAIMDController:
+    """测试AIMDController类。"""
+
+    def test_throttle_decrease(self):
+        """测试收到429后乘性降速并返回带抖动的退避时间。"""
+        api_info = API_INFO("http://example.com/a", "GET", 10)
+        ctl = AIMDController(decrease=0.5, backoff=1, jitter=0.5)
+        wait = ctl.on_throttle(api_info)
+        assert 0.5 <= wait <= 1.5
+        assert api_info.limiter.rate == 5
+        assert ctl.limits() == {"GET http://example.com/a": 5}
+
+    def test_success_increase_only_when_waited(self):
+        """测试只有等待过令牌的成功请求才会提速。"""
+        api_info = API_INFO("http://example.com/b", "GET", 4)
+        ctl = AIMDController(increase=2, max_rate=5)
+        ctl.on_success(api_info, 0)
+        assert api_info.limiter.rate == 4
+        ctl.on_success(api_info, 0.1)
+        assert api_info.limiter.rate == 4.5
+        for _ in range(10):
+            ctl.on_success(api_info, 0.1)
+        assert api_info.limiter.rate == 5
+
+    def test_unlimited_endpoint_starts_limiting(self):
+        """测试原本不限流的端点收到429后开始限流。"""
+        api_info = API_INFO("http://example.com/c", "POST", 0)
+        ctl = AIMDController(min_rate=2)
+        for _ in range(20):
+            ctl.on_success(api_info)
+        ctl.on_throttle(api_info)
+        assert api_info.limiter.rate == 10
+
+    def test_reset(self):
+        """测试恢复原始配置。"""
+        api_info = API_INFO("http://example.com/d", "GET", 8)
+        ctl = AIMDController()
+        ctl.on_throttle(api_info)
+        ctl.reset()
+        assert api_info.limiter.rate == 8
+        assert ctl.limits() == {}
+
+    def test_persist(self, tmp_path):
+        """测试学习结果的持久化与加载。"""
+        path = str(tmp_path / "limits.json")
+        api_info = API_INFO("http://example.com/e", "GET", 8)
+        AIMDController(path=path).on_throttle(api_info)
+
+        fresh = API_INFO("http://example.com/e", "GET", 8)
+        ctl = AIMDController(path=path)
+        ctl.attach(fresh)
+        assert fresh.limiter.rate == 4
+
+    def test_persist_concurrent(self, tmp_path):
+        """测试多个线程同时收到429时持久化互不干扰。"""
+        path = tmp_path / "limits.json"
+        ctl = AIMDController(path=str(path), save_interval=0)
+        apis = [API_INFO(f"http://example.com/{i}", "GET", 8) for i in range(8)]
+        errors = []
+
+        def throttle(api_info):
+            try:
+                for _ in range(20):
+                    ctl.on_throttle(api_info)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=throttle, args=(api,)) for api in apis]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+        assert [p.name for p in tmp_path.iterdir()] == ["limits.json"]
+        fresh = AIMDController()
+        fresh.load(str(path))
+        assert fresh.limits() == ctl.limits()
+
+    def test_save_interval(self, tmp_path, monkeypatch):
+        """测试429与提速共用持久化间隔。"""
+        saves = []
+        ctl = AIMDController(path=str(tmp_path / "limits.json"), save_interval=60)
+        monkeypatch.setattr(ctl, "save", lambda: saves.append(1))
+        api_info = API_INFO("http://example.com/f", "GET", 8)
+        for _ in range(3):
+            ctl.on_throttle(api_info)
+            ctl.on_success(api_info, 0.1)
+        assert len(saves) == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,110 @@
+"""
+x123pan指标统计模块的单元测试。
+"""
+
+import json
+import threading
+
+import pytest
+from requests.models import PreparedRequest, Response
+
+from x123pan.src.api import Access
+from x123pan.src.const import ConstAPI
+from x123pan.src.metrics import Histogram, Metrics
+
+
+class TestHistogram:
+    """测试Histogram类。"""
+
+    def test_observe(self):
+        """测试记录观测值。"""
+        histogram = Histogram((0.1, 1))
+        for value in (0.05, 0.5, 0.5, 5):
+            histogram.observe(value)
+        assert histogram.counts == [1, 2, 1]
+        assert histogram.count == 4
+        assert histogram.sum == pytest.approx(6.05)
+        assert histogram.quantile(0.5) == 1
+
+
+class TestMetrics:
+    """测试Metrics类。"""
+
+    def test_snapshot(self):
+        """测试按端点统计。"""
+        metrics = Metrics()
+        metrics.begin("get", "https://host/api/v1/a?x=1")
+        assert metrics.snapshot() == {}
+        metrics.end("GET", "https://host/api/v1/a", 0.2, wait=0.1, sent=10, received=20)
+        metrics.inc("GET", "https://host/api/v1/a", "throttled")
+        item = metrics.snapshot()["GET /api/v1/a"]
+        assert item["requests"] == 1
+        assert item["throttled"] == 1
+        assert item["bytes_sent"] == 10
+        assert item["bytes_received"] == 20
+        assert item["in_flight"] == 0
+        assert item["latency"]["count"] == 1
+        assert item["limiter_wait"]["sum"] == pytest.approx(0.1)
+
+    def test_sink(self):
+        """测试事件回调。"""
+        metrics = Metrics()
+        events = []
+        metrics.add_sink(events.append)
+        metrics.begin("POST", "https://host/b")
+        metrics.end("POST", "https://host/b", 0.1, error=True)
+        assert events[0]["endpoint"] == "/b"
+        assert events[0]["error"] is True
+        metrics.remove_sink(events.append)
+
+    def test_prometheus(self):
+        """测试Prometheus文本导出。"""
+        metrics = Metrics(buckets=(0.1,))
+        metrics.begin("GET", "https://host/c")
+        metrics.end("GET", "https://host/c", 0.05)
+        text = metrics.prometheus()
+        assert 'x123pan_requests_total{method="GET",endpoint="/c"} 1' in text
+        assert 'x123pan_latency_seconds_bucket{method="GET",endpoint="/c",le="0.1"} 1' in text
+        assert 'x123pan_latency_seconds_bucket{method="GET",endpoint="/c",le="+Inf"} 1' in text
+        assert "# TYPE x123pan_in_flight gauge" in text
+
+    def test_report(self):
+        """测试定期回调快照。"""
+        metrics = Metrics()
+        got = threading.Event()
+        stop = metrics.report(0.01, lambda _: got.set())
+        assert got.wait(1)
+        stop.set()
+
+
+class TestAccessMetrics:
+    """测试Access.request的指标埋点。"""
+
+    def test_request_metrics(self):
+        """测试请求、429重试与字节统计。"""
+        access = Access("id", "secret", "token")
+        metrics = Metrics()
+        access.set_metrics(metrics)
+        replies = [{"code": 429, "message": "busy"}, {"code": 0, "data": {"ok": 1}}]
+
+        def fake(method, url, **kwargs):
+            response = Response()
+            response.status_code = 200
+            response._content = json.dumps(replies.pop(0)).encode()
+            response.request = PreparedRequest()
+            response.request.prepare(method=method, url=url, json=kwargs.get("json"))
+            return response
+
+        access.session.request = fake
+        assert access.request(ConstAPI.FILE_TRASH, {"fileIDs": [1]}) == {"ok": 1}
+        item = metrics.snapshot()["POST /api/v1/file/trash"]
+        assert item["requests"] == 2
+        assert item["errors"] == 1
+        assert item["retries"] == 1
+        assert item["throttled"] == 1
+        assert item["bytes_sent"] == 2 * len(b'{"fileIDs": [1]}')
+        assert item["bytes_received"] > 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
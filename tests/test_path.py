@@ -0,0 +1,101 @@
+"""
+x123pan路径解析模块的单元测试。
+"""
+
+import threading
+
+import pytest
+
+from tests.conftest import FakeDrive
+from x123pan.src.api import Access
+from x123pan.util.all import get_path
+from x123pan.util.path import PathResolver, split_path
+
+
+@pytest.fixture
+def drive():
+    drive = FakeDrive()
+    drive.delay = 0.01
+    drive.add(1, 0, "a", True)
+    drive.add(2, 1, "b", True)
+    drive.add(3, 2, "x.txt")
+    drive.add(4, 2, "y.txt")
+    drive.add(5, 0, "c", True)
+    drive.add(6, 5, "z.txt")
+    return drive
+
+
+@pytest.fixture
+def access(drive):
+    access = Access("id", "secret", "token")
+    access.session.request = drive
+    return access
+
+
+class TestPathResolver:
+    """测试PathResolver的双向解析与缓存。"""
+
+    def test_split_path(self):
+        """测试路径拆分。"""
+        assert split_path("/a//b\\c/") == ("a", "b", "c")
+        assert split_path("/") == ()
+
+    def test_paths_by_level(self, access, drive):
+        """测试批量获取路径时每层只查询一次infos。"""
+        resolver = PathResolver(access)
+        paths = resolver.paths([3, 4, 6, 99])
+        assert paths == {3: "/a/b/x.txt", 4: "/a/b/y.txt", 6: "/c/z.txt", 99: None}
+        assert drive.calls.count("/api/v1/file/infos") == 3
+        drive.calls.clear()
+        assert resolver.path(2) == "/a/b"
+        assert resolver.path(0) == "/"
+        assert drive.calls == []
+
+    def test_resolve_shared_prefix(self, access, drive):
+        """测试批量解析路径时公共前缀只列出一次。"""
+        resolver = PathResolver(access, workers=4)
+        result = resolver.resolve_many(["/a/b/x.txt", "a/b/y.txt", "/c/z.txt", "/a/none/q", "/"])
+        assert result == {"/a/b/x.txt": 3, "a/b/y.txt": 4, "/c/z.txt": 6, "/a/none/q": None, "/": 0}
+        assert drive.calls.count("/api/v2/file/list") == 4
+        drive.calls.clear()
+        assert resolver.resolve("/a/b/x.txt") == 3
+        assert resolver.path(3) == "/a/b/x.txt"
+        assert drive.calls == []
+
+    def test_file_component(self, access, drive):
+        """测试路径中间一级是文件时不再列出该文件。"""
+        resolver = PathResolver(access)
+        assert resolver.resolve_many(["/c/z.txt/b", "/c/z.txt"]) == {
+            "/c/z.txt/b": None,
+            "/c/z.txt": 6,
+        }
+        assert drive.lists == [0, 5]
+
+    def test_concurrent_single_flight(self, access, drive):
+        """测试多个线程同时解析时同一目录只列出一次。"""
+        resolver = PathResolver(access)
+        threads = [threading.Thread(target=resolver.resolve, args=("/a/b",)) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert drive.calls.count("/api/v2/file/list") == 2
+
+    def test_invalidate_on_move(self, access):
+        """测试移动文件后自动失效。"""
+        resolver = PathResolver(access)
+        assert resolver.resolve("/a/b/x.txt") == 3
+        access.file.move(3, 5)
+        assert resolver.resolve("/a/b/x.txt") is None
+        assert resolver.resolve("/c/x.txt") == 3
+        assert resolver.path(3) == "/c/x.txt"
+        resolver.close()
+        assert access._listeners == []
+
+    def test_get_path(self, access):
+        """测试get_path使用共享解析器。"""
+        resolver = PathResolver(access, listen=False)
+        assert get_path(access, 6, resolver) == "/c/z.txt"
+        assert get_path(access, 3) == "/a/b/x.txt"
+        with pytest.raises(ValueError):
+            get_path(access, 99)
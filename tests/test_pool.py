@@ -0,0 +1,103 @@
+"""
+x123pan连接池模块的单元测试。
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from x123pan.src.api import Access
+from x123pan.src.pool import PooledAdapter, PoolStats
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"code": 0, "data": null}'
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_HEAD = do_GET
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class TestPoolStats:
+    """测试PoolStats类。"""
+
+    def test_snapshot(self):
+        """测试统计快照。"""
+        stats = PoolStats()
+        stats.add("a", "requests", 3)
+        stats.add("a", "new")
+        assert stats.snapshot()["a"]["hits"] == 2
+        stats.reset()
+        assert stats.snapshot() == {}
+
+
+class TestPooledAdapter:
+    """测试Access的共享连接池。"""
+
+    def test_default_adapter(self):
+        """测试默认挂载带统计的适配器。"""
+        access = Access("id", "secret", "token")
+        assert isinstance(access.session.get_adapter("https://example.com"), PooledAdapter)
+
+    def test_keep_alive_reuse(self, server):
+        """测试连接复用统计。"""
+        access = Access("id", "secret", "token")
+        for _ in range(3):
+            access.session.get(server)
+        stats = access.pool_stats()["127.0.0.1"]
+        assert stats["requests"] == 3
+        assert stats["new"] == 1
+        assert stats["hits"] == 2
+
+    def test_prewarm(self, server):
+        """测试预热连接。"""
+        access = Access("id", "secret", "token")
+        access.set_pool(pool_size=2, host_pool_size={"127.0.0.1": 4})
+        access.prewarm([server], connections=3)
+        assert access.pool_stats()["127.0.0.1"]["new"] == 3
+        access.session.get(server)
+        stats = access.pool_stats()["127.0.0.1"]
+        assert stats["new"] == 3
+        assert stats["hits"] == 1
+
+    def test_block_wait(self, server):
+        """测试阻塞模式下的等待统计。"""
+        access = Access("id", "secret", "token")
+        access.set_pool(pool_size=1, block=True)
+        barrier = threading.Barrier(3)
+
+        def get():
+            barrier.wait()
+            access.session.get(server)
+
+        threads = [threading.Thread(target=get) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        stats = access.pool_stats()["127.0.0.1"]
+        assert stats["new"] == 1
+        assert stats["requests"] == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
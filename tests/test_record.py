@@ -0,0 +1,89 @@
+"""
+x123pan紧凑文件记录模块的单元测试。
+"""
+
+import pytest
+
+from x123pan.src import record
+from x123pan.src.record import FileRecord, FileTable, FileType
+
+
+def make(fileId, size=0, etag="", isDir=False, trashed=0):
+    return {
+        "fileId": fileId,
+        "parentFileId": 1,
+        "filename": f"file{fileId % 2}",
+        "type": int(isDir),
+        "size": size,
+        "etag": etag,
+        "status": 0,
+        "category": 2,
+        "trashed": trashed,
+        "createAt": "2025-01-17 12:00:00",
+    }
+
+
+@pytest.fixture
+def table():
+    return FileTable(
+        [
+            make(1, 10, "0" * 31 + "1"),
+            make(2, 20, "0" * 31 + "2"),
+            make(3, 0, isDir=True),
+            make(4, 40, "0" * 31 + "1", trashed=1),
+            make(5, 50, "ODD-ETAG"),
+        ]
+    )
+
+
+class TestFileRecord:
+    """测试FileRecord。"""
+
+    def test_from_dict(self):
+        """测试由字典创建并转换回字典。"""
+        info = make(1, 10, "abc")
+        r = FileRecord.from_dict(info)
+        assert r.type is FileType.FILE and not r.is_dir
+        assert r["filename"] == "file1"
+        assert r.to_dict() == {k: info[k] for k in record.FIELDS}
+        assert not hasattr(r, "__dict__")
+        with pytest.raises(KeyError):
+            r["createAt"]
+
+    def test_detail_keys_and_intern(self):
+        """测试兼容 fileID 字段名并驻留文件名。"""
+        a = FileRecord.from_dict({"fileID": 7, "parentFileID": 3, "filename": "".join(["x", "y"])})
+        b = FileRecord.from_dict({"fileId": 8, "filename": "".join(["x", "y"]), "type": 1})
+        assert (a.fileId, a.parentFileId) == (7, 3)
+        assert a.filename is b.filename
+        assert b.is_dir
+
+
+class TestFileTable:
+    """测试FileTable。"""
+
+    def test_roundtrip(self, table):
+        """测试按行读取与转换回字典。"""
+        assert len(table) == 5
+        assert table[-1].etag == "ODD-ETAG"
+        assert table[2].etag == "" and table[2].is_dir
+        assert [d["fileId"] for d in table.to_dicts()] == [1, 2, 3, 4, 5]
+        assert table.to_dicts()[0] == FileRecord.from_dict(make(1, 10, "0" * 31 + "1")).to_dict()
+        assert list(table.column("size")) == [10, 20, 0, 40, 50]
+        with pytest.raises(IndexError):
+            table[5]
+
+    def test_filter(self, table):
+        """测试按大小、etag、类型、回收站筛选。"""
+        assert [r.fileId for r in table.filter(min_size=20, max_size=40)] == [2, 4]
+        assert [r.fileId for r in table.filter(etag="0" * 31 + "1")] == [1, 4]
+        assert [r.fileId for r in table.filter(etag="0" * 31 + "1", trashed=False)] == [1]
+        assert [r.fileId for r in table.filter(type=FileType.DIR)] == [3]
+        assert [r.fileId for r in table.filter(etag="ODD-ETAG")] == [5]
+
+    def test_filter_without_numpy(self, table, monkeypatch):
+        """测试未安装 numpy 时的筛选与 to_numpy 报错。"""
+        monkeypatch.setattr(record, "_numpy", lambda: None)
+        assert [r.fileId for r in table.filter(min_size=20, type=0, trashed=False)] == [2, 5]
+        with pytest.raises(ImportError):
+            table.to_numpy("size")
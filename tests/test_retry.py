@@ -0,0 +1,87 @@
+"""
+x123pan重试策略模块的单元测试。
+"""
+
+import math
+import time
+
+import pytest
+
+from x123pan.src.retry import Deadline, RetryPolicy, files_size
+from x123pan.src.type import API_INFO, Ctx, DeadlineExceeded, SectionDataReader
+
+
+class TestDeadline:
+    """测试Deadline类。"""
+
+    def test_unlimited(self):
+        """测试不限时。"""
+        deadline = Deadline(None)
+        assert deadline.remaining() == math.inf
+        assert deadline.sleep_time(100, "u") == 100
+
+    def test_expired(self):
+        """测试超时后立即失败。"""
+        deadline = Deadline(0.01)
+        time.sleep(0.02)
+        with pytest.raises(DeadlineExceeded) as exc:
+            deadline.check("http://example.com/a")
+        assert exc.value.url == "http://example.com/a"
+        assert isinstance(exc.value, TimeoutError)
+
+    def test_sleep_past_deadline(self):
+        """测试退避等待将超过截止时间时直接失败。"""
+        deadline = Deadline(1)
+        assert deadline.sleep_time(0.1, "u") == 0.1
+        with pytest.raises(DeadlineExceeded):
+            deadline.sleep_time(2, "u")
+
+    def test_of(self):
+        """测试参数转换。"""
+        deadline = Deadline(5)
+        assert Deadline.of(deadline, 1) is deadline
+        assert Deadline.of(None, 3).timeout == 3
+        assert Deadline.of(2, 3).timeout == 2
+
+
+class TestRetryPolicy:
+    """测试RetryPolicy类。"""
+
+    def test_delay(self):
+        """测试指数退避与上限。"""
+        policy = RetryPolicy(backoff=1, max_backoff=4, jitter=0)
+        assert [policy.delay(n) for n in range(1, 5)] == [1, 2, 4, 4]
+        policy = RetryPolicy(backoff=1, jitter=0.5)
+        assert all(0.5 <= policy.delay(1) <= 1.5 for _ in range(100))
+
+    def test_size_aware_timeout(self):
+        """测试读超时随请求体大小增加。"""
+        policy = RetryPolicy(connect_timeout=4, read_timeout=10, throughput=1024)
+        api = API_INFO("http://example.com/a", "POST")
+        deadline = Deadline(None)
+        assert policy.timeout(api, 0, deadline) == (4, 10)
+        assert policy.timeout(api, 10 * 1024, deadline) == (4, 20)
+        assert policy.timeout(API_INFO("u", "GET", timeout=30), 0, deadline) == (4, 30)
+
+    def test_timeout_capped_by_deadline(self):
+        """测试超时不超过剩余时间。"""
+        policy = RetryPolicy(connect_timeout=4, read_timeout=60)
+        connect, read = policy.timeout(API_INFO("u", "GET"), 0, Deadline(1))
+        assert connect <= 1 and read <= 1
+
+    def test_next_poll(self):
+        """测试轮询间隔逐渐增大。"""
+        policy = RetryPolicy(max_poll_interval=0.3)
+        assert policy.next_poll(0.1) == 0.2
+        assert policy.next_poll(0.2) == 0.3
+
+    def test_files_size(self):
+        """测试multipart文件字段大小估算。"""
+        reader = SectionDataReader(Ctx(), b"x" * 100, (10, 60))
+        files = {"sliceNo": (None, 1), "slice": ("name", reader), "raw": ("n", b"abc")}
+        assert files_size(files) == 53
+        assert files_size(None) == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,131 @@
+"""
+x123pan文件名搜索索引模块的单元测试。
+"""
+
+import pytest
+
+from tests.conftest import FakeDrive
+from x123pan.src.api import Access
+from x123pan.src.search import SearchIndex, glob_literals, regex_literals, trigrams
+from x123pan.src.type import Mutation
+
+
+def make(fileId, name, parent=0, size=0, isDir=False):
+    return {
+        "fileId": fileId,
+        "parentFileId": parent,
+        "filename": name,
+        "type": int(isDir),
+        "size": size,
+        "etag": "",
+        "trashed": 0,
+    }
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex()
+    index.update(
+        [
+            make(1, "Movies", isDir=True),
+            make(2, "Holiday.MP4", 1, 5 << 20),
+            make(3, "holiday-notes.txt", 1, 100),
+            make(4, "report_2024.pdf", 0, 2 << 20),
+            make(5, "Season1", 1, isDir=True),
+            make(6, "episode01.mkv", 5, 700 << 20),
+        ]
+    )
+    return index
+
+
+def ids(records):
+    return [r.fileId for r in records]
+
+
+class TestLiterals:
+    """测试必须出现的字面量片段提取。"""
+
+    def test_trigrams(self):
+        """测试三字符片段。"""
+        assert trigrams("AbCd") == {"abc", "bcd"}
+        assert trigrams("ab") == set()
+
+    def test_glob(self):
+        """测试通配符字面量。"""
+        assert glob_literals("*holi?ay[0-9].mp4") == ["holi", "ay", ".mp4"]
+
+    def test_regex(self):
+        """测试正则字面量。"""
+        assert regex_literals(r"^report_\d{4}\.pdf$") == ["report_", ".pdf"]
+        assert regex_literals(r"abcd?e(xyz)?") == ["abc", "e"]
+        assert regex_literals("a|b") == []
+
+
+class TestSearchIndex:
+    """测试SearchIndex的查询与更新。"""
+
+    def test_substring(self, index):
+        """测试不区分大小写的子串查询。"""
+        assert ids(index.search("holiday")) == [2, 3]
+        assert ids(index.search("HOL")) == [2, 3]
+        assert ids(index.search("ep")) == [4, 6]
+        assert index.search("nothing") == []
+
+    def test_glob_regex(self, index):
+        """测试通配符与正则查询。"""
+        assert ids(index.search(glob="*.mp4")) == [2]
+        assert ids(index.search(regex=r"_\d{4}\.pdf$")) == [4]
+        assert ids(index.search(regex=r"(holiday|episode)")) == [2, 3, 6]
+
+    def test_facets(self, index):
+        """测试扩展名、大小、类型、目录范围过滤与分面统计。"""
+        assert ids(index.search(ext=["MP4", "mkv"])) == [2, 6]
+        assert ids(index.search(min_size=1 << 20, max_size=10 << 20)) == [2, 4]
+        assert ids(index.search(type=1)) == [1, 5]
+        assert ids(index.search(under=1)) == [2, 3, 5, 6]
+        assert ids(index.search("o", under=5)) == [6]
+        assert index.facets(index.search(under=1, type=0))["ext"] == {"mp4": 1, "txt": 1, "mkv": 1}
+
+    def test_match_path(self, index):
+        """测试按完整路径匹配。"""
+        assert ids(index.search("movies/season", match_path=True)) == [5, 6]
+        assert index.path(6) == "/Movies/Season1/episode01.mkv"
+
+    def test_mutations(self, index):
+        """测试变更事件直接更新索引。"""
+        index.on_mutation(Mutation("rename", [2], None, ["Trip.mp4"]))
+        assert ids(index.search("holiday")) == [3]
+        assert ids(index.search("trip")) == [2]
+        index.on_mutation(Mutation("trash", [3]))
+        assert index.search("holiday") == []
+        assert ids(index.search("holiday", trashed=True)) == [3]
+        index.on_mutation(Mutation("move", [6], [1]))
+        assert index.path(6) == "/Movies/episode01.mkv"
+        index.on_mutation(Mutation("mkdir", [9], [0], ["Archive"]))
+        assert ids(index.search("archive", type=1)) == [9]
+        index.on_mutation(Mutation("delete", [9]))
+        assert index.get(9) is None
+        assert "arc" not in index._grams
+
+    def test_limit(self, index):
+        """测试数量限制。"""
+        assert len(index.search(limit=2)) == 2
+        assert len(index.search(limit=0)) == 6
+
+
+class TestAccessSearch:
+    """测试Access.set_search自动写入索引。"""
+
+    def test_listing_and_mutation(self):
+        """测试列表结果写入索引、修改后索引更新。"""
+        access = Access("id", "secret", "token")
+        access.session.request = FakeDrive.flat()
+        index = SearchIndex()
+        access.set_search(index)
+        list(access.file.list_v2(0))
+        assert len(index) == 150
+        assert ids(index.search("f14")) == [14] + list(range(140, 150))
+        access.file.name(14, "renamed.txt")
+        assert ids(index.search("renamed")) == [14]
+        access.set_search(None)
+        assert access._listeners == []
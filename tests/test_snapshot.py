@@ -0,0 +1,116 @@
+"""
+x123pan快照模块的单元测试。
+"""
+
+import random
+
+import pytest
+
+from tests.conftest import FakeDrive, FakeTree
+from x123pan.src.api import Access
+from x123pan.src.record import FileRecord
+from x123pan.util.snapshot import (
+    Snapshot,
+    SnapshotWriter,
+    crawl,
+    dump,
+    dump_ids,
+    read_ndjson,
+    write_ndjson,
+)
+
+
+def records(n):
+    items = [
+        FileRecord(i, i // 10, f"名称{i % 7}.bin", i % 2, i * 3, f"{i:032x}", trashed=i % 5 == 0)
+        for i in range(1, n + 1)
+    ]
+    items[3].etag = "NOT-HEX"
+    random.Random(1).shuffle(items)
+    return items
+
+
+class TestSnapshot:
+    """测试二进制快照的写入与读取。"""
+
+    @pytest.mark.parametrize("run_size", [7, 1000])
+    def test_sorted_roundtrip(self, tmp_path, run_size):
+        """测试分段排序归并后按 fileId 有序并能完整还原。"""
+        path = str(tmp_path / "snap.bin")
+        items = records(100)
+        with SnapshotWriter(path, run_size=run_size) as writer:
+            assert writer.write_many(items) == 100
+        with Snapshot(path) as snap:
+            assert len(snap) == 100
+            assert [r.fileId for r in snap] == list(range(1, 101))
+            assert list(snap) == sorted(items, key=lambda r: r.fileId)
+            assert snap[-1].fileId == 100
+            assert snap.find(4).etag == "NOT-HEX"
+            assert snap.find(5).trashed == 1
+            assert snap.find(0) is None and snap.find(101) is None
+            assert sum(row[2] for row in snap.scan()) == sum(i * 3 for i in range(1, 101))
+
+    def test_empty_and_invalid(self, tmp_path):
+        """测试空快照与无效文件。"""
+        path = str(tmp_path / "empty.bin")
+        SnapshotWriter(path).close()
+        with Snapshot(path) as snap:
+            assert len(snap) == 0 and list(snap) == [] and snap.find(1) is None
+        bad = tmp_path / "bad.bin"
+        bad.write_bytes(b"x" * 64)
+        with pytest.raises(ValueError):
+            Snapshot(str(bad))
+
+    def test_ndjson(self, tmp_path):
+        """测试 NDJSON 导出与读取。"""
+        path, out = str(tmp_path / "snap.bin"), str(tmp_path / "snap.ndjson")
+        with SnapshotWriter(path) as writer:
+            writer.write_many(records(10))
+        with Snapshot(path) as snap:
+            assert snap.to_ndjson(out) == 10
+            assert list(read_ndjson(out)) == list(snap)
+
+
+class TestDump:
+    """测试从账号导出快照。"""
+
+    def test_dump_tree(self, tmp_path):
+        """测试基于 list_v2 递归导出。"""
+        tree = FakeTree()
+        a = tree.add(0, "a", True)
+        tree.add(a, "x.txt")
+        tree.add(0, "gone", trashed=1)
+        access = Access("id", "secret", "token")
+        access.session.request = tree
+        assert sorted(i["filename"] for i in crawl(access)) == ["a", "x.txt"]
+        path = str(tmp_path / "tree.bin")
+        assert dump(access, path, trashed=True) == 3
+        with Snapshot(path) as snap:
+            assert [r.filename for r in snap] == ["a", "x.txt", "gone"]
+        assert dump(access, str(tmp_path / "tree.ndjson"), ndjson=True) == 2
+
+    def test_dump_concurrent(self, tmp_path):
+        """测试经 walk 并发列出目录，结果仍按 fileId 排序。"""
+        tree = FakeTree()
+        for i in range(6):
+            folder = tree.add(0, f"d{i}", True)
+            tree.add(folder, f"{i}.txt")
+        access = Access("id", "secret", "token")
+        access.session.request = tree
+        path = str(tmp_path / "tree.bin")
+        assert dump(access, path, workers=4) == 12
+        assert tree.peak > 1
+        with Snapshot(path) as snap:
+            assert [r.fileId for r in snap] == list(range(1, 13))
+
+    def test_dump_ids(self, tmp_path):
+        """测试基于 infos 导出指定文件。"""
+        access = Access("id", "secret", "token")
+        access.session.request = FakeDrive.flat()
+        path = str(tmp_path / "ids.bin")
+        assert dump_ids(access, path, [3, 1, 2]) == 3
+        with Snapshot(path) as snap:
+            assert [r.filename for r in snap] == ["f1", "f2", "f3"]
+        out = str(tmp_path / "ids.ndjson")
+        assert dump_ids(access, out, [5], ndjson=True) == 1
+        assert write_ndjson(str(tmp_path / "copy.ndjson"), read_ndjson(out)) == 1
@@ -1,10 +1,23 @@
 """
 x123pan工具模块的单元测试。
 """
+import array
+import hashlib
+import mmap
 import pytest
 import io
-from x123pan.src.tool import size_md5, read
-from x123pan.src.type import Ctx
+from x123pan.src.tool import (
+    body,
+    digest,
+    loads,
+    read,
+    read_token,
+    shared,
+    size_md5,
+    unpack,
+    write_token,
+)
+from x123pan.src.type import Ctx, SharedFile
 
 
 class TestSizeMd5:
@@ -41,6 +54,43 @@ class TestSizeMd5:
             size_md5(123)
 
 
+class TestDigest:
+    """测试digest函数。"""
+
+    data = bytes(range(256)) * 40 + b"tail"
+
+    def expected(self, sliceSize):
+        return [
+            hashlib.md5(self.data[i : i + sliceSize]).hexdigest()
+            for i in range(0, len(self.data), sliceSize)
+        ]
+
+    def test_bytes(self):
+        """测试字节数据的整体与分片MD5。"""
+        result = digest(self.data, 1000)
+        assert result.size == len(self.data)
+        assert result.md5 == hashlib.md5(self.data).hexdigest()
+        assert result.sliceMD5s == self.expected(1000)
+        assert result.slices(1000) == result.sliceMD5s
+        assert result.slices(999) is None
+
+    @pytest.mark.parametrize("bufferSize", [1, 333, 1000, 1 << 20])
+    def test_file(self, tmp_path, bufferSize):
+        """测试缓冲区与分片边界不对齐时文件的分片MD5。"""
+        path = tmp_path / "data.bin"
+        path.write_bytes(self.data)
+        result = digest(str(path), 1000, bufferSize)
+        assert (result.size, result.md5) == size_md5(self.data)
+        assert result.sliceMD5s == self.expected(1000)
+
+    def test_without_slices(self, tmp_path):
+        """测试不计算分片MD5与空文件。"""
+        assert digest(self.data).sliceMD5s == []
+        path = tmp_path / "empty.bin"
+        path.write_bytes(b"")
+        assert digest(str(path), 4).sliceMD5s == []
+
+
 class TestRead:
     """测试read函数。"""
     
@@ -78,5 +128,198 @@ class TestRead:
         assert reader is not None
 
 
+
+class TestSharedFile:
+    """测试共享文件描述符的分段读取。"""
+
+    data = bytes(range(256)) * 4
+
+    def test_views(self, tmp_path):
+        """测试多个读取器共享描述符并返回不复制数据的 memoryview。"""
+        path = tmp_path / "data.bin"
+        path.write_bytes(self.data)
+        with shared(str(path)) as source:
+            assert isinstance(source, SharedFile)
+            readers = [read(source, (i, i + 256)) for i in range(0, 1024, 256)]
+            for i, reader in enumerate(readers):
+                chunk = reader.read(100)
+                assert isinstance(chunk, memoryview)
+                assert chunk == self.data[i * 256 : i * 256 + 100]
+                assert reader.read() == self.data[i * 256 + 100 : (i + 1) * 256]
+                assert (
+                    reader.getMD5() == hashlib.md5(self.data[i * 256 : (i + 1) * 256]).hexdigest()
+                )
+                reader.close()
+            assert readers[0].seek(10) == 10 and readers[0].read(2) == self.data[10:12]
+            # 读取结果仍被引用时也能关闭
+            held = readers[1].read()
+        assert source.fd == -1
+        assert held == self.data[256:512]
+
+    def test_close(self, tmp_path):
+        """测试关闭读取器后标记为已关闭，再次关闭无副作用。"""
+        path = tmp_path / "data.bin"
+        path.write_bytes(self.data)
+        reader = read(str(path), (0, 10))
+        reader.close()
+        reader.close()
+        assert reader.closed and reader.f is None
+        with pytest.raises(ValueError):
+            reader.read()
+        stream = io.BufferedReader(io.BytesIO(self.data))
+        with read(stream, (0, 10)) as reader:
+            assert reader.read(4) == self.data[:4]
+        assert reader.closed and reader.shared.fd == -1 and stream.tell() == 0
+
+    def test_pread_fallback(self, tmp_path):
+        """测试空文件无法映射时按偏移读取。"""
+        path = tmp_path / "empty.bin"
+        path.write_bytes(b"")
+        with SharedFile(str(path)) as source:
+            assert source.view(0, 10) == b""
+
+    def test_bytes_passthrough(self):
+        """测试字节数据原样返回。"""
+        with shared(b"abc") as source:
+            assert source == b"abc"
+
+
+class TestSources:
+    """测试 bytearray、memoryview、mmap 与文件对象数据源。"""
+
+    data = bytes(range(256)) * 4
+
+    @pytest.fixture(params=["bytearray", "memoryview", "mmap", "array"])
+    def buffer(self, request, tmp_path):
+        if request.param == "mmap":
+            path = tmp_path / "data.bin"
+            path.write_bytes(self.data)
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                mm.seek(100)
+                yield mm
+        elif request.param == "array":
+            ints = array.array("i")
+            ints.frombytes(self.data)
+            # 非字节格式的 memoryview 按字节展开
+            yield memoryview(ints)
+        else:
+            yield {"bytearray": bytearray, "memoryview": memoryview}[request.param](self.data)
+
+    def test_buffers(self, buffer):
+        """测试缓冲区整体参与计算，读取器返回不复制数据的 memoryview。"""
+        assert size_md5(buffer) == size_md5(self.data)
+        assert digest(buffer, 300).sliceMD5s == digest(self.data, 300).sliceMD5s
+        with read(buffer, (10, 600)) as reader:
+            chunk = reader.read(100)
+            assert isinstance(chunk, memoryview) and chunk == self.data[10:110]
+            assert reader.getMD5() == hashlib.md5(self.data[10:600]).hexdigest()
+        with shared(buffer) as source:
+            assert source is buffer
+
+    def test_zero_copy(self):
+        """测试读取结果与 bytearray 共享内存，关闭读取器后可以改变大小。"""
+        data = bytearray(self.data)
+        reader = read(data, (0, 4))
+        chunk = reader.read()
+        data[0] = 99
+        assert chunk[0] == 99
+        with pytest.raises(BufferError):
+            data.extend(b"x")
+        reader.close()
+        chunk.release()
+        data.extend(b"x")
+        assert reader.closed
+
+    def test_invalid_limit(self):
+        """测试无效区间在引用数据前抛出。"""
+        data = bytearray(self.data)
+        with pytest.raises(ValueError):
+            read(data, [0, 4])
+        with pytest.raises(ValueError):
+            read(data, (0, len(data) + 1))
+        data.extend(b"x")
+
+    def test_streams(self, tmp_path):
+        """测试文件对象从当前位置读取，计算与读取后恢复位置。"""
+        path = tmp_path / "data.bin"
+        path.write_bytes(b"head" + self.data)
+        with open(path, "rb") as f:
+            # BytesIO 使用内部缓冲区，文件映射，BufferedReader 在锁内 seek 后读取
+            streams = [io.BytesIO(b"head" + self.data), f]
+            streams.append(io.BufferedReader(io.BytesIO(b"head" + self.data)))
+            for stream in streams:
+                stream.seek(4)
+                assert size_md5(stream) == size_md5(self.data)
+                assert digest(stream, 300).sliceMD5s == digest(self.data, 300).sliceMD5s
+                assert stream.tell() == 4
+                with read(stream, (10, 20)) as reader:
+                    assert reader.read() == self.data[10:20]
+                with shared(stream) as source:
+                    assert isinstance(source, SharedFile) and source.size == len(self.data)
+                    with read(source, (256, 512)) as reader:
+                        assert reader.read() == self.data[256:512]
+                assert stream.tell() == 4
+
+    def test_body(self):
+        """测试单文件上传的请求体。"""
+        with body(b"abc", 3) as file:
+            assert file == b"abc"
+        with body(bytearray(), 0) as file:
+            assert file == b""
+        with body(bytearray(b"abc"), 3) as file:
+            assert file.read() == b"abc"
+        stream = io.BytesIO(b"xabc")
+        stream.seek(1)
+        with body(stream, 3) as file:
+            assert file.read() == b"abc"
+        assert stream.tell() == 1
+
+
+class TestDecode:
+
+    """测试响应解码函数。"""
+
+    def test_loads(self):
+        """测试JSON解析。"""
+        assert loads(b'{"code": 0}') == {"code": 0}
+
+    def test_loads_fast(self):
+        """测试orjson解析。"""
+        pytest.importorskip("orjson")
+        assert loads(b'{"code": 0}', fast=True) == {"code": 0}
+
+    def test_loads_invalid(self):
+        """测试非法JSON。"""
+        with pytest.raises(ValueError):
+            loads(b"<html>")
+
+    def test_unpack(self):
+        """测试拆解响应外层结构。"""
+        payload = {"code": 1, "message": "err", "data": {"a": 1}, "x-traceID": "t"}
+        assert unpack(payload) == (1, "err", {"a": 1})
+        assert unpack(payload, validate=False) == (1, "err", {"a": 1})
+
+
+
+class TestTokenFile:
+    """测试令牌文件读写。"""
+
+    def test_roundtrip(self, tmp_path):
+        """测试带过期时间的令牌读写。"""
+        path = str(tmp_path / "token")
+        write_token(path, "abc", 1700000000)
+        assert read_token(path) == ("abc", 1700000000)
+
+    def test_legacy_format(self, tmp_path):
+        """测试只包含令牌的旧格式文件。"""
+        path = tmp_path / "token"
+        path.write_text("abc")
+        assert read_token(str(path)) == ("abc", 0)
+
+    def test_missing(self, tmp_path):
+        """测试文件不存在。"""
+        assert read_token(str(tmp_path / "none")) == ("", 0)
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
\ No newline at end of file
@@ -1 +1,2 @@
+from .src.aio import AsyncAccess as AsyncAccess
 from .src.api import Access as Access
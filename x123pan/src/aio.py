@@ -0,0 +1,987 @@
+import asyncio
+import functools
+import hashlib
+import logging
+import random
+import time
+import urllib.parse
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    import httpx
+else:
+    try:
+        import httpx
+    except ImportError:  # pragma: no cover
+        httpx = None
+
+from . import tool
+from .api import _PRESIGNED_SLICE, _Observable
+from .const import ConstAPI
+from .hashcache import HashCache
+from .limiter import AIMDController
+from .metrics import Metrics
+from .record import FileRecord
+from .retry import Deadline, RetryPolicy, files_size
+from .type import API_INFO, ApiResponseFailed, Ctx, DeadlineExceeded, FileSource, SharedFile
+
+
+def _readSlice(file_info: Union[FileSource, SharedFile], limit: Tuple[int, int], ctx: Ctx) -> bytes:
+    """读取分片数据（在线程池中执行，避免阻塞事件循环）。"""
+    with tool.read(file_info, limit, ctx) as reader:
+        return bytes(reader.read())
+
+
+def _splitFiles(
+    files: Dict[str, Any],
+) -> Tuple[Dict[str, str], Dict[str, Any]]:
+    """将 requests 风格的 multipart 参数拆分为表单字段和文件字段。
+
+    ``(None, value)`` 形式的条目作为普通表单字段，值为 None 的字段会被忽略。
+    """
+    fields, uploads = {}, {}
+    for key, value in files.items():
+        if isinstance(value, tuple) and value[0] is None:
+            if value[1] is not None:
+                fields[key] = str(value[1])
+        else:
+            uploads[key] = value
+    return fields, uploads
+
+
+class AsyncAccess(_Observable):
+    """123云盘API异步访问类。
+
+    与 Access 提供相同的 user/file/link/upload/uploadV2 接口，所有方法均为协程，
+    内部共享一个带连接池的 httpx.AsyncClient，并通过 ConstAPI 中各端点的令牌桶异步限流。
+
+    Attributes:
+        _log: 日志记录器
+        client: 异步HTTP客户端
+        token_margin: 令牌过期前多少秒开始主动刷新，默认为300
+    """
+
+    _log: logging.Logger
+    client: "httpx.AsyncClient"
+    token_margin: float = 300
+
+    def __init__(
+        self,
+        clientID: str,
+        clientSecret: str,
+        accessToken: str = "",
+        path_access: str = "",
+        path_log: str = "",
+        logLevel: str = "INFO",
+        max_connections: int = 100,
+        proxy: Optional[str] = None,
+        verify: bool = True,
+        transport: Optional["httpx.AsyncBaseTransport"] = None,
+    ):
+        """初始化AsyncAccess对象。
+
+        Args:
+            clientID: 客户端ID
+            clientSecret: 客户端密钥
+            accessToken: 访问令牌，默认为空字符串
+            path_access: 访问令牌保存路径，默认为空字符串
+            path_log: 日志保存路径，默认为空字符串
+            logLevel: 日志级别，默认为"INFO"
+            max_connections: 连接池最大连接数，默认为100
+            proxy: 代理地址，格式为"http://host:port"
+            verify: 是否验证SSL证书，默认为True
+            transport: 自定义传输层，用于测试时替换为本地模拟服务
+
+        Raises:
+            ImportError: 未安装 httpx 时抛出
+        """
+        if httpx is None:
+            raise ImportError("AsyncAccess 依赖 httpx，请执行 pip install x123pan[async]")
+        (
+            self._clientID,
+            self._clientSecret,
+            self._access_token,
+            self._path_access,
+            self._path_log,
+            self._logLevel,
+        ) = (clientID, clientSecret, accessToken, path_access, path_log, logLevel)
+        self._rate_control: Optional[AIMDController] = None
+        self._fast_json, self._validate = False, True
+        self._metrics: Optional[Metrics] = None
+        self._retry = RetryPolicy()
+        self._slice_size = tool.SLICE_SIZE
+        self._hash_cache: Optional[HashCache] = None
+
+        self._initListeners()
+        self._initBind()
+        self._initClient(max_connections, proxy, verify, transport)
+        self._initToken()
+        self._initLog()
+
+    def _initBind(self) -> None:
+        """初始化绑定对象。"""
+        self.user = _AsyncUser(self)
+        self.file = _AsyncFile(self)
+        self.link = _AsyncLink(self)
+        self.upload = _AsyncUpload(self)
+        self.uploadV2 = _AsyncUploadV2(self)
+
+    def _initClient(
+        self,
+        max_connections: int,
+        proxy: Optional[str],
+        verify: bool,
+        transport: Optional["httpx.AsyncBaseTransport"],
+    ) -> None:
+        """初始化异步HTTP客户端。"""
+        limits = httpx.Limits(
+            max_connections=max_connections, max_keepalive_connections=max_connections
+        )
+        if transport is None:
+            # 不使用传输层的连接重试：网络异常统一由 request 按 RetryPolicy 重试，
+            # 两层同时重试会使实际尝试次数相乘并越过截止时间
+            options: Dict[str, Any] = {"limits": limits, "verify": verify}
+            if proxy:
+                options["proxy"] = proxy
+            transport = httpx.AsyncHTTPTransport(**options)
+        self.client = httpx.AsyncClient(
+            transport=transport, trust_env=False, timeout=httpx.Timeout(60, connect=4)
+        )
+
+    def _initToken(self) -> None:
+        """初始化访问令牌。"""
+        self._token_lock: Optional[asyncio.Lock] = None
+        self._token_expire = 0.0
+        if self._path_access:
+            with tool.file_lock(self._path_access):
+                if self._access_token:
+                    tool.write_token(self._path_access, self._access_token)
+                else:
+                    self._access_token, self._token_expire = tool.read_token(self._path_access)
+
+    def _initLog(self) -> None:
+        """初始化日志记录器。"""
+        self._log = logging.getLogger("123云盘API")
+        self._log.setLevel(self._logLevel)
+
+        formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+
+        if self._path_log:
+            f_handler = logging.FileHandler(self._path_log, encoding="utf-8")
+            f_handler.setFormatter(formatter)
+            self._log.addHandler(f_handler)
+
+        s_handler = logging.StreamHandler()
+        s_handler.setFormatter(formatter)
+        self._log.addHandler(s_handler)
+        self._log.debug("123云盘异步API启动")
+
+    async def __aenter__(self) -> "AsyncAccess":
+        """进入异步上下文管理器。"""
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        """退出异步上下文管理器并关闭连接池。"""
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """关闭连接池。"""
+        await self.client.aclose()
+
+    async def refresh_access_token(
+        self, stale: Optional[str] = None, proactive: bool = False
+    ) -> None:
+        """刷新访问令牌，单飞与跨进程协调的行为同 Access.refresh_access_token。"""
+        if stale is None:
+            stale = self._access_token
+        if self._token_lock is None:
+            self._token_lock = asyncio.Lock()
+        async with self._token_lock:
+            if self._access_token != stale:
+                return
+            if proactive and not self._tokenExpiring(self._token_expire):
+                return
+            lock = tool.file_lock(self._path_access)
+            await asyncio.get_running_loop().run_in_executor(None, lock.__enter__)
+            try:
+                if self._path_access:
+                    token, expire = tool.read_token(self._path_access)
+                    if token and token != stale and not self._tokenExpiring(expire):
+                        self._access_token, self._token_expire = token, expire
+                        return
+                if self._metrics:
+                    api = ConstAPI.GET_ACCESS_TOKEN
+                    self._metrics.inc(api.method, api.url, "token_refreshes")
+                response = await self.request(
+                    ConstAPI.GET_ACCESS_TOKEN,
+                    data={"clientID": self._clientID, "clientSecret": self._clientSecret},
+                )
+                self._token_expire = tool.parse_expire(response.get("expiredAt"))
+                self._access_token = response["accessToken"]
+                if self._path_access:
+                    tool.write_token(self._path_access, self._access_token, self._token_expire)
+            finally:
+                lock.__exit__(None, None, None)
+
+    def _tokenExpiring(self, expire: float) -> bool:
+        """判断令牌是否已进入主动刷新窗口（过期时间未知时视为未过期）。"""
+        return bool(expire) and time.time() >= expire - self.token_margin
+
+    async def request(
+        self,
+        api: API_INFO,
+        data: Optional[Dict[str, Any]] = None,
+        files: Optional[Dict[str, Any]] = None,
+        headersCtl: Optional[Dict[str, Optional[str]]] = None,
+        deadline: Union[Deadline, float, None] = None,
+    ) -> Any:
+        """发送API请求，重试与超时行为同 Access.request。
+
+        Args:
+            api: API信息对象
+            data: 请求数据
+            files: 上传的文件，格式与 Access.request 相同
+            headersCtl: 额外的请求头，值为None表示删除该请求头
+            deadline: Deadline对象或总时长秒数，默认使用 RetryPolicy.deadline
+
+        Returns:
+            API响应数据
+
+        Raises:
+            ApiResponseFailed: 当API响应失败时抛出
+            DeadlineExceeded: 超过截止时间仍未成功时抛出
+            httpx.HTTPError: 网络异常超过重试次数时抛出
+        """
+        is_token_api = api is ConstAPI.GET_ACCESS_TOKEN
+        allow_refresh = not is_token_api
+        policy = self._retry
+        deadline = policy.start(deadline)
+        size = files_size(files)
+        attempt = failures = 0
+        while True:
+            if not is_token_api and self._tokenExpiring(self._token_expire):
+                await self.refresh_access_token(proactive=True)
+            token = self._access_token
+            headers: Dict[str, Optional[str]] = {
+                "Authorization": "Bearer " + token if token else "",
+                "Content-Type": "application/json",
+                "Platform": ConstAPI.PLATFORM,
+            }
+            if headersCtl:
+                headers.update(headersCtl)
+            headers = {k: v for k, v in headers.items() if v is not None}
+            if files:
+                fields, uploads = _splitFiles(files)
+                dataReqs: Dict[str, Any] = {"data": fields, "files": uploads}
+            elif api.method in ("POST", "PUT"):
+                dataReqs = {"json": data}
+            elif api.method == "GET":
+                dataReqs = {"params": {k: v for k, v in (data or {}).items() if v is not None}}
+            else:
+                raise NotImplementedError(f"不支持的请求方法:{api.method}")
+
+            if self._rate_control:
+                self._rate_control.attach(api)
+            waited = await api.require_async()
+            connect, read = policy.timeout(api, size, deadline)
+            metrics = self._metrics
+            if metrics:
+                if attempt:
+                    metrics.inc(api.method, api.url, "retries")
+                metrics.begin(api.method, api.url)
+            attempt += 1
+            begin, response, failed, error = time.monotonic(), None, True, None
+            try:
+                if self._log.isEnabledFor(logging.DEBUG):
+                    self._log.debug("[REQUEST] URL: %s | Method: %s", api.url, api.method)
+                response = await self.client.request(
+                    api.method,
+                    api.url,
+                    headers=headers,
+                    timeout=httpx.Timeout(read, connect=connect),
+                    **dataReqs,
+                )
+                payload = tool.loads(response.content, self._fast_json)
+                if self._log.isEnabledFor(logging.DEBUG):
+                    self._log.debug(
+                        "[RESPONSE] URL: %s | Status: %s | Response: %s",
+                        api.url,
+                        response.status_code,
+                        payload,
+                    )
+                code, message, result = tool.unpack(payload, self._validate)
+                failed = code != 0
+            except (httpx.HTTPError, *tool.DECODE_ERRORS) as e:
+                error = e
+            except Exception as e:
+                self._log.error(f"{api.url} {api.method} {e}")
+                raise
+            finally:
+                if metrics:
+                    metrics.end(
+                        api.method,
+                        api.url,
+                        time.monotonic() - begin,
+                        waited,
+                        (
+                            int(response.request.headers.get("Content-Length", 0))
+                            if response is not None
+                            else 0
+                        ),
+                        len(response.content) if response is not None else 0,
+                        failed,
+                    )
+
+            if error is not None:
+                failures += 1
+                if failures > policy.retries:
+                    self._log.error(
+                        f"{api.url} {api.method} 重试{policy.retries}次后仍失败:{error}"
+                    )
+                    raise error
+                try:
+                    delay = deadline.sleep_time(policy.delay(failures), api.url)
+                except DeadlineExceeded as e:
+                    raise e from error
+                reason = "JSON解码失败" if isinstance(error, tool.DECODE_ERRORS) else "请求失败"
+                self._log.warning(f"{api.url} {reason}:{error}，{delay:.1f}秒后第{failures}次重试")
+                await asyncio.sleep(delay)
+            elif code in (0,):
+                if self._rate_control:
+                    self._rate_control.on_success(api, waited)
+                return result
+            elif code in (401, 400) and allow_refresh:
+                await self.refresh_access_token(stale=token)
+                allow_refresh = False
+            elif code in (429,):
+                if metrics:
+                    metrics.inc(api.method, api.url, "throttled")
+                delay = self._rate_control.on_throttle(api) if self._rate_control else 0.5
+                await asyncio.sleep(deadline.sleep_time(delay, api.url))
+                self._log.warning(f"{api.url}请求频繁，请稍后再试")
+            else:
+                raise ApiResponseFailed(code, message)
+
+    def get_access_token(self) -> str:
+        """获取访问令牌。
+
+        Returns:
+            访问令牌字符串
+        """
+        return self._access_token
+
+    def set_decoder(self, fast_json: bool = False, validate: bool = True) -> None:
+        """设置响应解码方式，参数同 Access.set_decoder。"""
+        if fast_json and tool.orjson is None:
+            raise ImportError("fast_json 依赖 orjson，请执行 pip install x123pan[orjson]")
+        self._fast_json, self._validate = fast_json, validate
+
+    def set_metrics(self, metrics: Optional[Metrics]) -> None:
+        """设置请求指标统计，参数同 Access.set_metrics。"""
+        self._metrics = metrics
+
+    def set_rate_control(self, controller: Optional[AIMDController]) -> None:
+        """设置自适应限流控制器。
+
+        Args:
+            controller: AIMD控制器，为None时关闭自适应限流并恢复原始QPS配置
+        """
+        if self._rate_control and controller is not self._rate_control:
+            self._rate_control.reset()
+        self._rate_control = controller
+
+    def set_retry(self, policy: Optional[RetryPolicy] = None) -> None:
+        """设置重试与超时策略，参数同 Access.set_retry。"""
+        self._retry = policy if policy is not None else RetryPolicy()
+
+    def set_hash_cache(self, cache: Optional[HashCache]) -> None:
+        """设置文件摘要缓存，参数同 Access.set_hash_cache。"""
+        self._hash_cache = cache
+
+    def set_log_level(self, level: Union[int, str]) -> None:
+        """设置日志级别。
+
+        Args:
+            level: 日志级别，可以是整数或字符串
+        """
+        self._log.setLevel(level)
+        self._logLevel = level
+
+
+class _AsyncBind:
+    """异步绑定基类。
+
+    所有异步API功能类的基类，提供对AsyncAccess对象的访问。
+
+    Attributes:
+        super: AsyncAccess对象
+        request: 请求协程方法
+    """
+
+    def __init__(self, super_pan123: AsyncAccess) -> None:
+        """初始化绑定对象。
+
+        Args:
+            super_pan123: AsyncAccess对象
+        """
+        self.super = super_pan123
+        self.request = super_pan123.request
+
+
+class _AsyncLink(_AsyncBind):
+    """链接相关操作类（异步）。"""
+
+    async def offline_download(
+        self,
+        url: str,
+        fileName: Optional[str] = None,
+        dirID: Optional[int] = None,
+        callBackUrl: Optional[str] = None,
+    ) -> int:
+        """创建离线下载任务，参数同 _Link.offline_download。"""
+        response = await self.request(
+            ConstAPI.LINK_OFFLINE_DOWNLOAD,
+            data={"url": url, "fileName": fileName, "dirID": dirID, "callBackUrl": callBackUrl},
+        )
+        return response["taskID"]
+
+    async def offline_download_process(self, taskID: int) -> int:
+        """查询离线下载任务状态，参数同 _Link.offline_download_process。"""
+        response = await self.request(
+            ConstAPI.LINK_OFFLINE_DOWNLOAD_PROCESS, data={"taskID": taskID}
+        )
+        return response["status"]
+
+
+class _AsyncUser(_AsyncBind):
+    """用户相关操作类（异步）。"""
+
+    async def info(self) -> Dict[str, Any]:
+        """获取用户信息。"""
+        return await self.request(ConstAPI.USER_INFO)
+
+
+class _AsyncFile(_AsyncBind):
+    """文件相关操作类（异步）。
+
+    各方法的参数和返回值与 _File 相同。
+    """
+
+    async def detail(self, fileID: int) -> Dict[str, Any]:
+        """获取文件详细信息。"""
+        return await self.request(ConstAPI.FILE_DETAIL, data={"fileID": fileID})
+
+    async def infos(
+        self, fileIds: Union[int, List[int]], compact: bool = False
+    ) -> List[Union[Dict[str, Any], FileRecord]]:
+        """批量获取文件信息，每100个ID并发请求一次。"""
+        if isinstance(fileIds, int):
+            fileIds = [fileIds]
+        resps = await asyncio.gather(
+            *(
+                self.request(ConstAPI.FILE_INFOS, data={"fileIds": fileIds[i : i + 100]})
+                for i in range(0, len(fileIds), 100)
+            )
+        )
+        if compact:
+            return [FileRecord.from_dict(info) for resp in resps for info in resp["fileList"]]
+        return [info for resp in resps for info in resp["fileList"]]
+
+    async def list_v2(
+        self,
+        parentFileId: int = 0,
+        limit: int = 0,
+        searchData: Optional[str] = None,
+        searchMode: Optional[str] = None,
+        lastFileId: int = 0,
+        trashed: bool = False,
+        pageSize: int = 100,
+        prefetch: bool = False,
+        compact: bool = False,
+    ) -> AsyncIterator[Union[Dict[str, Any], FileRecord]]:
+        """获取文件列表（V2版本），以异步生成器逐条返回，参数同 _File.list_v2。"""
+
+        async def fetch(cursor: int) -> Dict[str, Any]:
+            return await self.request(
+                ConstAPI.FILE_LIST_V2,
+                data={
+                    "parentFileId": parentFileId,
+                    "limit": pageSize,
+                    "searchData": searchData,
+                    "searchMode": searchMode,
+                    "lastFileId": cursor,
+                },
+            )
+
+        current = 0
+        task: Optional[asyncio.Future] = None
+        try:
+            if prefetch and lastFileId != -1:
+                task = asyncio.ensure_future(fetch(lastFileId))
+            while lastFileId != -1 and not (0 < limit <= current):
+                if task is not None:
+                    response = await task
+                    task = None
+                else:
+                    response = await fetch(lastFileId)
+                lastFileId = response["lastFileId"]
+                if prefetch and lastFileId != -1:
+                    task = asyncio.ensure_future(fetch(lastFileId))
+                for i in response["fileList"]:
+                    if i["trashed"] == 0 or trashed:
+                        if 0 < limit <= current:
+                            break
+                        yield FileRecord.from_dict(i) if compact else i
+                        current += 1
+        finally:
+            if task is not None:
+                task.cancel()
+
+    async def list(
+        self,
+        parentFileId: int = 0,
+        page: int = 1,
+        limit: int = 100,
+        orderBy: str = "file_name",
+        orderDirection: str = "asc",
+        trashed: bool = False,
+        searchData: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """获取文件列表。"""
+        return await self.request(
+            ConstAPI.FILE_LIST,
+            data={
+                "parentFileId": parentFileId,
+                "page": page,
+                "limit": limit,
+                "orderBy": orderBy,
+                "orderDirection": orderDirection,
+                "trashed": trashed,
+                "searchData": searchData,
+            },
+        )
+
+    async def _batch(
+        self,
+        api: API_INFO,
+        kind: str,
+        fileIDs: Union[int, List[int]],
+        parentIDs: Optional[List[int]] = None,
+        **extra: Any,
+    ) -> None:
+        """按每100个ID一组依次提交批量操作，每组成功后发送变更事件。"""
+        if isinstance(fileIDs, int):
+            fileIDs = [fileIDs]
+        for i in range(0, len(fileIDs), 100):
+            await self.request(api, {"fileIDs": fileIDs[i : i + 100], **extra})
+            self.super._notify(kind, fileIDs[i : i + 100], parentIDs)
+
+    async def trash(self, fileIDs: Union[int, List[int]]) -> None:
+        """将文件移至回收站。"""
+        await self._batch(ConstAPI.FILE_TRASH, "trash", fileIDs)
+
+    async def delete(self, fileIDs: Union[int, List[int]]) -> None:
+        """永久删除文件。"""
+        await self._batch(ConstAPI.FILE_DELETE, "delete", fileIDs)
+
+    async def recover(self, fileIDs: Union[int, List[int]]) -> None:
+        """从回收站恢复文件。"""
+        await self._batch(ConstAPI.FILE_RECOVER, "recover", fileIDs)
+
+    async def move(self, fileIDs: Union[int, List[int]], toParentFileID: int) -> None:
+        """移动文件到指定目录。"""
+        await self._batch(
+            ConstAPI.FILE_MOVE, "move", fileIDs, [toParentFileID], toParentFileID=toParentFileID
+        )
+
+    async def mkdir(self, parentID: int, name: str) -> int:
+        """创建目录，返回目录ID。"""
+        response = await self.request(
+            ConstAPI.FILE_UPLOAD_MKDIR, {"name": name, "parentID": parentID}
+        )
+        self.super._notify("mkdir", [response["dirID"]], [parentID], [name])
+        return response["dirID"]
+
+    async def name(self, fileId: int, fileName: str) -> Dict[str, Any]:
+        """修改文件名。"""
+        resp = await self.request(ConstAPI.FILE_NAME, {"fileId": fileId, "fileName": fileName})
+        self.super._notify("name", [fileId], None, [fileName])
+        return resp
+
+    async def rename(self, renameList: Union[Tuple[int, str], List[Tuple[int, str]]]) -> None:
+        """批量重命名文件。"""
+        if not isinstance(renameList, list):
+            fileId, fileName = renameList
+            await self.request(
+                ConstAPI.FILE_RENAME_SINGLE, {"fileId": fileId, "fileName": fileName}
+            )
+            self.super._notify("rename", [fileId], None, [fileName])
+        else:
+            for i in range(0, len(renameList), 30):
+                batch = renameList[i : i + 30]
+                await self.request(
+                    ConstAPI.FILE_RENAME, {"renameList": [f"{f}|{n}" for f, n in batch]}
+                )
+                self.super._notify("rename", [f for f, _ in batch], None, [n for _, n in batch])
+
+    async def download_info(self, fileId: int, direct: bool = True) -> str:
+        """获取文件下载信息。"""
+        resp = await self.request(ConstAPI.FILE_DOWNLOAD_INFO, data={"fileId": fileId})
+        url = resp["downloadUrl"]
+        if not direct:
+            return url
+        head = await self.super.client.head(url, follow_redirects=True)
+        return str(head.url)
+
+
+class _AsyncUpload(_AsyncBind):
+    """文件上传操作类（V1版本，异步）。"""
+
+    async def create(
+        self,
+        parentFileID: int,
+        filename: str,
+        etag: str,
+        size: int,
+        duplicate: Optional[int] = None,
+        containDir: bool = False,
+    ) -> Dict[str, Any]:
+        """创建上传任务。"""
+        resp = await self.request(
+            ConstAPI.FILE_UPLOAD_CREATE,
+            {
+                "parentFileID": parentFileID,
+                "filename": filename,
+                "etag": etag,
+                "size": size,
+                "duplicate": duplicate,
+                "containDir": containDir,
+            },
+        )
+        return self.super._uploadCreated(resp, parentFileID, containDir)
+
+    async def list_upload_parts(self, preuploadID: int) -> Dict[str, Any]:
+        """列出已上传的分片。"""
+        return await self.request(
+            ConstAPI.FILE_UPLOAD_LIST_UPLOAD_PARTS, {"preuploadID": preuploadID}
+        )
+
+    async def get_upload_url(self, preuploadID: int, sliceNo: int) -> Dict[str, Any]:
+        """获取分片上传URL。"""
+        return await self.request(
+            ConstAPI.FILE_UPLOAD_GET_UPLOAD_URL, {"preuploadID": preuploadID, "sliceNo": sliceNo}
+        )
+
+    async def upload_complete(self, preuploadID: int) -> Dict[str, Any]:
+        """完成上传。"""
+        resp = await self.request(ConstAPI.FILE_UPLOAD_COMPLETE, {"preuploadID": preuploadID})
+        return self.super._uploadCompleted(preuploadID, resp)
+
+    async def upload_async_result(self, preuploadID: int) -> Dict[str, Any]:
+        """查询异步上传结果。"""
+        resp = await self.request(ConstAPI.FILE_UPLOAD_ASYNC_RESULT, {"preuploadID": preuploadID})
+        return self.super._uploadCompleted(preuploadID, resp)
+
+    async def put(
+        self,
+        file_info: FileSource,
+        upload_name: str,
+        parentFileID: int = 0,
+        duplicate: int = 2,
+        containDir: bool = False,
+        ctx: Optional[Ctx] = None,
+        threads: int = 3,
+    ) -> str:
+        """上传文件，参数同 _Upload.put。
+
+        Args:
+            threads: 同时上传的分片数，默认为3
+
+        Returns:
+            上传文件的ID
+        """
+        if ctx is None:
+            ctx = Ctx()
+        if containDir:
+            upload_name = upload_name.replace("\\", "/")
+        loop = asyncio.get_running_loop()
+        file_size, file_etag = await loop.run_in_executor(
+            None, tool.size_md5, file_info, self.super._hash_cache
+        )
+        respData = await self.create(
+            parentFileID=parentFileID,
+            filename=upload_name,
+            etag=file_etag,
+            size=file_size,
+            duplicate=duplicate,
+            containDir=containDir,
+        )
+
+        if respData["reuse"]:
+            return respData["fileID"]
+
+        preuploadID = respData["preuploadID"]
+        sliceSize = respData["sliceSize"]
+
+        total_sliceNo = file_size // sliceSize + bool(file_size % sliceSize)
+        semaphore = asyncio.Semaphore(threads)
+
+        policy = self.super._retry
+        presigned = API_INFO(_PRESIGNED_SLICE, "PUT")
+
+        async def upload_slice(sn: int) -> None:
+            async with semaphore:
+                deadline = policy.start()
+                for retry_num in range(3):
+                    if ctx.isDone():
+                        return
+                    try:
+                        res = await self.get_upload_url(preuploadID, sn)
+                        limit = ((sn - 1) * sliceSize, min(sn * sliceSize, file_size))
+                        body = await loop.run_in_executor(None, _readSlice, source, limit, ctx)
+                        connect, read = policy.timeout(presigned, len(body), deadline)
+                        response = await self.super.client.put(
+                            res["presignedURL"],
+                            content=body,
+                            timeout=httpx.Timeout(read, connect=connect),
+                        )
+                        response.raise_for_status()
+                        return
+                    except DeadlineExceeded as e:
+                        ctx.setInfo(e)
+                        return
+                    except Exception as e:
+                        if retry_num == 2:
+                            ctx.setInfo(e)
+                            return
+                        try:
+                            delay = deadline.sleep_time(policy.delay(retry_num + 1), presigned.url)
+                        except DeadlineExceeded as err:
+                            ctx.setInfo(err)
+                            return
+                        await asyncio.sleep(delay)
+
+        # 所有分片共享一个文件描述符，上传结束后关闭
+        with tool.shared(file_info) as source:
+            await asyncio.gather(*(upload_slice(sn) for sn in range(1, total_sliceNo + 1)))
+
+        if ctx.isDone():
+            self.super._uploadAbandoned(preuploadID)
+            raise ctx.info
+
+        resp = await self.upload_complete(preuploadID)
+        if resp["completed"]:
+            return resp["fileID"]
+
+        if resp["async"]:
+            api = ConstAPI.FILE_UPLOAD_ASYNC_RESULT
+            deadline, interval = policy.start(), policy.poll_interval
+            while True:
+                resp = await self.request(api, {"preuploadID": preuploadID}, deadline=deadline)
+                resp = self.super._uploadCompleted(preuploadID, resp)
+                if resp["completed"]:
+                    return resp["fileID"]
+                await asyncio.sleep(deadline.sleep_time(interval, api.url))
+                interval = policy.next_poll(interval)
+
+        raise Exception("业务逻辑错误")
+
+
+class _AsyncUploadV2(_AsyncBind):
+    """文件上传操作类（V2版本，异步）。"""
+
+    async def uploadDomain(self) -> str:
+        """获取上传域名。"""
+        domainResp = await self.request(ConstAPI.FILE_UPLOAD_DOMAIN_V2)
+        return random.choice(domainResp)
+
+    async def uploadSignal(
+        self,
+        parentFileID: int,
+        filename: str,
+        etag: str,
+        size: int,
+        file: Any,
+        duplicate: Optional[int] = None,
+        containDir: Optional[bool] = None,
+    ) -> str:
+        """单文件上传。"""
+        assert duplicate in (None, 0, 1, 2), "duplicate参数错误"
+        files = {
+            "parentFileID": (None, parentFileID),
+            "filename": (None, filename),
+            "etag": (None, etag),
+            "size": (None, size),
+            "duplicate": (None, duplicate),
+            "containDir": (None, containDir),
+            "file": ("/", file),
+        }
+        resp = await self.request(
+            ConstAPI.FILE_UPLOAD_SINGLE_V2, files=files, headersCtl={"Content-Type": None}
+        )
+        if not resp["completed"]:
+            raise Exception("上传失败")
+        self.super._notify("upload", [resp["fileID"]], None if containDir else [parentFileID])
+        return resp["fileID"]
+
+    async def putSignal(
+        self,
+        file_info: FileSource,
+        upload_name: str,
+        parentFileID: int = 0,
+        duplicate: int = 2,
+        containDir: bool = False,
+    ) -> str:
+        """单文件上传（便捷方法），参数同 _UploadV2.putSignal。"""
+        loop = asyncio.get_running_loop()
+        file_size, file_etag = await loop.run_in_executor(
+            None, tool.size_md5, file_info, self.super._hash_cache
+        )
+        with tool.body(file_info, file_size) as file:
+            return await self.uploadSignal(
+                parentFileID=parentFileID,
+                filename=upload_name,
+                etag=file_etag,
+                size=file_size,
+                file=file,
+                duplicate=duplicate,
+                containDir=containDir,
+            )
+
+    async def create(
+        self,
+        parentFileID: int,
+        filename: str,
+        etag: str,
+        size: int,
+        duplicate: Optional[int] = None,
+        containDir: bool = False,
+    ) -> Dict[str, Any]:
+        """创建上传任务。"""
+        resp = await self.request(
+            ConstAPI.FILE_UPLOAD_CREATE_V2,
+            {
+                "parentFileID": parentFileID,
+                "filename": filename,
+                "etag": etag,
+                "size": size,
+                "duplicate": duplicate,
+                "containDir": containDir,
+            },
+        )
+        return self.super._uploadCreated(resp, parentFileID, containDir)
+
+    async def complete(self, preuploadID: str, timeout: Optional[float] = None) -> str:
+        """完成上传，返回上传文件的ID，参数同 _UploadV2.complete。"""
+        policy = self.super._retry
+        deadline, interval = policy.start(timeout), policy.poll_interval
+        api = ConstAPI.FILE_UPLOAD_COMPLETE_V2
+        while True:
+            try:
+                resp = await self.request(api, {"preuploadID": preuploadID}, deadline=deadline)
+                resp = self.super._uploadCompleted(preuploadID, resp)
+                if resp["completed"]:
+                    return resp["fileID"]
+            except ApiResponseFailed as e:
+                if e.code != 20103:
+                    raise e
+            await asyncio.sleep(deadline.sleep_time(interval, api.url))
+            interval = policy.next_poll(interval)
+
+    async def put(
+        self,
+        file_info: FileSource,
+        upload_name: str,
+        parentFileID: int = 0,
+        duplicate: int = 2,
+        containDir: bool = False,
+        ctx: Optional[Ctx] = None,
+        threads: int = 3,
+        max_inflight: int = 0,
+    ) -> str:
+        """上传文件（分片上传），参数同 _UploadV2.put。
+
+        Args:
+            threads: 同时上传的分片数，默认为3
+            max_inflight: 同时上传的分片总字节数上限，0表示只受 threads 限制
+
+        Returns:
+            上传文件的ID
+        """
+        if ctx is None:
+            ctx = Ctx()
+        loop = asyncio.get_running_loop()
+        fileDigest = await loop.run_in_executor(
+            None,
+            functools.partial(
+                tool.digest, file_info, self.super._slice_size, cache=self.super._hash_cache
+            ),
+        )
+        file_size = fileDigest.size
+        respCreate = await self.create(
+            parentFileID=parentFileID,
+            filename=upload_name,
+            etag=fileDigest.md5,
+            size=file_size,
+            duplicate=duplicate,
+            containDir=containDir,
+        )
+        if respCreate["reuse"]:
+            return respCreate["fileID"]
+        preuploadID = respCreate["preuploadID"]
+        sliceSize = respCreate["sliceSize"]
+        self.super._slice_size = sliceSize
+        sliceMD5s = fileDigest.slices(sliceSize)
+        server = random.choice(respCreate["servers"])
+        api = API_INFO(urllib.parse.urljoin(server, "/upload/v2/file/slice"), "POST", 0)
+        sliceNum = (file_size + sliceSize - 1) // sliceSize
+        if max_inflight:
+            threads = min(threads, max_inflight // sliceSize)
+        semaphore = asyncio.Semaphore(max(threads, 1))
+
+        policy = self.super._retry
+
+        async def putSlice(sliceNo: int) -> None:
+            async with semaphore:
+                limit = ((sliceNo - 1) * sliceSize, min(sliceNo * sliceSize, file_size))
+                deadline = policy.start()
+                for retry_num in range(policy.retries + 1):
+                    if ctx.isDone():
+                        return
+                    try:
+                        body = await loop.run_in_executor(None, _readSlice, source, limit, ctx)
+                        if sliceMD5s is None:
+                            sliceMD5 = hashlib.md5(body).hexdigest()
+                        else:
+                            sliceMD5 = sliceMD5s[sliceNo - 1]
+                        files = {
+                            "preuploadID": (None, preuploadID),
+                            "sliceNo": (None, sliceNo),
+                            "sliceMD5": (None, sliceMD5),
+                            "slice": (upload_name, body),
+                        }
+                        await self.request(
+                            api, files=files, headersCtl={"Content-Type": None}, deadline=deadline
+                        )
+                        return
+                    except ApiResponseFailed as e:
+                        # 网络异常已由 request 重试，这里只重试服务端拒绝的分片
+                        if retry_num == policy.retries:
+                            ctx.setInfo(e)
+                            return
+                        try:
+                            delay = deadline.sleep_time(policy.delay(retry_num + 1), api.url)
+                        except DeadlineExceeded as err:
+                            ctx.setInfo(err)
+                            return
+                        await asyncio.sleep(delay)
+                    except Exception as e:
+                        ctx.setInfo(e)
+                        return
+
+        with tool.shared(file_info) as source:
+            await asyncio.gather(*(putSlice(i) for i in range(1, sliceNum + 1)))
+        if ctx.isDone():
+            self.super._uploadAbandoned(preuploadID)
+            raise ctx.info
+        return await self.complete(preuploadID)
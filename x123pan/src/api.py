@@ -1,21 +1,123 @@
+import collections
 import concurrent.futures
+import hashlib
 import logging
 import random
+import threading
 import time
 import urllib.parse
-from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
 
 import requests
 from requests import Session
-from requests.sessions import HTTPAdapter
-from urllib3 import Retry
+from requests.adapters import HTTPAdapter
 
 from . import tool
+from .batch import DetailLoader
+from .cache import MetaCache
 from .const import ConstAPI
-from .type import API_INFO, ApiResponseFailed, Ctx, DataResponse
+from .hashcache import HashCache
+from .limiter import AIMDController
+from .metrics import Metrics, body_size
+from .pool import PooledAdapter
+from .record import FileRecord
+from .retry import Deadline, RetryPolicy, file_offsets, files_size
+from .search import SearchIndex
+from .type import (
+    API_INFO,
+    ApiResponseFailed,
+    Ctx,
+    DeadlineExceeded,
+    FileSource,
+    Mutation,
+    SectionDataReader,
+    SectionFileReader,
+)
+
+# V1 分片直传预签名地址的统计端点名（预签名URL各不相同，统一归为一个端点）
+_PRESIGNED_SLICE = "/upload/v1/presigned"
+
+
+class _Observable:
+    """文件变更事件的发送方，Access 与 AsyncAccess 共用。
 
+    Attributes:
+        _listeners: 已注册的监听器
+        _uploads: 已创建但尚未完成的上传任务的目标目录，按 preuploadID 记录，
+            超过 MAX_PENDING_UPLOADS 个时丢弃最早的记录（完成事件的目标目录视为未知）
+    """
+
+    MAX_PENDING_UPLOADS = 1024
+
+    _listeners: List[Callable[[Mutation], None]]
+    _uploads: "collections.OrderedDict[str, Optional[List[int]]]"
+
+    def _initListeners(self) -> None:
+        """初始化监听器列表。"""
+        self._listeners = []
+        self._uploads = collections.OrderedDict()
+
+    def add_listener(self, listener: Callable[[Mutation], None]) -> None:
+        """注册文件变更监听器。
+
+        trash、delete、recover、move、rename、name、mkdir 以及上传成功后，
+        监听器会在调用线程中收到对应的 Mutation 事件。
+
+        Args:
+            listener: 接收 Mutation 的回调函数
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Mutation], None]) -> None:
+        """移除文件变更监听器。"""
+        self._listeners.remove(listener)
 
-class Access:
+    def _notify(
+        self,
+        kind: str,
+        fileIDs: List[int],
+        parentIDs: Optional[List[int]] = None,
+        names: Optional[List[str]] = None,
+    ) -> None:
+        """向监听器发送文件变更事件。"""
+        if not self._listeners:
+            return
+        mutation = Mutation(
+            kind, list(fileIDs), parentIDs if parentIDs is None else list(parentIDs), names
+        )
+        for listener in list(self._listeners):
+            listener(mutation)
+
+    def _uploadCreated(
+        self, resp: Dict[str, Any], parentFileID: int, containDir: bool
+    ) -> Dict[str, Any]:
+        """记录上传任务的目标目录，秒传成功时直接发送变更事件。
+
+        无论当前是否有监听器都会记录，上传期间注册的监听器也能收到正确的目标目录。
+        """
+        parents = None if containDir else [parentFileID]
+        if resp.get("reuse"):
+            self._notify("upload", [resp["fileID"]], parents)
+        elif resp.get("preuploadID"):
+            self._uploads[str(resp["preuploadID"])] = parents
+            while len(self._uploads) > self.MAX_PENDING_UPLOADS:
+                self._uploads.popitem(last=False)
+        return resp
+
+    def _uploadCompleted(
+        self, preuploadID: Union[int, str], resp: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """上传完成时发送变更事件（目标目录未记录时视为未知）。"""
+        if resp.get("completed"):
+            self._notify("upload", [resp["fileID"]], self._uploads.pop(str(preuploadID), None))
+        return resp
+
+    def _uploadAbandoned(self, preuploadID: Union[int, str]) -> None:
+        """上传失败时丢弃任务的目标目录记录。"""
+        self._uploads.pop(str(preuploadID), None)
+
+
+class Access(_Observable):
     """123云盘API访问类。
 
     提供对123云盘API的访问接口，包括用户管理、文件操作、上传下载等功能。
@@ -23,10 +125,12 @@ class Access:
     Attributes:
         _log: 日志记录器
         session: HTTP会话对象
+        token_margin: 令牌过期前多少秒开始主动刷新，默认为300
     """
 
     _log: Union[str, logging.Logger]
     session: Session
+    token_margin: float = 300
 
     def __init__(
         self,
@@ -55,7 +159,18 @@ class Access:
             self._path_log,
             self._logLevel,
         ) = (clientID, clientSecret, accessToken, path_access, path_log, logLevel)
-
+        self._rate_control: Optional[AIMDController] = None
+        self._fast_json, self._validate = False, True
+        self._metrics: Optional[Metrics] = None
+        self._retry = RetryPolicy()
+        self._detail_loader: Optional[DetailLoader] = None
+        self._cache: Optional[MetaCache] = None
+        self._search: Optional[SearchIndex] = None
+        # 最近一次创建V2上传任务时服务端返回的分片大小，用于预先计算分片MD5
+        self._slice_size = tool.SLICE_SIZE
+        self._hash_cache: Optional[HashCache] = None
+
+        self._initListeners()
         self._initBind()
         self._initSession()
         self._initToken()
@@ -73,22 +188,18 @@ class Access:
         """初始化HTTP会话。"""
         self.session = requests.session()
         self.session.trust_env = False
-
-        retry_strategy = Retry(total=3, backoff_factor=1)
-
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        self.session.mount("http://", adapter)
-        self.session.mount("https://", adapter)
+        self.set_pool()
 
     def _initToken(self) -> None:
         """初始化访问令牌。"""
+        self._token_lock = threading.Lock()
+        self._token_expire = 0.0
         if self._path_access:
-            with open(self._path_access, "a+") as f:
-                f.seek(0)
+            with tool.file_lock(self._path_access):
                 if self._access_token:
-                    f.write(self._access_token)
-                    f.seek(0)
-                self._access_token = f.read()
+                    tool.write_token(self._path_access, self._access_token)
+                else:
+                    self._access_token, self._token_expire = tool.read_token(self._path_access)
 
     def _initLog(self) -> None:
         """初始化日志记录器。"""
@@ -107,16 +218,45 @@ class Access:
         self._log.addHandler(s_handler)
         self._log.debug("123云盘API启动")
 
-    def refresh_access_token(self) -> None:
-        """刷新访问令牌。"""
-        response = self.request(
-            ConstAPI.GET_ACCESS_TOKEN,
-            data={"clientID": self._clientID, "clientSecret": self._clientSecret},
-        )
-        self._access_token = response["accessToken"]
-        if self._path_access:
-            with open(self._path_access, "w") as f:
-                f.write(self._access_token)
+    def refresh_access_token(self, stale: Optional[str] = None, proactive: bool = False) -> None:
+        """刷新访问令牌。
+
+        同一进程内同一时刻只有一个线程真正发起刷新，其它线程等待后直接使用新令牌；
+        设置了 path_access 时通过文件锁与共享该文件的其它进程协调，
+        若文件中已有其它进程刷新过的有效令牌则直接采用，不再请求接口。
+
+        Args:
+            stale: 调用方认为已失效的令牌，默认为当前令牌；若当前令牌已不同则跳过刷新
+            proactive: 是否为过期前的主动刷新；若令牌已不在即将过期的范围内则跳过刷新
+        """
+        if stale is None:
+            stale = self._access_token
+        with self._token_lock:
+            if self._access_token != stale:
+                return
+            if proactive and not self._tokenExpiring(self._token_expire):
+                return
+            with tool.file_lock(self._path_access):
+                if self._path_access:
+                    token, expire = tool.read_token(self._path_access)
+                    if token and token != stale and not self._tokenExpiring(expire):
+                        self._access_token, self._token_expire = token, expire
+                        return
+                if self._metrics:
+                    api = ConstAPI.GET_ACCESS_TOKEN
+                    self._metrics.inc(api.method, api.url, "token_refreshes")
+                response = self.request(
+                    ConstAPI.GET_ACCESS_TOKEN,
+                    data={"clientID": self._clientID, "clientSecret": self._clientSecret},
+                )
+                self._token_expire = tool.parse_expire(response.get("expiredAt"))
+                self._access_token = response["accessToken"]
+                if self._path_access:
+                    tool.write_token(self._path_access, self._access_token, self._token_expire)
+
+    def _tokenExpiring(self, expire: float) -> bool:
+        """判断令牌是否已进入主动刷新窗口（过期时间未知时视为未过期）。"""
+        return bool(expire) and time.time() >= expire - self.token_margin
 
     def request(
         self,
@@ -124,25 +264,45 @@ class Access:
         data: Optional[Dict[str, Any]] = None,
         files: Optional[Dict[str, Any]] = None,
         headersCtl: Optional[Dict[str, str]] = None,
+        deadline: Union[Deadline, float, None] = None,
     ) -> Any:
         """发送API请求。
 
+        网络异常与响应解码失败按 RetryPolicy 指数退避重试，429 按限流退避重试，
+        所有重试共享同一个截止时间；重试前 files 中的文件对象回到首次发送前的位置。
+
         Args:
             api: API信息对象
             data: 请求数据
             files: 上传的文件
             headersCtl: 额外的请求头
+            deadline: Deadline对象或总时长秒数，默认使用 RetryPolicy.deadline
 
         Returns:
             API响应数据
 
         Raises:
             ApiResponseFailed: 当API响应失败时抛出
+            DeadlineExceeded: 超过截止时间仍未成功时抛出
+            requests.RequestException: 网络异常超过重试次数时抛出
         """
-        allow_refresh = True
+        is_token_api = api is ConstAPI.GET_ACCESS_TOKEN
+        allow_refresh = not is_token_api
+        policy = self._retry
+        deadline = policy.start(deadline)
+        size = files_size(files)
+        offsets = file_offsets(files)
+        attempt = failures = 0
         while True:
+            # 重试时文件字段回到首次发送前的位置，避免发送已读完的空数据
+            if attempt:
+                for fp, offset in offsets:
+                    fp.seek(offset)
+            if not is_token_api and self._tokenExpiring(self._token_expire):
+                self.refresh_access_token(proactive=True)
+            token = self._access_token
             headers = {
-                "Authorization": "Bearer " + self._access_token if self._access_token else "",
+                "Authorization": "Bearer " + token if token else "",
                 "Content-Type": "application/json",
                 "Platform": ConstAPI.PLATFORM,
             }
@@ -157,58 +317,97 @@ class Access:
             else:
                 raise NotImplementedError(f"不支持的请求方法:{api.method}")
 
-            with api:
-                try:
+            if self._rate_control:
+                self._rate_control.attach(api)
+            waited = api.require()
+            timeout = policy.timeout(api, size, deadline)
+            metrics = self._metrics
+            if metrics:
+                if attempt:
+                    metrics.inc(api.method, api.url, "retries")
+                metrics.begin(api.method, api.url)
+            attempt += 1
+            begin, response, failed, error = time.monotonic(), None, True, None
+            try:
+                if self._log.isEnabledFor(logging.DEBUG):
                     self._log.debug(
-                        f"[REQUEST] "
-                        f"URL: {api.url} | "
-                        f"Method: {api.method.upper()} | "
-                        f"Headers: {dict(headers) if headers else {} } | "
-                        f"Params: {dataReqs.get('params', {})} | "
-                        f"Data: {dataReqs.get('data', {})} | "
-                        f"Files: {len(files) if files else 0} file(s)"
+                        "[REQUEST] URL: %s | Method: %s | Headers: %s | Params: %s | "
+                        "Data: %s | Files: %s file(s)",
+                        api.url,
+                        api.method.upper(),
+                        headers,
+                        dataReqs.get("params", {}),
+                        dataReqs.get("json", {}),
+                        len(files) if files else 0,
                     )
 
-                    response = self.session.request(
+                response = self.session.request(
+                    api.method,
+                    api.url,
+                    headers=headers,
+                    files=files,
+                    timeout=timeout,
+                    **dataReqs,
+                )
+                payload = tool.loads(response.content, self._fast_json)
+
+                if self._log.isEnabledFor(logging.DEBUG):
+                    self._log.debug(
+                        "[RESPONSE] URL: %s | Method: %s | Status: %s | Response: %s",
+                        response.request.url,
+                        response.request.method,
+                        response.status_code,
+                        payload,
+                    )
+                code, message, result = tool.unpack(payload, self._validate)
+                failed = code != 0
+            except (requests.RequestException, *tool.DECODE_ERRORS) as e:
+                error = e
+            except Exception as e:
+                self._log.error(f"{api.url} {api.method} {e}")
+                raise
+            finally:
+                if metrics:
+                    metrics.end(
                         api.method,
                         api.url,
-                        headers=headers,
-                        files=files,
-                        timeout=(4, 60),
-                        **dataReqs,
+                        time.monotonic() - begin,
+                        waited,
+                        body_size(response.request.body) if response is not None else 0,
+                        len(response.content) if response is not None else 0,
+                        failed,
                     )
 
-                    self._log.debug(
-                        f"[RESPONSE] "
-                        f"URL: {response.request.url} | "
-                        f"Method: {response.request.method} | "
-                        f"Status: {response.status_code} | "
-                        f"Response: {response.json()}"
+            if error is not None:
+                failures += 1
+                if failures > policy.retries:
+                    self._log.error(
+                        f"{api.url} {api.method} 重试{policy.retries}次后仍失败:{error}"
                     )
-                except requests.RequestException as e:
-                    self._log.warning(f" b:{e}")
-                    time.sleep(3)
-                    continue
-                except requests.exceptions.JSONDecodeError as e:
-                    self._log.warning(f"JSON解码失败:{e}")
-                    time.sleep(3)
-                    continue
-                except Exception as e:
-                    self._log.error(f"{api.url} {api.method} {e}")
-                    raise
-
-            r = DataResponse(**response.json())
-            if r.code in (0,):
-                return r.data
-            elif r.code in (401, 400) and allow_refresh:
-                self.refresh_access_token()
+                    raise error
+                delay = policy.delay(failures)
+                try:
+                    delay = deadline.sleep_time(delay, api.url)
+                except DeadlineExceeded as e:
+                    raise e from error
+                reason = "JSON解码失败" if isinstance(error, tool.DECODE_ERRORS) else "请求失败"
+                self._log.warning(f"{api.url} {reason}:{error}，{delay:.1f}秒后第{failures}次重试")
+                time.sleep(delay)
+            elif code in (0,):
+                if self._rate_control:
+                    self._rate_control.on_success(api, waited)
+                return result
+            elif code in (401, 400) and allow_refresh:
+                self.refresh_access_token(stale=token)
                 allow_refresh = False
-            elif r.code in (429,):
-                time.sleep(0.5)
+            elif code in (429,):
+                if metrics:
+                    metrics.inc(api.method, api.url, "throttled")
+                delay = self._rate_control.on_throttle(api) if self._rate_control else 0.5
+                time.sleep(deadline.sleep_time(delay, api.url))
                 self._log.warning(f"{api.url}请求频繁，请稍后再试")
             else:
-                raise ApiResponseFailed(r.code, r.message)
-        raise ApiResponseFailed(401, "Token请求失败")
+                raise ApiResponseFailed(code, message)
 
     def get_access_token(self) -> str:
         """获取访问令牌。
@@ -228,6 +427,195 @@ class Access:
         self.session.proxies = {"http": proxy, "https": proxy} if proxy else {}
         self.session.verify = verify
 
+    def set_pool(
+        self,
+        pool_size: int = 10,
+        host_pool_size: Optional[Dict[str, int]] = None,
+        block: bool = False,
+        prewarm: int = 0,
+    ) -> None:
+        """设置连接池。
+
+        元数据请求与分片上传共用同一个会话，连接按主机保持长连接复用。
+
+        Args:
+            pool_size: 每个主机保留的连接数，默认为10，多线程并发时建议不小于线程数
+            host_pool_size: 按主机名单独设置的连接数，如 {"open-api.123pan.com": 64}
+            block: 连接池耗尽时是否阻塞等待空闲连接，默认为False（临时新建连接）
+            prewarm: 预热连接数，大于0时立即对 BASE_URL、UPLOAD_URL 建立连接，
+                并在分片上传前对上传服务器建立连接
+        """
+        adapter = PooledAdapter(
+            pool_connections=max(10, len(host_pool_size or {})),
+            pool_maxsize=pool_size,
+            host_maxsize=host_pool_size,
+            pool_block=block,
+            # 不使用 urllib3 的 Retry：网络异常统一由 Access.request 按 RetryPolicy 重试，
+            # 两层同时重试会使实际尝试次数相乘并越过截止时间
+            max_retries=0,
+        )
+        old = self.session.adapters.get("https://")
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if old is not None:
+            old.close()
+        self._prewarm = prewarm
+        if prewarm:
+            self.prewarm(connections=prewarm)
+
+    def prewarm(self, urls: Optional[List[str]] = None, connections: int = 1) -> None:
+        """预先建立连接（含TLS握手）并放入连接池。
+
+        Args:
+            urls: 需要预热的地址，默认为 BASE_URL 和 UPLOAD_URL
+            connections: 每个地址建立的连接数
+        """
+        if urls is None:
+            urls = [ConstAPI.BASE_URL, ConstAPI.UPLOAD_URL]
+
+        def warm(url: str) -> None:
+            adapter = self.session.get_adapter(url)
+            if not isinstance(adapter, HTTPAdapter):
+                return
+            proxies = self.session.proxies
+            # 取得请求实际使用的连接池（TLS 参数相同），否则预热的连接不会被复用
+            if hasattr(adapter, "get_connection_with_tls_context"):
+                request = requests.Request("HEAD", url).prepare()
+                pool = adapter.get_connection_with_tls_context(
+                    request, self.session.verify, proxies
+                )
+            else:  # pragma: no cover  requests < 2.32
+                pool = adapter.get_connection(url, proxies)
+            maxsize = pool.pool.maxsize if pool.pool is not None else connections
+            conns = []
+            # urllib3 没有不发请求就取出、归还连接的公开接口，这里直接使用连接池的
+            # _get_conn/_put_conn（urllib3 1.x 与 2.x 中签名一致），只建立连接不发送请求
+            try:
+                for _ in range(min(connections, maxsize)):
+                    conn = pool._get_conn()
+                    conns.append(conn)
+                    if getattr(conn, "sock", None) is None:
+                        conn.connect()
+            except Exception as e:
+                self._log.warning(f"预热连接失败 {url}: {e}")
+            finally:
+                for conn in conns:
+                    pool._put_conn(conn)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(urls) or 1) as executor:
+            list(executor.map(warm, urls))
+
+    def pool_stats(self) -> Dict[str, Dict[str, float]]:
+        """获取连接池统计信息。
+
+        Returns:
+            以主机名为键的统计字典，包含 requests（取用次数）、new（新建连接数）、
+            hits（复用连接数）、waits（等待空闲连接次数）、wait_time（等待总秒数）
+        """
+        adapter = self.session.get_adapter(ConstAPI.BASE_URL)
+        return adapter.stats.snapshot() if isinstance(adapter, PooledAdapter) else {}
+
+    def set_decoder(self, fast_json: bool = False, validate: bool = True) -> None:
+        """设置响应解码方式。
+
+        Args:
+            fast_json: 是否使用 orjson 解析响应体，需要安装 x123pan[orjson]
+            validate: 是否使用 DataResponse 校验响应外层结构，关闭可减少列表类请求的CPU开销
+
+        Raises:
+            ImportError: 启用 fast_json 但未安装 orjson 时抛出
+        """
+        if fast_json and tool.orjson is None:
+            raise ImportError("fast_json 依赖 orjson，请执行 pip install x123pan[orjson]")
+        self._fast_json, self._validate = fast_json, validate
+
+    def set_metrics(self, metrics: Optional[Metrics]) -> None:
+        """设置请求指标统计。
+
+        Args:
+            metrics: 指标对象，为None时关闭统计
+        """
+        self._metrics = metrics
+
+    def set_rate_control(self, controller: Optional[AIMDController]) -> None:
+        """设置自适应限流控制器。
+
+        Args:
+            controller: AIMD控制器，为None时关闭自适应限流并恢复原始QPS配置
+        """
+        if self._rate_control and controller is not self._rate_control:
+            self._rate_control.reset()
+        self._rate_control = controller
+
+    def set_retry(self, policy: Optional[RetryPolicy] = None) -> None:
+        """设置重试与超时策略。
+
+        Args:
+            policy: 重试策略，为None时恢复默认策略
+        """
+        self._retry = policy if policy is not None else RetryPolicy()
+
+    def set_batch(self, window: float = 0.005, max_batch: int = 100) -> None:
+        """设置 file.detail 请求合并。
+
+        开启后并发的 file.detail 调用会在 window 秒内合并为一次 file.infos 请求，
+        返回结果与 detail 格式相同。
+
+        Args:
+            window: 合并请求的等待窗口秒数，小于等于0时关闭合并
+            max_batch: 凑满多少个ID后立即发起请求，默认为100（infos 单次上限）
+        """
+        if window <= 0:
+            self._detail_loader = None
+            return
+        self._detail_loader = DetailLoader(
+            self.file._infos,
+            lambda fileID: self.request(ConstAPI.FILE_DETAIL, data={"fileID": fileID}),
+            window,
+            max_batch,
+        )
+
+    def set_cache(self, cache: Optional[MetaCache]) -> None:
+        """设置文件元数据缓存。
+
+        开启后 file.detail、file.infos 与 file.list_v2 优先读取缓存，
+        本对象发起的文件修改与上传会自动失效相关缓存。
+
+        Args:
+            cache: 缓存对象，为None时关闭缓存
+        """
+        if self._cache is not None:
+            self.remove_listener(self._cache.invalidate)
+        self._cache = cache
+        if cache is not None:
+            self.add_listener(cache.invalidate)
+
+    def set_hash_cache(self, cache: Optional[HashCache]) -> None:
+        """设置文件摘要缓存。
+
+        开启后上传本地文件时，大小、修改时间与 inode 都未变化的文件直接使用缓存的MD5，
+        不再读取文件计算；文件秒传时完全不读取文件。
+
+        Args:
+            cache: 摘要缓存对象，为None时关闭
+        """
+        self._hash_cache = cache
+
+    def set_search(self, index: Optional[SearchIndex]) -> None:
+        """设置文件名搜索索引。
+
+        开启后 file.list_v2 与 file.infos 从接口获取的文件自动写入索引，
+        本对象发起的文件修改直接更新索引。
+
+        Args:
+            index: 搜索索引对象，为None时关闭
+        """
+        if self._search is not None:
+            self.remove_listener(self._search.on_mutation)
+        self._search = index
+        if index is not None:
+            self.add_listener(index.on_mutation)
+
     def set_log_level(self, level: Union[int, str]) -> None:
         """设置日志级别。
 
@@ -325,29 +713,65 @@ class _File(_Bind):
     def detail(self, fileID: int) -> Dict[str, Any]:
         """获取文件详细信息。
 
+        通过 Access.set_batch 开启合并后，并发调用会合并为一次 infos 请求；
+        通过 Access.set_cache 开启缓存后优先读取缓存。
+
         Args:
             fileID: 文件ID
 
         Returns:
             文件详细信息
         """
-        return self.request(ConstAPI.FILE_DETAIL, data={"fileID": fileID})
-
-    def infos(self, fileIds: Union[int, List[int]]) -> List[Dict[str, Any]]:
+        cache = self.super._cache
+        if cache is not None:
+            record = cache.get_detail(fileID)
+            if record is not None:
+                return record
+        loader = self.super._detail_loader
+        if loader is not None:
+            record = loader.load(fileID)
+        else:
+            record = self.request(ConstAPI.FILE_DETAIL, data={"fileID": fileID})
+        if cache is not None:
+            cache.put_detail(record)
+        return record
+
+    def infos(
+        self, fileIds: Union[int, List[int]], compact: bool = False
+    ) -> List[Union[Dict[str, Any], FileRecord]]:
         """批量获取文件信息。
 
         Args:
             fileIds: 文件ID或文件ID列表
+            compact: 是否返回紧凑的 FileRecord 代替字典，默认为False
 
         Returns:
             文件信息列表
         """
         if isinstance(fileIds, int):
             fileIds = [fileIds]
-        info_list = []
-        for i in range(0, len(fileIds), 100):
-            resp = self.request(ConstAPI.FILE_INFOS, data={"fileIds": fileIds[i : i + 100]})
+        info_list = self._infos(fileIds)
+        if compact:
+            return [FileRecord.from_dict(i) for i in info_list]
+        return list(info_list)
+
+    def _infos(self, fileIds: List[int]) -> List[Dict[str, Any]]:
+        """批量获取文件信息（字典格式），同时供 DetailLoader 合并查询使用。"""
+        cache = self.super._cache
+        missing = fileIds
+        if cache is not None:
+            found, missing = cache.get_infos(fileIds)
+        info_list: List[Dict[str, Any]] = []
+        for i in range(0, len(missing), 100):
+            resp = self.request(ConstAPI.FILE_INFOS, data={"fileIds": missing[i : i + 100]})
             info_list.extend(resp["fileList"])
+        if self.super._search is not None:
+            self.super._search.update(info_list)
+        if cache is not None:
+            cache.put_infos(info_list)
+            # 命中与新查询的结果按请求的顺序合并，服务端未返回的ID被跳过
+            found.update((info["fileId"], info) for info in info_list)
+            info_list = [found[fileId] for fileId in fileIds if fileId in found]
         return info_list
 
     def list_v2(
@@ -358,7 +782,10 @@ class _File(_Bind):
         searchMode: Optional[str] = None,
         lastFileId: int = 0,
         trashed: bool = False,
-    ) -> Iterator[Dict[str, Any]]:
+        pageSize: int = 100,
+        prefetch: bool = False,
+        compact: bool = False,
+    ) -> Iterator[Union[Dict[str, Any], FileRecord]]:
         """获取文件列表（V2版本）。
 
         Args:
@@ -368,30 +795,117 @@ class _File(_Bind):
             searchMode: 搜索模式
             lastFileId: 上次查询的最后一个文件ID，用于分页
             trashed: 是否包含回收站文件，默认为False
+            pageSize: 每页请求的数量，默认为100（接口上限）
+            prefetch: 是否预取下一页，开启后调用方处理当前页时下一页已在后台请求；
+                提前停止迭代时取消尚未发出的请求
+            compact: 是否生成紧凑的 FileRecord 代替字典，默认为False
 
         Yields:
-            文件信息字典
+            文件信息字典（compact 为True时为 FileRecord）
         """
+        pages = self.list_pages(
+            parentFileId, pageSize, searchData, searchMode, lastFileId, prefetch
+        )
         current = 0
-        while lastFileId != -1 and not (0 < limit <= current):
+        for page in pages:
+            for i in page:
+                if i["trashed"] == 0 or trashed:
+                    yield FileRecord.from_dict(i) if compact else i
+                    current += 1
+                    if 0 < limit <= current:
+                        return
+
+    def list_pages(
+        self,
+        parentFileId: int = 0,
+        pageSize: int = 100,
+        searchData: Optional[str] = None,
+        searchMode: Optional[str] = None,
+        lastFileId: int = 0,
+        prefetch: bool = False,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """逐页获取 list_v2 的原始结果（包含回收站文件）。
+
+        与 list_v2 相同读写目录缓存并同步搜索索引：命中缓存时整个目录作为一页返回，
+        完整列出目录后写入缓存。每取一页发起一次请求，因此可以把各页的请求交给不同线程，
+        但同一个迭代器不能被并发推进。
+
+        Args:
+            parentFileId: 父文件夹ID，默认为0（根目录）
+            pageSize: 每页请求的数量，默认为100（接口上限）
+            searchData: 搜索数据
+            searchMode: 搜索模式
+            lastFileId: 上次查询的最后一个文件ID，用于分页
+            prefetch: 是否预取下一页
+
+        Yields:
+            每页的文件信息列表
+        """
+        cache = self.super._cache
+        if cache is None or searchData is not None or searchMode is not None or lastFileId != 0:
+            yield from self._list_pages(
+                parentFileId, searchData, searchMode, lastFileId, pageSize, prefetch
+            )
+            return
+        items = cache.get_list(parentFileId)
+        if items is not None:
+            yield items
+            return
+        generation, items = cache.generation, []
+        for page in self._list_pages(parentFileId, None, None, 0, pageSize, prefetch):
+            items.extend(page)
+            yield page
+        cache.put_list(parentFileId, items, generation)
+
+    def _list_pages(
+        self,
+        parentFileId: int,
+        searchData: Optional[str],
+        searchMode: Optional[str],
+        lastFileId: int,
+        pageSize: int = 100,
+        prefetch: bool = False,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """逐页请求 list_v2，返回未经过滤的文件信息。
+
+        下一页的请求依赖上一页返回的 lastFileId，因此预取深度固定为一页。
+        """
+
+        def fetch(cursor: int) -> Dict[str, Any]:
             response = self.request(
                 ConstAPI.FILE_LIST_V2,
                 data={
                     "parentFileId": parentFileId,
-                    "limit": 100,
+                    "limit": pageSize,
                     "searchData": searchData,
                     "searchMode": searchMode,
-                    "lastFileId": lastFileId,
+                    "lastFileId": cursor,
                 },
             )
-            for i in response["fileList"]:
-                select_trashed = i["trashed"] == 0 or trashed
-                if select_trashed:
-                    if 0 < limit <= current:
-                        break
-                    yield i
-                    current += 1
-            lastFileId = response["lastFileId"]
+            if self.super._search is not None:
+                self.super._search.update(response["fileList"])
+            return response
+
+        if not prefetch:
+            while lastFileId != -1:
+                response = fetch(lastFileId)
+                yield response["fileList"]
+                lastFileId = response["lastFileId"]
+            return
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        future: Optional[concurrent.futures.Future] = None
+        try:
+            if lastFileId != -1:
+                future = executor.submit(fetch, lastFileId)
+            while future is not None:
+                response = future.result()
+                cursor = response["lastFileId"]
+                future = executor.submit(fetch, cursor) if cursor != -1 else None
+                yield response["fileList"]
+        finally:
+            if future is not None:
+                future.cancel()
+            executor.shutdown(wait=False)
 
     def list(
         self,
@@ -440,6 +954,7 @@ class _File(_Bind):
             fileIDs = [fileIDs]
         for i in range(0, len(fileIDs), 100):
             self.request(ConstAPI.FILE_TRASH, {"fileIDs": fileIDs[i : i + 100]})
+            self.super._notify("trash", fileIDs[i : i + 100])
 
     def delete(self, fileIDs: Union[int, List[int]]) -> None:
         """永久删除文件。
@@ -451,6 +966,7 @@ class _File(_Bind):
             fileIDs = [fileIDs]
         for i in range(0, len(fileIDs), 100):
             self.request(ConstAPI.FILE_DELETE, {"fileIDs": fileIDs[i : i + 100]})
+            self.super._notify("delete", fileIDs[i : i + 100])
 
     def recover(self, fileIDs: Union[int, List[int]]) -> None:
         """从回收站恢复文件。
@@ -462,6 +978,7 @@ class _File(_Bind):
             fileIDs = [fileIDs]
         for i in range(0, len(fileIDs), 100):
             self.request(ConstAPI.FILE_RECOVER, {"fileIDs": fileIDs[i : i + 100]})
+            self.super._notify("recover", fileIDs[i : i + 100])
 
     def move(self, fileIDs: Union[int, List[int]], toParentFileID: int) -> None:
         """移动文件到指定目录。
@@ -477,6 +994,7 @@ class _File(_Bind):
                 ConstAPI.FILE_MOVE,
                 {"fileIDs": fileIDs[i : i + 100], "toParentFileID": toParentFileID},
             )
+            self.super._notify("move", fileIDs[i : i + 100], [toParentFileID])
 
     def mkdir(self, parentID: int, name: str) -> int:
         """创建目录。
@@ -489,6 +1007,7 @@ class _File(_Bind):
             创建的目录ID
         """
         response = self.request(ConstAPI.FILE_UPLOAD_MKDIR, {"name": name, "parentID": parentID})
+        self.super._notify("mkdir", [response["dirID"]], [parentID], [name])
         return response["dirID"]
 
     def name(self, fileId: int, fileName: str) -> Dict[str, Any]:
@@ -501,7 +1020,9 @@ class _File(_Bind):
         Returns:
             修改结果
         """
-        return self.request(ConstAPI.FILE_NAME, {"fileId": fileId, "fileName": fileName})
+        response = self.request(ConstAPI.FILE_NAME, {"fileId": fileId, "fileName": fileName})
+        self.super._notify("name", [fileId], None, [fileName])
+        return response
 
     def rename(self, renameList: Union[Tuple[int, str], List[Tuple[int, str]]]) -> None:
         """批量重命名文件。
@@ -512,12 +1033,15 @@ class _File(_Bind):
         if not isinstance(renameList, list):
             fileId, fileName = renameList
             self.request(ConstAPI.FILE_RENAME_SINGLE, {"fileId": fileId, "fileName": fileName})
+            self.super._notify("rename", [fileId], None, [fileName])
         else:
             for i in range(0, len(renameList), 30):
                 self.request(
                     ConstAPI.FILE_RENAME,
                     {"renameList": [f"{i}|{n}" for i, n in renameList[i : i + 30]]},
                 )
+                batch = renameList[i : i + 30]
+                self.super._notify("rename", [f for f, _ in batch], None, [n for _, n in batch])
 
     def download_info(self, fileId: int, direct: bool = True) -> str:
         """获取文件下载信息。
@@ -562,7 +1086,7 @@ class _Upload(_Bind):
         Returns:
             上传任务信息
         """
-        return self.request(
+        resp = self.request(
             ConstAPI.FILE_UPLOAD_CREATE,
             {
                 "parentFileID": parentFileID,
@@ -573,6 +1097,7 @@ class _Upload(_Bind):
                 "containDir": containDir,
             },
         )
+        return self.super._uploadCreated(resp, parentFileID, containDir)
 
     def list_upload_parts(self, preuploadID: int) -> Dict[str, Any]:
         """列出已上传的分片。
@@ -608,7 +1133,8 @@ class _Upload(_Bind):
         Returns:
             上传完成信息
         """
-        return self.request(ConstAPI.FILE_UPLOAD_COMPLETE, {"preuploadID": preuploadID})
+        resp = self.request(ConstAPI.FILE_UPLOAD_COMPLETE, {"preuploadID": preuploadID})
+        return self.super._uploadCompleted(preuploadID, resp)
 
     def upload_async_result(self, preuploadID: int) -> Dict[str, Any]:
         """查询异步上传结果。
@@ -619,11 +1145,12 @@ class _Upload(_Bind):
         Returns:
             上传结果信息
         """
-        return self.request(ConstAPI.FILE_UPLOAD_ASYNC_RESULT, {"preuploadID": preuploadID})
+        resp = self.request(ConstAPI.FILE_UPLOAD_ASYNC_RESULT, {"preuploadID": preuploadID})
+        return self.super._uploadCompleted(preuploadID, resp)
 
     def put(
         self,
-        file_info: Union[str, bytes],
+        file_info: FileSource,
         upload_name: str,
         parentFileID: int = 0,
         duplicate: int = 2,
@@ -633,7 +1160,7 @@ class _Upload(_Bind):
         """上传文件。
 
         Args:
-            file_info: 文件路径或字节数据
+            file_info: 文件路径、字节数据或可 seek 的二进制文件对象（见 tool.read）
             upload_name: 上传文件名
             parentFileID: 父目录ID，默认为0（根目录）
             duplicate: 重复文件处理方式，默认为2
@@ -650,7 +1177,7 @@ class _Upload(_Bind):
             ctx = Ctx()
         if containDir:
             upload_name = upload_name.replace("\\", "/")
-        file_size, file_etag = tool.size_md5(file_info)
+        file_size, file_etag = tool.size_md5(file_info, self.super._hash_cache)
         resp = self.create(
             parentFileID=parentFileID,
             filename=upload_name,
@@ -670,6 +1197,7 @@ class _Upload(_Bind):
         total_sliceNo = file_size // sliceSize + bool(file_size % sliceSize)
 
         def upload_slice(sn: int) -> None:
+            deadline = policy.start()
             for retry_num in range(3):
                 if ctx.isDone():
                     return
@@ -678,24 +1206,55 @@ class _Upload(_Bind):
                     res = self.get_upload_url(preuploadID, sn)
                     presignedURL = res["presignedURL"]
                     with tool.read(
-                        file_info, ((sn - 1) * sliceSize, min(sn * sliceSize, file_size)), ctx
+                        source, ((sn - 1) * sliceSize, min(sn * sliceSize, file_size)), ctx
                     ) as file_data:
-                        session.put(presignedURL, file_data)
+                        metrics = self.super._metrics
+                        if metrics:
+                            metrics.begin("PUT", _PRESIGNED_SLICE)
+                        begin, failed = time.monotonic(), True
+                        try:
+                            timeout = policy.timeout(presigned, body_size(file_data), deadline)
+                            session.put(presignedURL, file_data, timeout=timeout).raise_for_status()
+                            failed = False
+                        finally:
+                            if metrics:
+                                metrics.end(
+                                    "PUT",
+                                    _PRESIGNED_SLICE,
+                                    time.monotonic() - begin,
+                                    sent=file_data.tell(),
+                                    error=failed,
+                                )
+                    return
+                except DeadlineExceeded as e:
+                    ctx.setInfo(e)
                     return
                 except Exception as e:
                     if retry_num == 2:
                         ctx.setInfo(e)
+                    else:
+                        try:
+                            time.sleep(
+                                deadline.sleep_time(policy.delay(retry_num + 1), presigned.url)
+                            )
+                        except DeadlineExceeded as err:
+                            ctx.setInfo(err)
+                            return
                 finally:
                     if file_data:
                         file_data.close()
 
-        with requests.session() as session, concurrent.futures.ThreadPoolExecutor(
+        session, policy = self.super.session, self.super._retry
+        presigned = API_INFO(_PRESIGNED_SLICE, "PUT")
+        # 所有分片共享一个文件描述符，上传结束后关闭
+        with tool.shared(file_info) as source, concurrent.futures.ThreadPoolExecutor(
             max_workers=3
         ) as executor:
             for sliceNo in range(total_sliceNo):
                 executor.submit(upload_slice, sliceNo + 1)
 
         if ctx.isDone():
+            self.super._uploadAbandoned(preuploadID)
             raise ctx.info
 
         resp = self.upload_complete(preuploadID)
@@ -703,11 +1262,18 @@ class _Upload(_Bind):
             return resp["fileID"]
 
         if resp["async"]:
+            deadline, interval = policy.start(), policy.poll_interval
             while True:
-                resp = self.upload_async_result(preuploadID)
+                resp = self.request(
+                    ConstAPI.FILE_UPLOAD_ASYNC_RESULT,
+                    {"preuploadID": preuploadID},
+                    deadline=deadline,
+                )
+                resp = self.super._uploadCompleted(preuploadID, resp)
                 if resp["completed"]:
                     return resp["fileID"]
-                time.sleep(0.1)
+                time.sleep(deadline.sleep_time(interval, ConstAPI.FILE_UPLOAD_ASYNC_RESULT.url))
+                interval = policy.next_poll(interval)
 
         raise Exception("业务逻辑错误")
 
@@ -773,11 +1339,12 @@ class _UploadV2(_Bind):
         )
         if not resp["completed"]:
             raise Exception("上传失败")
+        self.super._notify("upload", [resp["fileID"]], None if containDir else [parentFileID])
         return resp["fileID"]
 
     def putSignal(
         self,
-        file_info: Union[str, bytes],
+        file_info: FileSource,
         upload_name: str,
         parentFileID: int = 0,
         duplicate: int = 2,
@@ -786,7 +1353,7 @@ class _UploadV2(_Bind):
         """单文件上传（便捷方法）。
 
         Args:
-            file_info: 文件路径或字节数据
+            file_info: 文件路径、字节数据或可 seek 的二进制文件对象（见 tool.read）
             upload_name: 上传文件名
             parentFileID: 父目录ID，默认为0（根目录）
             duplicate: 重复文件处理方式，默认为2
@@ -795,27 +1362,17 @@ class _UploadV2(_Bind):
         Returns:
             上传文件的ID
         """
-        file_size, file_etag = tool.size_md5(file_info)
-        if isinstance(file_info, str):
-            with open(file_info, "rb") as f:
-                return self.uploadSignal(
-                    parentFileID=parentFileID,
-                    filename=upload_name,
-                    etag=file_etag,
-                    size=file_size,
-                    file=f,
-                    duplicate=duplicate,
-                    containDir=containDir,
-                )
-        return self.uploadSignal(
-            parentFileID=parentFileID,
-            filename=upload_name,
-            etag=file_etag,
-            size=file_size,
-            file=file_info,
-            duplicate=duplicate,
-            containDir=containDir,
-        )
+        file_size, file_etag = tool.size_md5(file_info, self.super._hash_cache)
+        with tool.body(file_info, file_size) as file:
+            return self.uploadSignal(
+                parentFileID=parentFileID,
+                filename=upload_name,
+                etag=file_etag,
+                size=file_size,
+                file=file,
+                duplicate=duplicate,
+                containDir=containDir,
+            )
 
     def create(
         self,
@@ -839,7 +1396,7 @@ class _UploadV2(_Bind):
         Returns:
             上传任务信息
         """
-        return self.request(
+        resp = self.request(
             ConstAPI.FILE_UPLOAD_CREATE_V2,
             {
                 "parentFileID": parentFileID,
@@ -850,78 +1407,121 @@ class _UploadV2(_Bind):
                 "containDir": containDir,
             },
         )
+        return self.super._uploadCreated(resp, parentFileID, bool(containDir))
 
-    def complete(self, preuploadID: str) -> str:
+    def complete(self, preuploadID: str, timeout: Optional[float] = None) -> str:
         """完成上传。
 
+        服务端仍在校验分片（未完成或返回 20103）时按逐渐增大的间隔轮询，直到超时。
+
         Args:
             preuploadID: 预上传ID
+            timeout: 轮询的总时长秒数，默认使用 RetryPolicy.deadline
 
         Returns:
             上传文件的ID
 
         Raises:
             ApiResponseFailed: 当上传失败时抛出
+            DeadlineExceeded: 超时仍未完成时抛出
         """
+        policy = self.super._retry
+        deadline, interval = policy.start(timeout), policy.poll_interval
+        api = ConstAPI.FILE_UPLOAD_COMPLETE_V2
         while True:
             try:
-                resp = self.request(
-                    ConstAPI.FILE_UPLOAD_COMPLETE_V2, data={"preuploadID": preuploadID}
-                )
+                resp = self.request(api, {"preuploadID": preuploadID}, deadline=deadline)
+                resp = self.super._uploadCompleted(preuploadID, resp)
                 if resp["completed"]:
                     return resp["fileID"]
-                time.sleep(0.1)
             except ApiResponseFailed as e:
-                if e != 20103:
+                if e.code != 20103:
                     raise e
+            time.sleep(deadline.sleep_time(interval, api.url))
+            interval = policy.next_poll(interval)
 
     def put(
         self,
-        file_info: Union[str, bytes],
+        file_info: FileSource,
         upload_name: str,
         parentFileID: int = 0,
         duplicate: int = 2,
         containDir: bool = False,
         ctx: Optional[Ctx] = None,
+        threads: int = 3,
+        max_inflight: int = 0,
     ) -> str:
         """上传文件（分片上传）。
 
+        整个文件与各分片的MD5按上次服务端返回的分片大小一次读取算出，分片只在发送时再读取一次。
+        分片用 threads 个线程并发上传，max_inflight 限制同时上传的分片总字节数
+        （每个上传中的分片在内存中约占一个分片大小），至少允许一个分片。
+        分片请求失败时重新读取该分片并重试，ctx 被设置（其它分片失败或调用方取消）后
+        不再上传新的分片，也不再重试。
+
         Args:
-            file_info: 文件路径或字节数据
+            file_info: 文件路径、字节数据或可 seek 的二进制文件对象（见 tool.read）
             upload_name: 上传文件名
             parentFileID: 父目录ID，默认为0（根目录）
             duplicate: 重复文件处理方式，默认为2
             containDir: 是否包含目录，默认为False
             ctx: 上下文对象
+            threads: 同时上传的分片数，默认为3
+            max_inflight: 同时上传的分片总字节数上限，0表示只受 threads 限制
 
         Returns:
             上传文件的ID
-        """
-
-        def putSlice(sliceNo: int) -> Dict[str, Any]:
-            if ctx.isDone():
-                return
-
-            slice = tool.read(
-                file_info, ((sliceNo - 1) * sliceSize, min(sliceNo * sliceSize, file_size)), ctx
-            )
-            files = {
-                "preuploadID": (None, preuploadID),
-                "sliceNo": (None, sliceNo),
-                "sliceMD5": (None, slice.getMD5()),
-                "slice": (upload_name, slice),
-            }
-            a = API_INFO(urllib.parse.urljoin(server, "/upload/v2/file/slice"), "POST", 0)
-            res = self.super.request(a, files=files, headersCtl={"Content-Type": None})
-            return res
 
+        Raises:
+            Exception: 分片上传失败或 ctx 被设置时抛出 ctx 中记录的异常
+        """
         if ctx is None:
             ctx = Ctx()
-        file_size, file_etag = tool.size_md5(file_info)
+
+        def putSlice(sliceNo: int) -> None:
+            limit = ((sliceNo - 1) * sliceSize, min(sliceNo * sliceSize, file_size))
+            deadline = policy.start()
+            for retry_num in range(policy.retries + 1):
+                if ctx.isDone():
+                    return
+                try:
+                    with tool.read(source, limit, ctx) as reader:
+                        body: Union[bytes, memoryview, SectionFileReader, SectionDataReader]
+                        if sliceMD5s is None:
+                            body = reader.read()
+                            sliceMD5 = hashlib.md5(body).hexdigest()
+                        else:
+                            body, sliceMD5 = reader, sliceMD5s[sliceNo - 1]
+                        files = {
+                            "preuploadID": (None, preuploadID),
+                            "sliceNo": (None, sliceNo),
+                            "sliceMD5": (None, sliceMD5),
+                            "slice": (upload_name, body),
+                        }
+                        self.super.request(
+                            api, files=files, headersCtl={"Content-Type": None}, deadline=deadline
+                        )
+                    return
+                except ApiResponseFailed as e:
+                    # 网络异常已由 request 重试，这里只重试服务端拒绝的分片
+                    if retry_num == policy.retries:
+                        ctx.setInfo(e)
+                        return
+                    try:
+                        time.sleep(deadline.sleep_time(policy.delay(retry_num + 1), api.url))
+                    except DeadlineExceeded as err:
+                        ctx.setInfo(err)
+                        return
+                except Exception as e:
+                    ctx.setInfo(e)
+                    return
+
+        fileDigest = tool.digest(file_info, self.super._slice_size, cache=self.super._hash_cache)
+        file_size = fileDigest.size
         respCreate = self.create(
             parentFileID=parentFileID,
             filename=upload_name,
-            etag=file_etag,
+            etag=fileDigest.md5,
             size=file_size,
             duplicate=duplicate,
             containDir=containDir,
@@ -930,8 +1530,25 @@ class _UploadV2(_Bind):
             return respCreate["fileID"]
         preuploadID = respCreate["preuploadID"]
         sliceSize = respCreate["sliceSize"]
+        self.super._slice_size = sliceSize
+        # 分片大小与预先计算时相同则直接使用分片MD5，否则在读取分片发送时计算
+        sliceMD5s = fileDigest.slices(sliceSize)
         server = random.choice(respCreate["servers"])
+        if self.super._prewarm:
+            self.super.prewarm([server], self.super._prewarm)
+        policy = self.super._retry
+        api = API_INFO(urllib.parse.urljoin(server, "/upload/v2/file/slice"), "POST", 0)
         sliceNum = (file_size + sliceSize - 1) // sliceSize
-        for i in range(1, sliceNum + 1):
-            putSlice(i)
+        workers = min(threads, sliceNum)
+        if max_inflight:
+            workers = min(workers, max_inflight // sliceSize)
+        # 所有分片共享一个文件描述符，上传结束后关闭
+        with tool.shared(file_info) as source, concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(workers, 1)
+        ) as executor:
+            for i in range(1, sliceNum + 1):
+                executor.submit(putSlice, i)
+        if ctx.isDone():
+            self.super._uploadAbandoned(preuploadID)
+            raise ctx.info
         return self.complete(preuploadID)
@@ -0,0 +1,112 @@
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+
+def info_to_detail(info: Dict[str, Any]) -> Dict[str, Any]:
+    """将 file.infos 返回的文件信息转换为 file.detail 的字段格式。
+
+    infos 使用 fileId / parentFileId，detail 使用 fileID / parentFileID，其余字段保持不变。
+
+    Args:
+        info: infos 返回的单个文件信息
+
+    Returns:
+        detail 格式的文件信息
+    """
+    detail = dict(info)
+    if "fileId" in detail:
+        detail["fileID"] = detail.pop("fileId")
+    if "parentFileId" in detail:
+        detail["parentFileID"] = detail.pop("parentFileId")
+    return detail
+
+
+class DetailLoader:
+    """将并发的 file.detail 请求合并为 file.infos 批量请求。
+
+    第一个到达的调用方成为本批的发起者，等待 ``window`` 秒（或凑满 ``max_batch`` 个ID）
+    后用一次 infos 请求查询整批ID，其余调用方阻塞等待各自的结果。
+    同一ID正在等待或查询中时，新的调用直接复用同一个结果，不会重复查询。
+    infos 未返回的ID（如已删除）由各调用方单独回退到 detail 请求，以保留原有的错误信息。
+
+    Attributes:
+        window: 合并请求的等待窗口秒数
+        max_batch: 凑满多少个ID后立即发起请求
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[List[int]], List[Dict[str, Any]]],
+        fallback: Callable[[int], Dict[str, Any]],
+        window: float = 0.005,
+        max_batch: int = 100,
+    ) -> None:
+        """初始化合并加载器。
+
+        Args:
+            fetch: 批量查询函数，如 file.infos
+            fallback: 单个查询函数，如 file.detail，用于 fetch 未返回的ID
+            window: 合并请求的等待窗口秒数，默认为0.005
+            max_batch: 凑满多少个ID后立即发起请求，默认为100
+        """
+        self.window = window
+        self.max_batch = max_batch
+        self._fetch = fetch
+        self._fallback = fallback
+        self._lock = threading.Lock()
+        self._full = threading.Event()
+        self._pending: Dict[int, Future] = {}
+        self._inflight: Dict[int, Future] = {}
+        self._leader = False
+        self.batches = 0
+
+    def load(self, fileID: int) -> Dict[str, Any]:
+        """获取文件详细信息（与 file.detail 格式相同）。
+
+        Args:
+            fileID: 文件ID
+
+        Returns:
+            文件详细信息
+        """
+        lead = False
+        with self._lock:
+            future = self._pending.get(fileID) or self._inflight.get(fileID)
+            if future is None:
+                future = self._pending[fileID] = Future()
+                if len(self._pending) >= self.max_batch:
+                    self._full.set()
+                if not self._leader:
+                    self._leader = lead = True
+        if lead:
+            self._dispatch()
+        record: Optional[Dict[str, Any]] = future.result()
+        if record is None:
+            return self._fallback(fileID)
+        return dict(record)
+
+    def _dispatch(self) -> None:
+        """等待窗口结束后查询当前批次。"""
+        self._full.wait(self.window)
+        with self._lock:
+            batch, self._pending = self._pending, {}
+            self._inflight.update(batch)
+            self._leader = False
+            self._full.clear()
+            self.batches += 1
+        try:
+            records = {}
+            for info in self._fetch(list(batch)):
+                detail = info_to_detail(info)
+                records[detail.get("fileID")] = detail
+        except BaseException as e:
+            for future in batch.values():
+                future.set_exception(e)
+        else:
+            for fileID, future in batch.items():
+                future.set_result(records.get(fileID))
+        finally:
+            with self._lock:
+                for fileID in batch:
+                    self._inflight.pop(fileID, None)
@@ -0,0 +1,193 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .batch import info_to_detail
+from .type import Mutation
+
+# 缓存分区：detail 为 file.detail 结果，info 为 file.infos / list_v2 的文件信息，
+# list 为按父目录缓存的完整 list_v2 列表
+NAMESPACES = ("detail", "info", "list")
+
+# 新建文件的变更类型，其所在目录由事件直接给出，无需从缓存中查找
+CREATE_KINDS = ("mkdir", "upload")
+
+
+class MetaCache:
+    """文件元数据的读穿透缓存。
+
+    以 fileId 缓存 detail / infos 结果，以 parentFileId 缓存完整的 list_v2 列表，
+    每项在 ``ttl`` 秒后过期，超过容量时淘汰最久未使用的项。
+    通过 Access.set_cache 启用后，作为监听器接收同一个 Access 发出的变更事件，
+    自动失效被修改的文件及其所在目录的列表；无法确定所在目录时清空全部列表缓存。
+
+    Attributes:
+        ttl: 缓存有效期秒数
+        maxsize: detail / info 分区的最大条目数
+        list_maxsize: list 分区的最大目录数
+        generation: 失效计数，每次收到变更事件加一
+    """
+
+    def __init__(self, ttl: float = 60.0, maxsize: int = 10000, list_maxsize: int = 1000) -> None:
+        """初始化缓存。
+
+        Args:
+            ttl: 缓存有效期秒数，默认为60
+            maxsize: detail / info 分区的最大条目数，默认为10000
+            list_maxsize: list 分区的最大目录数，默认为1000
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.list_maxsize = list_maxsize
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._data: Dict[str, OrderedDict[int, Tuple[float, Any]]] = {
+            ns: OrderedDict() for ns in NAMESPACES
+        }
+        self._stats = {
+            ns: dict.fromkeys(("hits", "misses", "evictions", "invalidations"), 0)
+            for ns in NAMESPACES
+        }
+
+    def _get(self, ns: str, key: int) -> Any:
+        """读取缓存项并统计命中（调用方需持有锁）。"""
+        data = self._data[ns]
+        item = data.get(key)
+        if item is None or item[0] < time.monotonic():
+            if item is not None:
+                del data[key]
+            self._stats[ns]["misses"] += 1
+            return None
+        data.move_to_end(key)
+        self._stats[ns]["hits"] += 1
+        return item[1]
+
+    def _put(self, ns: str, key: int, value: Any) -> None:
+        """写入缓存项并按LRU淘汰（调用方需持有锁）。"""
+        data = self._data[ns]
+        data[key] = (time.monotonic() + self.ttl, value)
+        data.move_to_end(key)
+        maxsize = self.list_maxsize if ns == "list" else self.maxsize
+        while len(data) > maxsize:
+            data.popitem(last=False)
+            self._stats[ns]["evictions"] += 1
+
+    def get_detail(self, fileID: int) -> Optional[Dict[str, Any]]:
+        """读取 detail 格式的文件信息，detail 未命中时尝试由 info 转换。
+
+        Args:
+            fileID: 文件ID
+
+        Returns:
+            文件信息副本，未命中返回None
+        """
+        with self._lock:
+            record = self._get("detail", fileID)
+            if record is not None:
+                return dict(record)
+            info = self._get("info", fileID)
+        return info_to_detail(info) if info is not None else None
+
+    def put_detail(self, record: Dict[str, Any]) -> None:
+        """写入 detail 结果。"""
+        with self._lock:
+            self._put("detail", record["fileID"], dict(record))
+
+    def get_infos(self, fileIds: Iterable[int]) -> Tuple[Dict[int, Dict[str, Any]], List[int]]:
+        """批量读取 infos 格式的文件信息。
+
+        Args:
+            fileIds: 文件ID列表
+
+        Returns:
+            (命中的 {fileId: 文件信息}, 未命中的ID列表) 元组
+        """
+        found, missing = {}, []
+        with self._lock:
+            for fileId in fileIds:
+                info = self._get("info", fileId)
+                if info is None:
+                    missing.append(fileId)
+                else:
+                    found[fileId] = dict(info)
+        return found, missing
+
+    def put_infos(self, infos: Iterable[Dict[str, Any]]) -> None:
+        """写入 infos / list_v2 格式的文件信息。"""
+        with self._lock:
+            for info in infos:
+                self._put("info", info["fileId"], dict(info))
+
+    def get_list(self, parentFileId: int) -> Optional[List[Dict[str, Any]]]:
+        """读取目录的完整 list_v2 列表（含回收站中的项）。
+
+        Args:
+            parentFileId: 目录ID
+
+        Returns:
+            文件信息列表，未命中返回None
+        """
+        with self._lock:
+            items = self._get("list", parentFileId)
+        return [dict(i) for i in items] if items is not None else None
+
+    def put_list(self, parentFileId: int, items: List[Dict[str, Any]], generation: int) -> None:
+        """写入目录的完整 list_v2 列表。
+
+        列出期间若收到过变更事件（generation 已变化），列表可能已过时，不写入。
+
+        Args:
+            parentFileId: 目录ID
+            items: 完整的文件信息列表
+            generation: 开始列出时的 generation
+        """
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._put("list", parentFileId, [dict(i) for i in items])
+            for info in items:
+                self._put("info", info["fileId"], dict(info))
+
+    def invalidate(self, mutation: Mutation) -> None:
+        """处理变更事件，失效相关的文件与目录列表。
+
+        Args:
+            mutation: 变更事件
+        """
+        with self._lock:
+            self.generation += 1
+            unknown = mutation.parentIDs is None
+            parents = set(mutation.parentIDs or ())
+            for fileID in mutation.fileIDs:
+                found = False
+                for ns, key in (("detail", "parentFileID"), ("info", "parentFileId")):
+                    item = self._data[ns].pop(fileID, None)
+                    if item is not None:
+                        found = True
+                        self._stats[ns]["invalidations"] += 1
+                        parents.add(item[1].get(key))
+                if not found and mutation.kind not in CREATE_KINDS:
+                    unknown = True
+                parents.add(fileID)
+            lists = self._data["list"]
+            targets = list(lists) if unknown else [p for p in parents if p in lists]
+            for parentFileId in targets:
+                del lists[parentFileId]
+            self._stats["list"]["invalidations"] += len(targets)
+
+    def clear(self) -> None:
+        """清空缓存（保留统计）。"""
+        with self._lock:
+            self.generation += 1
+            for data in self._data.values():
+                data.clear()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """获取缓存统计。
+
+        Returns:
+            以分区名为键的字典，包含 hits、misses、evictions、invalidations、size
+        """
+        with self._lock:
+            return {ns: {**self._stats[ns], "size": len(self._data[ns])} for ns in NAMESPACES}
@@ -0,0 +1,175 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from .type import FileDigest
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS digests (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    md5 TEXT NOT NULL,
+    sliceSize INTEGER NOT NULL,
+    sliceMD5s BLOB NOT NULL,
+    used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS digests_used ON digests (used);
+"""
+
+# 修改时间距今不足此纳秒数的文件不写入缓存：同一时间戳内再次修改无法通过 stat 察觉
+RACY_NS = 2_000_000_000
+
+
+class HashCache:
+    """持久化的文件摘要缓存。
+
+    以文件的绝对路径为键，保存 tool.digest 计算出的整体MD5与分片MD5，
+    同时记录文件大小、修改时间（纳秒）与 inode，读取时 stat 发生变化的记录自动失效。
+    超过 max_entries 条时淘汰最久未使用的记录。多个线程可以共享同一个缓存。
+
+    Attributes:
+        database: 数据库文件路径，":memory:" 表示内存数据库
+        max_entries: 最多保存的文件数
+    """
+
+    def __init__(self, database: str, max_entries: int = 100000) -> None:
+        """打开缓存。
+
+        Args:
+            database: 数据库文件路径，":memory:" 表示内存数据库
+            max_entries: 最多保存的文件数，默认为100000
+        """
+        self.database = database
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(database, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._stats: Dict[str, int] = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0}
+        # 记录数的运行计数，避免每次写入都 COUNT(*) 全表；淘汰前会重新统计以纠正其它连接的写入
+        self._count: int = self._db.execute("SELECT COUNT(*) FROM digests").fetchone()[0]
+
+    def close(self) -> None:
+        """关闭数据库。"""
+        self._db.close()
+
+    def __enter__(self) -> "HashCache":
+        """进入上下文管理器。"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        """退出上下文管理器。"""
+        self.close()
+
+    def __len__(self) -> int:
+        """缓存的文件数。"""
+        with self._lock:
+            return self._count
+
+    def get(
+        self, path: str, sliceSize: int = 0, stat: Optional[os.stat_result] = None
+    ) -> Optional[FileDigest]:
+        """读取文件摘要。
+
+        Args:
+            path: 文件路径
+            sliceSize: 需要的分片大小，缓存中的分片大小不同时只返回整体MD5
+            stat: 文件的 os.stat 结果，默认现场获取
+
+        Returns:
+            FileDigest，未缓存或文件已变化时返回None
+        """
+        path = os.path.abspath(path)
+        stat = stat or os.stat(path)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT size, mtime_ns, inode, md5, sliceSize, sliceMD5s FROM digests "
+                "WHERE path = ?",
+                (path,),
+            ).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            if row[:3] != (stat.st_size, stat.st_mtime_ns, stat.st_ino):
+                self._db.execute("DELETE FROM digests WHERE path = ?", (path,))
+                self._count -= 1
+                self._stats["misses"] += 1
+                self._stats["invalidations"] += 1
+                return None
+            self._db.execute("UPDATE digests SET used = ? WHERE path = ?", (time.time(), path))
+            self._stats["hits"] += 1
+        md5, cachedSize, packed = row[3:]
+        if sliceSize != cachedSize:
+            return FileDigest(stat.st_size, md5)
+        sliceMD5s = [packed[i : i + 16].hex() for i in range(0, len(packed), 16)]
+        return FileDigest(stat.st_size, md5, cachedSize, sliceMD5s)
+
+    def put(self, path: str, digest: FileDigest, stat: os.stat_result) -> bool:
+        """写入文件摘要。
+
+        计算摘要后文件的 stat 发生变化，或文件刚被修改过（同一时间戳内的修改无法察觉）时不写入。
+
+        Args:
+            path: 文件路径
+            digest: 文件摘要
+            stat: 开始计算摘要前的 os.stat 结果
+
+        Returns:
+            是否写入
+        """
+        path = os.path.abspath(path)
+        current = os.stat(path)
+        key = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        if key != (current.st_size, current.st_mtime_ns, current.st_ino):
+            return False
+        if time.time_ns() - stat.st_mtime_ns < RACY_NS:
+            return False
+        packed = b"".join(bytes.fromhex(md5) for md5 in digest.sliceMD5s)
+        with self._lock:
+            exists = self._db.execute("SELECT 1 FROM digests WHERE path = ?", (path,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, *key, digest.md5, digest.sliceSize, packed, time.time()),
+            )
+            if exists is None:
+                self._count += 1
+            if self._count > self.max_entries:
+                self._count = self._db.execute("SELECT COUNT(*) FROM digests").fetchone()[0]
+                excess = self._count - self.max_entries
+                if excess > 0:
+                    self._db.execute(
+                        "DELETE FROM digests WHERE path IN "
+                        "(SELECT path FROM digests ORDER BY used LIMIT ?)",
+                        (excess,),
+                    )
+                    self._count -= excess
+                    self._stats["evictions"] += excess
+        return True
+
+    def discard(self, path: str) -> None:
+        """删除文件的缓存记录。"""
+        with self._lock:
+            cursor = self._db.execute(
+                "DELETE FROM digests WHERE path = ?", (os.path.abspath(path),)
+            )
+            self._count -= cursor.rowcount
+
+    def clear(self) -> None:
+        """清空缓存（保留统计）。"""
+        with self._lock:
+            self._db.execute("DELETE FROM digests")
+            self._count = 0
+
+    def stats(self) -> Dict[str, int]:
+        """获取缓存统计。
+
+        Returns:
+            包含 hits、misses、invalidations、evictions、size 的字典
+        """
+        with self._lock:
+            return {**self._stats, "size": self._count}
@@ -0,0 +1,331 @@
+import asyncio
+import contextlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class TokenBucket:
+    """令牌桶限流器。
+
+    按 ``rate`` 的速度匀速补充令牌，最多积攒 ``capacity`` 个令牌用于突发请求。
+    获取令牌时在锁内预约（令牌数允许为负），随后在锁外等待，不会创建任何额外线程，
+    多个线程共享同一个桶时按预约顺序依次放行。
+
+    Attributes:
+        rate: 每秒补充的令牌数，0表示不限流
+        capacity: 令牌桶容量（突发上限）
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        """初始化令牌桶。
+
+        Args:
+            rate: 每秒补充的令牌数，0表示不限流
+            capacity: 令牌桶容量，默认为 max(rate, 1)
+
+        Raises:
+            ValueError: 当 rate 或 capacity 为负数时抛出
+        """
+        if rate < 0:
+            raise ValueError("rate 不能为负数")
+        if capacity is None:
+            capacity = max(rate, 1)
+        if capacity <= 0:
+            raise ValueError("capacity 必须大于 0")
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = self.capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        """按流逝时间补充令牌（调用方需持有锁）。"""
+        if now > self._stamp:
+            self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+
+    def reserve(self, tokens: float = 1) -> float:
+        """预约令牌。
+
+        Args:
+            tokens: 需要的令牌数
+
+        Returns:
+            调用方在发出请求前需要等待的秒数
+        """
+        if self.rate == 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """非阻塞获取令牌。
+
+        Args:
+            tokens: 需要的令牌数
+
+        Returns:
+            获取成功返回True，令牌不足返回False（不会预约）
+        """
+        if self.rate == 0:
+            return True
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1) -> float:
+        """阻塞获取令牌。
+
+        Args:
+            tokens: 需要的令牌数
+
+        Returns:
+            实际等待的秒数
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: float = 1) -> float:
+        """异步获取令牌，等待期间让出事件循环。
+
+        Args:
+            tokens: 需要的令牌数
+
+        Returns:
+            实际等待的秒数
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def set_rate(self, rate: float, capacity: Optional[float] = None) -> None:
+        """调整限流速率。
+
+        Args:
+            rate: 新的每秒令牌数，0表示不限流
+            capacity: 新的桶容量，默认为 max(rate, 1)
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+            self.capacity = float(capacity if capacity is not None else max(rate, 1))
+            self._tokens = min(self._tokens, self.capacity)
+            if self.rate == 0:
+                self._tokens = self.capacity
+
+
+class AIMDController:
+    """基于 AIMD（加性增、乘性减）的自适应限流控制器。
+
+    请求因限流而等待且最终成功时，按 ``increase`` 每秒的速度逐步提高端点的 QPS，
+    收到 429 时将 QPS 乘以 ``decrease`` 并返回带抖动的退避时间，从而逐步逼近服务端
+    真实可承受的速率。
+    原本不限流（qps=0）的端点在第一次收到 429 时，以观测到的实际速率为起点开始限流。
+
+    Attributes:
+        increase: 持续成功时每秒增加的QPS
+        decrease: 收到429时的速率缩减系数
+        min_rate: QPS下限
+        max_rate: QPS上限
+        backoff: 收到429后的基础退避秒数
+        jitter: 退避时间的随机抖动比例
+        path: 学习结果的持久化路径，为空表示不持久化
+    """
+
+    def __init__(
+        self,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        min_rate: float = 1.0,
+        max_rate: float = 100.0,
+        backoff: float = 0.5,
+        jitter: float = 0.5,
+        path: str = "",
+        save_interval: float = 30.0,
+    ) -> None:
+        """初始化控制器。
+
+        Args:
+            increase: 持续成功时每秒增加的QPS，默认为1
+            decrease: 收到429时的速率缩减系数，默认为0.5
+            min_rate: QPS下限，默认为1
+            max_rate: QPS上限，默认为100
+            backoff: 收到429后的基础退避秒数，默认为0.5
+            jitter: 退避时间的随机抖动比例，默认为0.5
+            path: 学习结果的持久化路径（JSON），存在时自动加载
+            save_interval: 两次自动持久化之间的最小间隔秒数
+        """
+        if not 0 < decrease < 1:
+            raise ValueError("decrease 必须在 (0, 1) 区间内")
+        self.increase = increase
+        self.decrease = decrease
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.backoff = backoff
+        self.jitter = jitter
+        self.path = path
+        self.save_interval = save_interval
+        self._rates: Dict[str, float] = {}
+        self._origin: Dict[str, Tuple[Any, float, float]] = {}
+        self._windows: Dict[str, List[float]] = {}
+        # 首次学习到的速率立即保存
+        self._saved = float("-inf")
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load(path)
+
+    @staticmethod
+    def key(api: Any) -> str:
+        """端点的唯一标识。"""
+        return f"{api.method} {api.url}"
+
+    def attach(self, api: Any) -> None:
+        """将已学习的速率应用到端点（请求前调用）。
+
+        Args:
+            api: API信息对象
+        """
+        key = self.key(api)
+        rate = self._rates.get(key)
+        if rate is not None and api.limiter.rate != rate:
+            with self._lock:
+                self._remember(key, api)
+                api.limiter.set_rate(rate)
+
+    def on_success(self, api: Any, waited: float = 0.0) -> None:
+        """请求成功时调用，加性提高速率。
+
+        只有本次请求确实在令牌桶上等待过（即限流成为瓶颈）时才会提速，
+        避免空闲端点的速率无限上涨。
+
+        Args:
+            api: API信息对象
+            waited: 本次请求等待令牌的秒数
+        """
+        key = self.key(api)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.setdefault(key, [now, 0, 0.0])
+            window[1] += 1
+            if now - window[0] >= 1:
+                window[2] = window[1] / (now - window[0])
+                window[0], window[1] = now, 0
+            rate = api.limiter.rate
+            if rate == 0 or waited <= 0:
+                return
+            self._remember(key, api)
+            rate = min(self.max_rate, rate + self.increase / rate)
+            self._rates[key] = rate
+            api.limiter.set_rate(rate)
+            save = self._due(now)
+        if save:
+            self._autosave()
+
+    def on_throttle(self, api: Any) -> float:
+        """收到429时调用，乘性降低速率。
+
+        Args:
+            api: API信息对象
+
+        Returns:
+            重试前应等待的秒数（带随机抖动）
+        """
+        key = self.key(api)
+        with self._lock:
+            self._remember(key, api)
+            rate = api.limiter.rate
+            if rate == 0:
+                window = self._windows.get(key)
+                rate = max(window[1], window[2]) if window else self.min_rate
+            rate = min(self.max_rate, max(self.min_rate, rate * self.decrease))
+            self._rates[key] = rate
+            api.limiter.set_rate(rate)
+            save = self._due(time.monotonic())
+        if save:
+            self._autosave()
+        return self.backoff * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _due(self, now: float) -> bool:
+        """是否应自动持久化，是则记录本次时间（调用方需持有锁）。"""
+        if not self.path or now - self._saved < self.save_interval:
+            return False
+        self._saved = now
+        return True
+
+    def _autosave(self) -> None:
+        """自动持久化，写入失败不影响请求。"""
+        with contextlib.suppress(OSError):
+            self.save()
+
+    def _remember(self, key: str, api: Any) -> None:
+        """记录端点的原始限流配置（调用方需持有锁）。"""
+        if key not in self._origin:
+            self._origin[key] = (api, api.limiter.rate, api.limiter.capacity)
+
+    def limits(self) -> Dict[str, float]:
+        """获取已学习的各端点QPS。
+
+        Returns:
+            以 "METHOD URL" 为键、QPS 为值的字典
+        """
+        with self._lock:
+            return dict(self._rates)
+
+    def reset(self) -> None:
+        """清空学习结果并恢复各端点的原始限流配置。"""
+        with self._lock:
+            for api, rate, capacity in self._origin.values():
+                api.limiter.set_rate(rate, capacity)
+            self._rates.clear()
+            self._origin.clear()
+            self._windows.clear()
+
+    def save(self, path: str = "") -> None:
+        """持久化学习结果。
+
+        Args:
+            path: 保存路径，默认为初始化时的 path
+        """
+        path = path or self.path
+        if not path:
+            return
+        with self._save_lock:
+            data = self.limits()
+            fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(os.path.abspath(path)))
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                os.replace(tmp, path)
+            except BaseException:
+                with contextlib.suppress(OSError):
+                    os.unlink(tmp)
+                raise
+            self._saved = time.monotonic()
+
+    def load(self, path: str = "") -> None:
+        """加载学习结果，之后的请求会通过 attach 应用到对应端点。
+
+        Args:
+            path: 加载路径，默认为初始化时的 path
+        """
+        with open(path or self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        with self._lock:
+            self._rates.update({k: float(v) for k, v in data.items()})
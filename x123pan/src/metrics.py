@@ -0,0 +1,296 @@
+import bisect
+import threading
+import urllib.parse
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# 直方图默认桶边界（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# 计数器名称及说明
+COUNTERS = {
+    "requests": "请求次数（含重试）",
+    "errors": "请求异常或接口返回失败的次数",
+    "retries": "重试次数",
+    "throttled": "收到429的次数",
+    "token_refreshes": "刷新访问令牌的次数",
+    "bytes_sent": "发送的字节数",
+    "bytes_received": "接收的字节数",
+}
+
+# 直方图名称及说明
+HISTOGRAMS = {
+    "latency": "请求耗时（秒）",
+    "limiter_wait": "等待QPS限流的耗时（秒）",
+}
+
+
+class Histogram:
+    """累积直方图。
+
+    Attributes:
+        buckets: 桶上界
+        counts: 每个桶的计数（最后一个为 +Inf）
+        sum: 观测值总和
+        count: 观测次数
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        """初始化直方图。
+
+        Args:
+            buckets: 升序排列的桶上界
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """记录一次观测值。"""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """按桶上界估算分位数。
+
+        Args:
+            q: 分位点，0 到 1 之间
+
+        Returns:
+            分位数估计值，没有观测值时返回0
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        total = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            total += n
+            if total >= rank:
+                return bound if bound != float("inf") else self.buckets[-1]
+        return self.buckets[-1]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """获取直方图快照。"""
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": dict(zip(self.buckets + (float("inf"),), self.counts)),
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+        }
+
+
+class Metrics:
+    """按端点统计的请求指标。
+
+    记录每个端点的请求数、失败数、重试、429、令牌刷新、收发字节数、请求耗时与限流等待耗时的直方图，
+    以及正在进行中的请求数。端点以 (method, URL路径) 区分。
+
+    指标可以通过三种方式输出：
+        - add_sink 注册回调，每次请求结束时收到事件字典
+        - prometheus 导出 Prometheus 文本格式
+        - report 启动后台线程定期回调 snapshot 快照
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS, prefix: str = "x123pan") -> None:
+        """初始化指标对象。
+
+        Args:
+            buckets: 直方图桶上界（秒）
+            prefix: Prometheus 指标名前缀
+        """
+        self.buckets = tuple(buckets)
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, str], Dict[str, float]] = {}
+        self._histograms: Dict[Tuple[str, str], Dict[str, Histogram]] = {}
+        self._in_flight: Dict[Tuple[str, str], int] = {}
+        self._sinks: List[Callable[[Dict[str, Any]], None]] = []
+
+    @staticmethod
+    def endpoint(method: str, url: str) -> Tuple[str, str]:
+        """将请求方法和URL转换为端点标识。"""
+        return method.upper(), urllib.parse.urlsplit(url).path or "/"
+
+    def _entry(self, key: Tuple[str, str]) -> Tuple[Dict[str, float], Dict[str, Histogram]]:
+        """获取端点的计数器和直方图（调用方需持有锁）。"""
+        counters = self._counters.get(key)
+        if counters is None:
+            counters = self._counters[key] = dict.fromkeys(COUNTERS, 0)
+            self._histograms[key] = {name: Histogram(self.buckets) for name in HISTOGRAMS}
+        return counters, self._histograms[key]
+
+    def inc(self, method: str, url: str, name: str, value: float = 1) -> None:
+        """累加计数器。
+
+        Args:
+            method: 请求方法
+            url: 请求URL
+            name: 计数器名称，见 COUNTERS
+            value: 增量
+        """
+        key = self.endpoint(method, url)
+        with self._lock:
+            self._entry(key)[0][name] += value
+
+    def begin(self, method: str, url: str) -> None:
+        """标记请求开始（进行中请求数加一）。"""
+        key = self.endpoint(method, url)
+        with self._lock:
+            self._in_flight[key] = self._in_flight.get(key, 0) + 1
+
+    def end(
+        self,
+        method: str,
+        url: str,
+        latency: float,
+        wait: float = 0.0,
+        sent: int = 0,
+        received: int = 0,
+        error: bool = False,
+    ) -> None:
+        """标记请求结束并记录指标。
+
+        Args:
+            method: 请求方法
+            url: 请求URL
+            latency: 请求耗时（秒）
+            wait: 等待限流的耗时（秒）
+            sent: 发送的字节数
+            received: 接收的字节数
+            error: 请求是否失败
+        """
+        key = self.endpoint(method, url)
+        with self._lock:
+            self._in_flight[key] = max(self._in_flight.get(key, 0) - 1, 0)
+            counters, histograms = self._entry(key)
+            counters["requests"] += 1
+            counters["errors"] += error
+            counters["bytes_sent"] += sent
+            counters["bytes_received"] += received
+            histograms["latency"].observe(latency)
+            histograms["limiter_wait"].observe(wait)
+            sinks = list(self._sinks)
+        if sinks:
+            event = {
+                "method": key[0],
+                "endpoint": key[1],
+                "latency": latency,
+                "wait": wait,
+                "sent": sent,
+                "received": received,
+                "error": error,
+            }
+            for sink in sinks:
+                sink(event)
+
+    def add_sink(self, sink: Callable[[Dict[str, Any]], None]) -> None:
+        """注册事件回调，每次请求结束时调用。
+
+        Args:
+            sink: 接收事件字典的回调函数
+        """
+        with self._lock:
+            self._sinks.append(sink)
+
+    def remove_sink(self, sink: Callable[[Dict[str, Any]], None]) -> None:
+        """移除事件回调。"""
+        with self._lock:
+            self._sinks.remove(sink)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """获取指标快照。
+
+        Returns:
+            以 "METHOD /path" 为键的字典，包含计数器、in_flight 以及直方图快照
+        """
+        with self._lock:
+            result = {}
+            for key, counters in self._counters.items():
+                item: Dict[str, Any] = dict(counters)
+                item["in_flight"] = self._in_flight.get(key, 0)
+                for name, histogram in self._histograms[key].items():
+                    item[name] = histogram.snapshot()
+                result[f"{key[0]} {key[1]}"] = item
+            return result
+
+    def reset(self) -> None:
+        """清空已记录的指标（保留进行中请求数与回调）。"""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def prometheus(self) -> str:
+        """导出 Prometheus 文本格式。
+
+        Returns:
+            Prometheus exposition 格式的指标文本
+        """
+        lines = []
+        with self._lock:
+            for name, doc in COUNTERS.items():
+                metric = f"{self.prefix}_{name}_total"
+                lines += [f"# HELP {metric} {doc}", f"# TYPE {metric} counter"]
+                for key, counters in self._counters.items():
+                    lines.append(f"{metric}{{{self._labels(key)}}} {counters[name]:g}")
+            metric = f"{self.prefix}_in_flight"
+            lines += [f"# HELP {metric} 进行中的请求数", f"# TYPE {metric} gauge"]
+            for key, value in self._in_flight.items():
+                lines.append(f"{metric}{{{self._labels(key)}}} {value}")
+            for name, doc in HISTOGRAMS.items():
+                metric = f"{self.prefix}_{name}_seconds"
+                lines += [f"# HELP {metric} {doc}", f"# TYPE {metric} histogram"]
+                for key, histograms in self._histograms.items():
+                    histogram, labels = histograms[name], self._labels(key)
+                    total = 0
+                    for bound, n in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                        total += n
+                        le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                        lines.append(f'{metric}_bucket{{{labels},le="{le}"}} {total}')
+                    lines.append(f"{metric}_sum{{{labels}}} {histogram.sum:g}")
+                    lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _labels(key: Tuple[str, str]) -> str:
+        """生成 Prometheus 标签。"""
+        return f'method="{key[0]}",endpoint="{key[1]}"'
+
+    def report(
+        self, interval: float, callback: Callable[[Dict[str, Dict[str, Any]]], None]
+    ) -> threading.Event:
+        """启动后台线程，每隔 interval 秒回调一次指标快照。
+
+        Args:
+            interval: 回调间隔秒数
+            callback: 接收 snapshot 结果的回调函数
+
+        Returns:
+            停止事件，调用其 set() 方法停止定期回调
+        """
+        stop = threading.Event()
+
+        def loop() -> None:
+            while not stop.wait(interval):
+                callback(self.snapshot())
+
+        threading.Thread(target=loop, name="x123pan-metrics", daemon=True).start()
+        return stop
+
+
+def body_size(body: Optional[Any]) -> int:
+    """估算请求体字节数（无法确定时返回0）。"""
+    if body is None:
+        return 0
+    if isinstance(body, (bytes, bytearray, str)):
+        return len(body)
+    if isinstance(body, memoryview):
+        return body.nbytes
+    limit = getattr(body, "limit", None)
+    if isinstance(limit, tuple):
+        return limit[1] - limit[0]
+    try:
+        return len(body)
+    except TypeError:
+        return 0
@@ -0,0 +1,168 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from requests.adapters import HTTPAdapter
+from urllib3 import PoolManager
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+class PoolStats:
+    """连接池统计信息。
+
+    按主机统计连接的取用次数、新建连接数以及因连接池耗尽而等待的次数和时长。
+    """
+
+    def __init__(self) -> None:
+        """初始化统计对象。"""
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, Dict[str, float]] = {}
+
+    def add(self, host: str, key: str, value: float = 1) -> None:
+        """累加指定主机的统计项。
+
+        Args:
+            host: 主机名
+            key: 统计项名称
+            value: 增量
+        """
+        with self._lock:
+            counter = self._hosts.setdefault(
+                host, {"requests": 0, "new": 0, "waits": 0, "wait_time": 0.0}
+            )
+            counter[key] += value
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """获取统计快照。
+
+        Returns:
+            以主机名为键的统计字典，包含 requests（取用次数）、new（新建连接数）、
+            hits（复用连接数）、waits（等待次数）、wait_time（等待总秒数）
+        """
+        with self._lock:
+            result = {}
+            for host, counter in self._hosts.items():
+                item = dict(counter)
+                item["hits"] = max(item["requests"] - item["new"], 0)
+                result[host] = item
+            return result
+
+    def reset(self) -> None:
+        """清空统计。"""
+        with self._lock:
+            self._hosts.clear()
+
+
+class _StatsPoolMixin:
+    """为 urllib3 连接池增加统计的混入类。"""
+
+    stats: Optional[PoolStats] = None
+    host: str
+    block: bool
+    pool: Any
+
+    def _new_conn(self) -> Any:
+        if self.stats is not None:
+            self.stats.add(self.host, "new")
+        return super()._new_conn()  # type: ignore[misc]
+
+    def _get_conn(self, timeout: Optional[float] = None) -> Any:
+        if self.stats is None:
+            return super()._get_conn(timeout)  # type: ignore[misc]
+        empty = self.block and self.pool is not None and self.pool.empty()
+        begin = time.monotonic()
+        conn = super()._get_conn(timeout)  # type: ignore[misc]
+        self.stats.add(self.host, "requests")
+        if empty:
+            self.stats.add(self.host, "waits")
+            self.stats.add(self.host, "wait_time", time.monotonic() - begin)
+        return conn
+
+
+class _StatsHTTPConnectionPool(_StatsPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class _StatsHTTPSConnectionPool(_StatsPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class _PoolManager(PoolManager):
+    """支持按主机设置连接池大小并记录统计信息的 PoolManager。"""
+
+    def __init__(
+        self, *args: Any, stats: PoolStats, host_maxsize: Dict[str, int], **kwargs: Any
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.stats = stats
+        self.host_maxsize = host_maxsize
+        self.pool_classes_by_scheme = {
+            "http": _StatsHTTPConnectionPool,
+            "https": _StatsHTTPSConnectionPool,
+        }
+
+    def _new_pool(
+        self,
+        scheme: str,
+        host: str,
+        port: int,
+        request_context: Optional[Dict[str, Any]] = None,
+    ) -> HTTPConnectionPool:
+        if request_context is None:
+            request_context = self.connection_pool_kw.copy()
+        if host in self.host_maxsize:
+            request_context = {**request_context, "maxsize": self.host_maxsize[host]}
+        pool = super()._new_pool(scheme, host, port, request_context)
+        pool.stats = self.stats  # type: ignore[attr-defined]
+        return pool
+
+
+class PooledAdapter(HTTPAdapter):
+    """带统计信息、支持按主机配置连接池大小的 HTTPAdapter。
+
+    Attributes:
+        stats: 连接池统计信息
+        host_maxsize: 主机名到连接池大小的映射，未配置的主机使用 pool_maxsize
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        host_maxsize: Optional[Dict[str, int]] = None,
+        pool_block: bool = False,
+        **kwargs: Any,
+    ) -> None:
+        """初始化适配器。
+
+        Args:
+            pool_connections: 缓存的主机连接池数量
+            pool_maxsize: 每个主机连接池默认保留的连接数
+            host_maxsize: 按主机名单独设置的连接池大小
+            pool_block: 连接池耗尽时是否阻塞等待，而不是临时新建连接
+            **kwargs: 传递给 HTTPAdapter 的其它参数，如 max_retries
+        """
+        self.stats = PoolStats()
+        self.host_maxsize = dict(host_maxsize or {})
+        super().__init__(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            **kwargs,
+        )
+
+    def init_poolmanager(
+        self, connections: int, maxsize: int, block: bool = False, **pool_kwargs: Any
+    ) -> None:
+        """初始化连接池管理器。"""
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = _PoolManager(
+            num_pools=connections,
+            maxsize=maxsize,
+            block=block,
+            stats=self.stats,
+            host_maxsize=self.host_maxsize,
+            **pool_kwargs,
+        )
@@ -0,0 +1,324 @@
+import functools
+import sys
+from array import array
+from enum import IntEnum
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+
+@functools.lru_cache(maxsize=None)
+def _numpy() -> Any:
+    """按需导入可选依赖 numpy（x123pan[numpy]），未安装时返回None。"""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+class FileType(IntEnum):
+    """文件类型。"""
+
+    FILE = 0
+    DIR = 1
+
+
+class FileStatus(IntEnum):
+    """文件审核状态，大于等于 100 为审核驳回。"""
+
+    NORMAL = 0
+    REJECTED = 100
+
+
+# 紧凑记录保留的字段，与 list_v2 / infos 返回的字段名一致
+FIELDS = (
+    "fileId",
+    "parentFileId",
+    "filename",
+    "type",
+    "size",
+    "etag",
+    "status",
+    "category",
+    "trashed",
+)
+
+# 整数列及其 array 类型码
+INT_COLUMNS = {
+    "fileId": "q",
+    "parentFileId": "q",
+    "size": "q",
+    "type": "b",
+    "status": "h",
+    "category": "h",
+    "trashed": "b",
+}
+
+
+def _intern(value: Optional[str]) -> str:
+    """驻留字符串，大量重复的文件名与 etag 只保留一份。"""
+    return sys.intern(value) if value else ""
+
+
+class FileRecord:
+    """紧凑的文件信息记录。
+
+    使用 ``__slots__`` 保存 FIELDS 中的字段，文件名与 etag 驻留，type 为 FileType。
+    同时兼容 list_v2 / infos 的 fileId 与 detail / V1 列表的 fileID 字段名，
+    其余字段（如 createAt）不保留。可以像字典一样用 ``record["filename"]`` 读取字段。
+    """
+
+    __slots__ = FIELDS
+
+    def __init__(
+        self,
+        fileId: int,
+        parentFileId: int = 0,
+        filename: str = "",
+        type: int = 0,
+        size: int = 0,
+        etag: str = "",
+        status: int = 0,
+        category: int = 0,
+        trashed: int = 0,
+    ) -> None:
+        """初始化记录。"""
+        self.fileId = fileId
+        self.parentFileId = parentFileId
+        self.filename = _intern(filename)
+        self.type = FileType(type)
+        self.size = size
+        self.etag = _intern(etag)
+        self.status = status
+        self.category = category
+        self.trashed = int(trashed)
+
+    @classmethod
+    def from_dict(cls, info: Dict[str, Any]) -> "FileRecord":
+        """由接口返回的文件信息字典创建记录。
+
+        Args:
+            info: list_v2 / infos / detail / V1 列表返回的单个文件信息
+
+        Returns:
+            FileRecord对象
+        """
+        fileId = info.get("fileId")
+        if fileId is None:
+            fileId = info["fileID"]
+        parentFileId = info.get("parentFileId")
+        if parentFileId is None:
+            parentFileId = info.get("parentFileID", 0)
+        return cls(
+            fileId,
+            parentFileId,
+            info.get("filename", ""),
+            info.get("type", 0),
+            info.get("size") or 0,
+            info.get("etag") or "",
+            info.get("status") or 0,
+            info.get("category") or 0,
+            info.get("trashed") or 0,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为 list_v2 格式的字典。"""
+        info = {k: getattr(self, k) for k in FIELDS}
+        info["type"] = int(self.type)
+        return info
+
+    @property
+    def is_dir(self) -> bool:
+        """是否为目录。"""
+        return self.type == FileType.DIR
+
+    @property
+    def rejected(self) -> bool:
+        """是否审核驳回。"""
+        return self.status >= FileStatus.REJECTED
+
+    def __getitem__(self, key: str) -> Any:
+        """按字段名读取，兼容字典用法。"""
+        if key not in FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __eq__(self, other: object) -> bool:
+        """字段全部相同时相等。"""
+        if not isinstance(other, FileRecord):
+            return NotImplemented
+        return all(getattr(self, k) == getattr(other, k) for k in FIELDS)
+
+    def __repr__(self) -> str:
+        """返回记录的字符串表示。"""
+        return (
+            f"FileRecord(fileId={self.fileId}, filename={self.filename!r}, type={self.type.name})"
+        )
+
+
+class FileTable:
+    """按列存储的文件信息表。
+
+    整数字段保存在 ``array.array`` 中（每个文件每列 1~8 字节），文件名保存为驻留字符串列表，
+    32位十六进制的 etag 以16字节二进制连续保存（其它格式的 etag 单独记录）。
+    整数列支持缓冲区协议，安装 numpy 后可以通过 ``column`` / ``to_numpy`` 零拷贝使用，
+    ``filter`` 也会改用 numpy 向量化计算。
+    """
+
+    def __init__(self, items: Iterable[Union[Dict[str, Any], FileRecord]] = ()) -> None:
+        """初始化文件表。
+
+        Args:
+            items: 文件信息字典或 FileRecord 的可迭代对象
+        """
+        self._ints = {name: array(code) for name, code in INT_COLUMNS.items()}
+        self._names: List[str] = []
+        self._etags = bytearray()
+        self._odd_etags: Dict[int, str] = {}
+        self.extend(items)
+
+    def append(self, item: Union[Dict[str, Any], FileRecord]) -> None:
+        """追加一个文件。
+
+        Args:
+            item: 文件信息字典或 FileRecord
+        """
+        if not isinstance(item, FileRecord):
+            item = FileRecord.from_dict(item)
+        for name, column in self._ints.items():
+            column.append(getattr(item, name))
+        self._names.append(item.filename)
+        etag = item.etag
+        try:
+            raw = bytes.fromhex(etag) if etag else bytes(16)
+        except ValueError:
+            raw = b""
+        if len(raw) != 16 or (etag and raw.hex() != etag):
+            self._odd_etags[len(self._names) - 1] = etag
+            raw = bytes(16)
+        self._etags += raw
+
+    def extend(self, items: Iterable[Union[Dict[str, Any], FileRecord]]) -> None:
+        """追加多个文件。"""
+        for item in items:
+            self.append(item)
+
+    def __len__(self) -> int:
+        """文件数。"""
+        return len(self._names)
+
+    def _etag(self, index: int) -> str:
+        """读取第 index 行的 etag。"""
+        odd = self._odd_etags.get(index)
+        if odd is not None:
+            return odd
+        raw = self._etags[index * 16 : index * 16 + 16]
+        return raw.hex() if any(raw) else ""
+
+    def __getitem__(self, index: int) -> FileRecord:
+        """按行号读取 FileRecord。"""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        ints = {name: column[index] for name, column in self._ints.items()}
+        return FileRecord(filename=self._names[index], etag=self._etag(index), **ints)
+
+    def __iter__(self) -> Iterator[FileRecord]:
+        """逐行生成 FileRecord。"""
+        for index in range(len(self)):
+            yield self[index]
+
+    def column(self, name: str) -> Union[array, List[str]]:
+        """获取一列数据。
+
+        Args:
+            name: 字段名，整数列返回 array.array，filename 与 etag 返回列表
+
+        Returns:
+            列数据（整数列为内部数组本身，不要修改）
+        """
+        if name == "filename":
+            return self._names
+        if name == "etag":
+            return [self._etag(i) for i in range(len(self))]
+        return self._ints[name]
+
+    def to_numpy(self, name: str) -> Any:
+        """以 numpy 数组零拷贝获取整数列。
+
+        Raises:
+            ImportError: 未安装 numpy 时抛出
+        """
+        numpy = _numpy()
+        if numpy is None:
+            raise ImportError("to_numpy 依赖 numpy，请执行 pip install x123pan[numpy]")
+        return numpy.frombuffer(self._ints[name], dtype=self._ints[name].typecode)
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """转换为 list_v2 格式的字典列表。"""
+        return [record.to_dict() for record in self]
+
+    def take(self, indexes: Iterable[int]) -> "FileTable":
+        """按行号选取若干行组成新表（直接复制各列，不经过 FileRecord）。"""
+        indexes = list(indexes)
+        table = FileTable()
+        for name, column in self._ints.items():
+            table._ints[name] = array(column.typecode, map(column.__getitem__, indexes))
+        table._names = list(map(self._names.__getitem__, indexes))
+        # 每个 etag 视为两个8字节整数复制
+        etags = memoryview(self._etags).cast("Q")
+        table._etags = bytearray(
+            array("Q", [v for i in indexes for v in (etags[2 * i], etags[2 * i + 1])])
+        )
+        if self._odd_etags:
+            table._odd_etags = {
+                row: self._odd_etags[i] for row, i in enumerate(indexes) if i in self._odd_etags
+            }
+        return table
+
+    def filter(
+        self,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        etag: Optional[str] = None,
+        type: Optional[int] = None,
+        trashed: Optional[bool] = None,
+    ) -> "FileTable":
+        """按条件筛选文件，所有条件同时满足的行组成新表。
+
+        Args:
+            min_size: 最小文件大小（含）
+            max_size: 最大文件大小（含）
+            etag: 文件MD5
+            type: 文件类型，见 FileType
+            trashed: 是否在回收站中
+
+        Returns:
+            筛选后的新表
+        """
+        size, types, trash = self._ints["size"], self._ints["type"], self._ints["trashed"]
+        numpy = _numpy()
+        if numpy is not None:
+            mask = numpy.ones(len(self), dtype=bool)
+            if min_size is not None:
+                mask &= self.to_numpy("size") >= min_size
+            if max_size is not None:
+                mask &= self.to_numpy("size") <= max_size
+            if type is not None:
+                mask &= self.to_numpy("type") == type
+            if trashed is not None:
+                mask &= self.to_numpy("trashed") == int(trashed)
+            rows: Iterable[int] = numpy.flatnonzero(mask).tolist()
+        else:
+            rows = range(len(self))
+            if min_size is not None:
+                rows = [i for i in rows if size[i] >= min_size]
+            if max_size is not None:
+                rows = [i for i in rows if size[i] <= max_size]
+            if type is not None:
+                rows = [i for i in rows if types[i] == type]
+            if trashed is not None:
+                rows = [i for i in rows if trash[i] == int(trashed)]
+        if etag is not None:
+            rows = [i for i in rows if self._etag(i) == etag]
+        return self.take(rows)
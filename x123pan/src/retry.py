@@ -0,0 +1,232 @@
+import math
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .metrics import body_size
+from .type import API_INFO, DeadlineExceeded
+
+
+class Deadline:
+    """截止时间。
+
+    一次调用内的所有重试、退避与轮询共享同一个截止时间，超过后立即失败。
+
+    Attributes:
+        timeout: 总时长秒数，None表示不限时
+        start: 开始时间（time.monotonic）
+    """
+
+    def __init__(self, timeout: Optional[float]) -> None:
+        """初始化截止时间。
+
+        Args:
+            timeout: 从现在起的总时长秒数，None表示不限时
+        """
+        self.timeout = timeout
+        self.start = time.monotonic()
+
+    @classmethod
+    def of(cls, deadline: Union["Deadline", float, None], default: Optional[float]) -> "Deadline":
+        """将截止时间参数统一转换为 Deadline 对象。
+
+        Args:
+            deadline: Deadline对象或总时长秒数，None表示使用 default
+            default: 默认总时长秒数
+
+        Returns:
+            Deadline对象
+        """
+        if isinstance(deadline, Deadline):
+            return deadline
+        return cls(default if deadline is None else deadline)
+
+    def elapsed(self) -> float:
+        """已经过的秒数。"""
+        return time.monotonic() - self.start
+
+    def remaining(self) -> float:
+        """剩余秒数，不限时返回 inf。"""
+        if self.timeout is None:
+            return math.inf
+        return self.timeout - self.elapsed()
+
+    def check(self, url: str) -> float:
+        """检查是否已超时。
+
+        Args:
+            url: 用于异常信息的请求地址
+
+        Returns:
+            剩余秒数
+
+        Raises:
+            DeadlineExceeded: 已超过截止时间时抛出
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(url, self.elapsed())
+        return remaining
+
+    def sleep_time(self, delay: float, url: str) -> float:
+        """计算退避等待时间，等待后将超过截止时间时直接失败。
+
+        Args:
+            delay: 期望的等待秒数
+            url: 用于异常信息的请求地址
+
+        Returns:
+            应等待的秒数
+
+        Raises:
+            DeadlineExceeded: 等待结束时已超过截止时间时抛出
+        """
+        if delay >= self.check(url):
+            raise DeadlineExceeded(url, self.elapsed() + delay)
+        return delay
+
+
+class RetryPolicy:
+    """请求重试与超时策略。
+
+    网络异常与响应解码失败按指数退避加随机抖动重试，最多重试 ``retries`` 次；
+    429 限流只受截止时间约束。每次请求的读超时为端点的 ``API_INFO.timeout``
+    （未设置时为 ``read_timeout``）加上请求体按 ``throughput`` 传输所需的时间，
+    且不会超过调用剩余的时间。
+
+    Attributes:
+        retries: 网络异常或解码失败时的最大重试次数
+        backoff: 第一次重试前的基础退避秒数，之后每次翻倍
+        max_backoff: 单次退避的最大秒数
+        jitter: 退避时间的随机抖动比例
+        deadline: 每次调用的默认总时长秒数，None表示不限时
+        connect_timeout: 建立连接的超时秒数
+        read_timeout: 默认读超时秒数
+        throughput: 估算上传耗时所用的最低吞吐（字节/秒）
+        poll_interval: 轮询上传结果的初始间隔秒数
+        max_poll_interval: 轮询上传结果的最大间隔秒数
+    """
+
+    def __init__(
+        self,
+        retries: int = 5,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        jitter: float = 0.5,
+        deadline: Optional[float] = 600.0,
+        connect_timeout: float = 4.0,
+        read_timeout: float = 60.0,
+        throughput: float = 256 * 1024,
+        poll_interval: float = 0.1,
+        max_poll_interval: float = 2.0,
+    ) -> None:
+        """初始化重试策略。
+
+        Args:
+            retries: 网络异常或解码失败时的最大重试次数，默认为5
+            backoff: 第一次重试前的基础退避秒数，默认为0.5
+            max_backoff: 单次退避的最大秒数，默认为30
+            jitter: 退避时间的随机抖动比例，默认为0.5
+            deadline: 每次调用的默认总时长秒数，默认为600，None表示不限时
+            connect_timeout: 建立连接的超时秒数，默认为4
+            read_timeout: 默认读超时秒数，默认为60
+            throughput: 估算上传耗时所用的最低吞吐（字节/秒），默认为256KiB/s
+            poll_interval: 轮询上传结果的初始间隔秒数，默认为0.1
+            max_poll_interval: 轮询上传结果的最大间隔秒数，默认为2
+
+        Raises:
+            ValueError: 当参数无效时抛出
+        """
+        if retries < 0:
+            raise ValueError("retries 不能为负数")
+        if throughput <= 0:
+            raise ValueError("throughput 必须大于 0")
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.deadline = deadline
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.throughput = throughput
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+
+    def start(self, deadline: Union[Deadline, float, None] = None) -> Deadline:
+        """开始一次调用。
+
+        Args:
+            deadline: 已有的Deadline对象或总时长秒数，默认使用策略的 deadline
+
+        Returns:
+            Deadline对象
+        """
+        return Deadline.of(deadline, self.deadline)
+
+    def delay(self, attempt: int) -> float:
+        """计算第 attempt 次重试前的退避时间。
+
+        Args:
+            attempt: 重试序号，从1开始
+
+        Returns:
+            带随机抖动的退避秒数
+        """
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def next_poll(self, interval: float) -> float:
+        """计算下一次轮询的间隔。"""
+        return min(self.max_poll_interval, interval * 2)
+
+    def timeout(self, api: API_INFO, size: int, deadline: Deadline) -> Tuple[float, float]:
+        """计算单次请求的 (连接超时, 读超时)。
+
+        Args:
+            api: API信息对象
+            size: 请求体字节数
+            deadline: 本次调用的截止时间
+
+        Returns:
+            (连接超时, 读超时) 元组，均不超过剩余时间
+
+        Raises:
+            DeadlineExceeded: 已超过截止时间时抛出
+        """
+        remaining = deadline.check(api.url)
+        read = (api.timeout or self.read_timeout) + size / self.throughput
+        return min(self.connect_timeout, remaining), min(read, remaining)
+
+
+def files_size(files: Optional[Dict[str, Any]]) -> int:
+    """估算 multipart 文件字段的总字节数。
+
+    Args:
+        files: requests 风格的 files 参数
+
+    Returns:
+        文件字段的总字节数（无法确定的字段按0计算）
+    """
+    if not files:
+        return 0
+    return sum(body_size(v[1] if isinstance(v, tuple) else v) for v in files.values())
+
+
+def file_offsets(files: Optional[Dict[str, Any]]) -> List[Tuple[Any, int]]:
+    """记录 multipart 文件字段中文件对象的当前位置，重试前据此回退。
+
+    Args:
+        files: requests 风格的 files 参数
+
+    Returns:
+        (文件对象, 位置) 列表，不支持 seek/tell 的字段被忽略
+    """
+    offsets = []
+    for value in (files or {}).values():
+        fp = value[1] if isinstance(value, tuple) else value
+        if hasattr(fp, "seek") and hasattr(fp, "tell"):
+            try:
+                offsets.append((fp, fp.tell()))
+            except (OSError, ValueError):
+                continue
+    return offsets
@@ -0,0 +1,332 @@
+import fnmatch
+import os
+import re
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Union
+
+from .record import FileRecord
+from .type import Mutation
+
+# 正则中使后一个字符或分组变为可选的量词
+_OPTIONAL = "?*{"
+# 正则元字符，遇到后结束当前的字面量片段
+_META = ".^$*+?{}[]\\|()"
+
+
+def trigrams(text: str) -> Set[str]:
+    """获取字符串（小写）的全部三字符片段。"""
+    text = text.lower()
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def glob_literals(pattern: str) -> List[str]:
+    """获取通配符模式中必须出现的字面量片段。"""
+    return [p for p in re.split(r"\*|\?|\[[^\]]*\]", pattern) if p]
+
+
+def regex_literals(pattern: str) -> List[str]:
+    """保守地获取正则表达式中必须出现的字面量片段。
+
+    包含 "|" 时无法确定必须出现的片段，返回空列表；分组内、字符类与量词内、
+    以及后面紧跟 ? * {} 量词的字符都不计入。
+    """
+    if "|" in pattern:
+        return []
+    runs, run, depth, i = [], "", 0, 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\" and i + 1 < len(pattern):
+            nxt = pattern[i + 1]
+            literal = nxt if not nxt.isalnum() else None
+            i += 2
+        elif c in _META:
+            if c == "(":
+                depth += 1
+            elif c == ")":
+                depth = max(depth - 1, 0)
+            elif c == "[":
+                end = pattern.find("]", i + 2)
+                i = end if end != -1 else len(pattern)
+            elif c == "{":
+                end = pattern.find("}", i + 1)
+                i = end if end != -1 else len(pattern)
+            literal = None
+            i += 1
+        else:
+            literal = c
+            i += 1
+        if (
+            literal is not None
+            and depth == 0
+            and not (i < len(pattern) and pattern[i] in _OPTIONAL)
+        ):
+            run += literal
+        else:
+            if run:
+                runs.append(run)
+            run = ""
+    if run:
+        runs.append(run)
+    return runs
+
+
+def extension(filename: str) -> str:
+    """获取小写的文件扩展名（不含 "."），没有扩展名时返回空字符串。"""
+    return os.path.splitext(filename)[1][1:].lower()
+
+
+class SearchIndex:
+    """进程内的文件名搜索索引。
+
+    以文件名（小写）的三字符片段建立倒排索引，并按扩展名与文件大小（按2的幂分桶）建立分面，
+    子串、通配符与正则查询先用必须出现的片段与分面缩小候选集，再逐个校验。
+    通过 Access.set_search 启用后，file.list_v2 与 file.infos 的结果自动写入索引，
+    本 Access 发起的 trash/delete/recover/move/name/rename/mkdir 直接更新索引。
+
+    按完整路径匹配（``match_path=True``）无法利用三字符片段，需要校验全部候选文件。
+    """
+
+    def __init__(self) -> None:
+        """初始化空索引。"""
+        self._lock = threading.RLock()
+        self._records: Dict[int, FileRecord] = {}
+        self._grams: Dict[str, Set[int]] = {}
+        self._exts: Dict[str, Set[int]] = {}
+        self._sizes: Dict[int, Set[int]] = {}
+
+    def __len__(self) -> int:
+        """索引中的文件数。"""
+        return len(self._records)
+
+    def get(self, fileId: int) -> Optional[FileRecord]:
+        """按ID获取索引中的文件记录。"""
+        return self._records.get(fileId)
+
+    def _unlink(self, record: FileRecord) -> None:
+        """从倒排索引中移除记录（调用方需持有锁）。"""
+        fileId = record.fileId
+        for gram in trigrams(record.filename):
+            self._discard(self._grams, gram, fileId)
+        self._discard(self._exts, extension(record.filename), fileId)
+        self._discard(self._sizes, record.size.bit_length(), fileId)
+
+    @staticmethod
+    def _discard(postings: Dict[Any, Set[int]], key: Any, fileId: int) -> None:
+        """从 key 的倒排列表中移除 fileId，列表为空时删除 key。"""
+        ids = postings.get(key)
+        if ids is not None:
+            ids.discard(fileId)
+            if not ids:
+                del postings[key]
+
+    def _link(self, record: FileRecord) -> None:
+        """将记录加入倒排索引（调用方需持有锁）。"""
+        fileId = record.fileId
+        for gram in trigrams(record.filename):
+            self._grams.setdefault(gram, set()).add(fileId)
+        self._exts.setdefault(extension(record.filename), set()).add(fileId)
+        self._sizes.setdefault(record.size.bit_length(), set()).add(fileId)
+
+    def update(self, items: Iterable[Union[Dict[str, Any], FileRecord]]) -> None:
+        """写入或更新文件。
+
+        Args:
+            items: 文件信息字典（list_v2 / infos 格式）或 FileRecord
+        """
+        with self._lock:
+            for item in items:
+                record = item if isinstance(item, FileRecord) else FileRecord.from_dict(item)
+                old = self._records.get(record.fileId)
+                if old is not None:
+                    if old.filename == record.filename and old.size == record.size:
+                        self._records[record.fileId] = record
+                        continue
+                    self._unlink(old)
+                self._records[record.fileId] = record
+                self._link(record)
+
+    def remove(self, fileIds: Iterable[int]) -> None:
+        """从索引中移除文件。"""
+        with self._lock:
+            for fileId in fileIds:
+                record = self._records.pop(fileId, None)
+                if record is not None:
+                    self._unlink(record)
+
+    def _rename(self, fileId: int, filename: str) -> None:
+        """修改文件名（调用方需持有锁）。"""
+        record = self._records.get(fileId)
+        if record is not None:
+            self._unlink(record)
+            record.filename = filename
+            self._link(record)
+
+    def on_mutation(self, mutation: Mutation) -> None:
+        """变更监听器：按变更类型直接更新索引。
+
+        Args:
+            mutation: 变更事件
+        """
+        with self._lock:
+            if mutation.kind == "delete":
+                self.remove(mutation.fileIDs)
+            elif mutation.kind in ("trash", "recover"):
+                for fileId in mutation.fileIDs:
+                    record = self._records.get(fileId)
+                    if record is not None:
+                        record.trashed = int(mutation.kind == "trash")
+            elif mutation.kind == "move" and mutation.parentIDs:
+                for fileId in mutation.fileIDs:
+                    record = self._records.get(fileId)
+                    if record is not None:
+                        record.parentFileId = mutation.parentIDs[0]
+            elif mutation.kind in ("name", "rename") and mutation.names:
+                for fileId, filename in zip(mutation.fileIDs, mutation.names):
+                    self._rename(fileId, filename)
+            elif mutation.kind == "mkdir" and mutation.names and mutation.parentIDs:
+                self.update(
+                    FileRecord(fileId, mutation.parentIDs[0], filename, type=1)
+                    for fileId, filename in zip(mutation.fileIDs, mutation.names)
+                )
+
+    def clear(self) -> None:
+        """清空索引。"""
+        with self._lock:
+            self._records.clear()
+            self._grams.clear()
+            self._exts.clear()
+            self._sizes.clear()
+
+    def path(self, fileId: int) -> Optional[str]:
+        """由索引中的上级目录拼出完整路径，某个上级目录不在索引中时返回None。"""
+        names = []
+        while fileId != 0:
+            record = self._records.get(fileId)
+            if record is None:
+                return None
+            names.append(record.filename)
+            fileId = record.parentFileId
+        return "/" + "/".join(reversed(names))
+
+    def _under(self, fileId: int, dirId: int) -> bool:
+        """判断文件是否位于目录之下（调用方需持有锁）。"""
+        while fileId != 0:
+            record = self._records.get(fileId)
+            if record is None:
+                return False
+            fileId = record.parentFileId
+            if fileId == dirId:
+                return True
+        return False
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        glob: Optional[str] = None,
+        regex: Optional[str] = None,
+        ext: Union[str, Sequence[str], None] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        type: Optional[int] = None,
+        trashed: bool = False,
+        under: Optional[int] = None,
+        match_path: bool = False,
+        limit: int = 100,
+    ) -> List[FileRecord]:
+        """搜索文件（不区分大小写），所有条件同时满足。
+
+        Args:
+            query: 文件名包含的子串
+            glob: 文件名需完整匹配的通配符模式，如 "*.mp4"
+            regex: 文件名需匹配（re.search）的正则表达式
+            ext: 扩展名或扩展名列表（不含 "."）
+            min_size: 最小文件大小（含）
+            max_size: 最大文件大小（含）
+            type: 文件类型，0为文件，1为目录
+            trashed: 是否包含回收站中的文件，默认为False
+            under: 只返回该目录下（任意深度）的文件
+            match_path: query / glob / regex 是否匹配索引中拼出的完整路径而不是文件名
+            limit: 最多返回的数量，0表示不限制，默认为100
+
+        Returns:
+            FileRecord 列表（按 fileId 排序；没有可用于缩小范围的条件时为最先写入索引的 limit 个）
+        """
+        checks: List[Callable[[str], bool]] = []
+        literals: List[str] = []
+        if query:
+            needle = query.lower()
+            checks.append(lambda text: needle in text.lower())
+            literals.append(query)
+        if glob:
+            globbed = re.compile(fnmatch.translate(glob), re.IGNORECASE)
+            checks.append(lambda text: globbed.match(text) is not None)
+            literals += glob_literals(glob)
+        if regex:
+            searched = re.compile(regex, re.IGNORECASE)
+            checks.append(lambda text: searched.search(text) is not None)
+            literals += regex_literals(regex)
+        if isinstance(ext, str):
+            ext = [ext]
+        with self._lock:
+            facets: List[Set[int]] = []
+            if not match_path:
+                for literal in literals:
+                    facets += [self._grams.get(g, set()) for g in trigrams(literal)]
+            if ext is not None:
+                facets.append(set().union(*(self._exts.get(e.lower(), ()) for e in ext)))
+            if min_size is not None or max_size is not None:
+                low = (min_size or 0).bit_length()
+                high = max_size.bit_length() if max_size is not None else None
+                facets.append(
+                    set().union(
+                        *(
+                            ids
+                            for bucket, ids in self._sizes.items()
+                            if bucket >= low and (high is None or bucket <= high)
+                        )
+                    )
+                )
+            if facets:
+                facets.sort(key=len)
+                candidates: Iterable[int] = sorted(facets[0].intersection(*facets[1:]))
+            else:
+                candidates = self._records
+            result = []
+            for fileId in candidates:
+                record = self._records[fileId]
+                if record.trashed and not trashed:
+                    continue
+                if type is not None and record.type != type:
+                    continue
+                if min_size is not None and record.size < min_size:
+                    continue
+                if max_size is not None and record.size > max_size:
+                    continue
+                if under is not None and not self._under(fileId, under):
+                    continue
+                if checks:
+                    text = self.path(fileId) if match_path else record.filename
+                    if text is None or not all(check(text) for check in checks):
+                        continue
+                result.append(record)
+                if 0 < limit <= len(result):
+                    break
+        result.sort(key=lambda r: r.fileId)
+        return result
+
+    def facets(self, records: Iterable[FileRecord]) -> Dict[str, Dict[Any, int]]:
+        """统计搜索结果的扩展名与大小分布。
+
+        Args:
+            records: 搜索结果
+
+        Returns:
+            {"ext": {扩展名: 数量}, "size": {大小上限（2的幂）: 数量}} 字典
+        """
+        exts: Counter = Counter()
+        sizes: Counter = Counter()
+        for record in records:
+            exts[extension(record.filename)] += 1
+            sizes[1 << record.size.bit_length()] += 1
+        return {"ext": dict(exts), "size": dict(sizes)}
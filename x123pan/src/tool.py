@@ -1,38 +1,158 @@
+import contextlib
+import datetime
 import hashlib
-from typing import Tuple, Union
+import io
+import json
+import os
+import sys
+from types import ModuleType
+from typing import Any, BinaryIO, Iterator, List, Optional, Tuple, Union
 
-from x123pan.src.type import Ctx, SectionDataReader, SectionFileReader
+from x123pan.src.hashcache import HashCache
+from x123pan.src.type import (
+    BUFFER_TYPES,
+    Ctx,
+    DataResponse,
+    FileDigest,
+    FileSource,
+    SectionDataReader,
+    SectionFileReader,
+    SharedFile,
+    is_stream,
+)
 
+orjson: Optional[ModuleType]
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
 
-def size_md5(file_source: Union[str, bytes]) -> Tuple[int, str]:
+if sys.platform == "win32":  # pragma: no cover
+    import msvcrt
+else:
+    import fcntl
+
+
+# 响应体不是合法JSON时 loads 抛出的异常（orjson.JSONDecodeError 是 json.JSONDecodeError 的子类），
+# 只有这些异常会被当作传输问题重试，DataResponse 校验失败等 ValueError 直接抛出
+DECODE_ERRORS = (json.JSONDecodeError, UnicodeDecodeError)
+
+# 计算摘要时每次读取的字节数，缓冲区在整个文件的读取过程中复用
+HASH_BUFFER = 8 * 1024 * 1024
+# 上传前尚不知道服务端分片大小时，按此大小预先计算分片MD5
+SLICE_SIZE = 16 * 1024 * 1024
+
+
+def size_md5(file_source: FileSource, cache: Optional[HashCache] = None) -> Tuple[int, str]:
     """
     内部方法，用于获取文件的 md5 。
-    :param file_source: 文件名或字节流对象，如果是字节流对象请手动将光标移动到开头。
+    :param file_source: 文件名、字节数据（bytes、bytearray、memoryview、mmap）或文件对象，
+        文件对象从当前位置读取到末尾，计算后恢复原位置。
+    :param cache: 文件摘要缓存，文件未变化时直接返回缓存的结果。
     :return: 文件 md5 。
     """
-    if isinstance(file_source, bytes):
-        md5_hash = hashlib.md5()
-        md5_hash.update(file_source)
-        return len(file_source), md5_hash.hexdigest()
+    result = digest(file_source, cache=cache)
+    return result.size, result.md5
+
+
+def digest(
+    file_source: FileSource,
+    sliceSize: int = 0,
+    bufferSize: int = HASH_BUFFER,
+    cache: Optional[HashCache] = None,
+) -> FileDigest:
+    """一次读取同时计算整个文件与每个分片的MD5。
+
+    文件用复用的缓冲区 readinto 读取，字节数据直接以 memoryview 计算，不复制数据。
+    文件对象从当前位置读取到末尾，计算后恢复原位置。
+    给出 cache 时，路径、大小、修改时间与 inode 都未变化的文件直接返回缓存的结果，不读取文件；
+    缓存中的分片大小与 sliceSize 不同时只返回整体MD5（sliceMD5s 为空）。
+
+    Args:
+        file_source: 文件路径、字节数据或可 seek 的二进制文件对象
+        sliceSize: 分片大小，0表示不计算分片MD5
+        bufferSize: 每次读取的字节数，默认为8MiB
+        cache: 文件摘要缓存，只对文件路径生效
+
+    Returns:
+        FileDigest 对象
+
+    Raises:
+        Exception: 当参数类型错误时抛出
+    """
+    if cache is not None and isinstance(file_source, str):
+        stat = os.stat(file_source)
+        result = cache.get(file_source, sliceSize, stat)
+        if result is None:
+            result = digest(file_source, sliceSize, bufferSize)
+            cache.put(file_source, result, stat)
+        return result
+    whole = hashlib.md5()
+    sliceMD5s: List[str] = []
+    part, filled = hashlib.md5(), 0
+
+    def update(view: memoryview) -> None:
+        nonlocal part, filled
+        whole.update(view)
+        while sliceSize and len(view):
+            take = min(len(view), sliceSize - filled)
+            part.update(view[:take])
+            filled += take
+            view = view[take:]
+            if filled == sliceSize:
+                sliceMD5s.append(part.hexdigest())
+                part, filled = hashlib.md5(), 0
+
+    def consume(f: BinaryIO) -> int:
+        start = f.tell()
+        remain = f.seek(0, io.SEEK_END) - start
+        f.seek(start)
+        readinto = getattr(f, "readinto", None)
+        size = 0
+        buffer = bytearray(max(1, min(bufferSize, remain)))
+        with memoryview(buffer) as view:
+            while n := (readinto(buffer) if readinto else _readinto(f, view)):
+                update(view[:n])
+                size += n
+        return size
+
+    if isinstance(file_source, BUFFER_TYPES):
+        with memoryview(file_source) as view, view.cast("B") as flat:
+            size = len(flat)
+            update(flat)
     elif isinstance(file_source, str):
-        with open(file_source, "rb") as f:
-            f.seek(0)
-            md5_hash = hashlib.md5()
-            for byte_block in iter(lambda: f.read(4096), b""):
-                md5_hash.update(byte_block)
-            size = f.tell()
-            return size, md5_hash.hexdigest()
+        with open(file_source, "rb", buffering=0) as f:
+            size = consume(f)
+    elif is_stream(file_source):
+        start = file_source.tell()
+        try:
+            size = consume(file_source)
+        finally:
+            file_source.seek(start)
     else:
         raise Exception("参数类型错误")
+    if filled:
+        sliceMD5s.append(part.hexdigest())
+    return FileDigest(size, whole.hexdigest(), sliceSize, sliceMD5s)
+
+
+def _readinto(f: BinaryIO, view: memoryview) -> int:
+    """为没有 readinto 的文件对象读取数据到缓冲区。"""
+    chunk = f.read(len(view))
+    view[: len(chunk)] = chunk
+    return len(chunk)
 
 
 def read(
-    file_info: Union[str, bytes], limit: Tuple[int, int], ctx: Ctx = None
+    file_info: Union[FileSource, SharedFile], limit: Tuple[int, int], ctx: Optional[Ctx] = None
 ) -> Union[SectionFileReader, SectionDataReader]:
     """读取文件或字节数据的指定区间。
 
+    读取器的 read 对共享的文件与字节数据返回不复制数据的 memoryview。
+
     Args:
-        file_info: 文件路径或字节数据
+        file_info: 文件路径、共享的文件（见 shared）、字节数据（bytes、bytearray、memoryview、
+            mmap）或可 seek 的二进制文件对象（区间相对其当前位置）
         limit: 读取范围，格式为 (start, end)
         ctx: 上下文对象，默认为None
 
@@ -42,11 +162,167 @@ def read(
     Raises:
         Exception: 当参数类型错误时抛出
     """
-    if not isinstance(file_info, (str, bytes)):
-        raise Exception("参数类型错误")
     if ctx is None:
         ctx = Ctx()
-    if isinstance(file_info, str):
+    if isinstance(file_info, BUFFER_TYPES):
+        return SectionDataReader(ctx, file_info, limit)
+    if isinstance(file_info, (str, SharedFile)) or is_stream(file_info):
         return SectionFileReader(ctx, file_info, limit)
+    raise Exception("参数类型错误")
+
+
+@contextlib.contextmanager
+def shared(file_info: FileSource) -> Iterator[Union[SharedFile, FileSource]]:
+    """在一次上传期间共享文件描述符。
+
+    文件路径与文件对象打开为 SharedFile，退出时关闭（文件对象只恢复位置）；字节数据原样返回。
+
+    Args:
+        file_info: 文件路径、字节数据或可 seek 的二进制文件对象
+
+    Yields:
+        传给 read 的数据源
+    """
+    if isinstance(file_info, BUFFER_TYPES):
+        yield file_info
+        return
+    with SharedFile(file_info) as f:
+        yield f
+
+
+@contextlib.contextmanager
+def body(file_info: FileSource, size: int) -> Iterator[Any]:
+    """单文件上传的请求体。
+
+    文件路径打开为文件对象，bytes 原样返回；其它字节数据与文件对象包装为区间读取器，
+    从起点读取 size 字节，不复制数据。
+
+    Args:
+        file_info: 文件路径、字节数据或可 seek 的二进制文件对象
+        size: 数据大小
+
+    Yields:
+        作为 multipart 文件字段的请求体
+    """
+    if isinstance(file_info, str):
+        with open(file_info, "rb") as f:
+            yield f
+    elif isinstance(file_info, bytes) or not size:
+        yield file_info if isinstance(file_info, bytes) else b""
     else:
-        return SectionDataReader(ctx, file_info, limit)
+        with read(file_info, (0, size)) as reader:
+            yield reader
+
+
+def loads(data: Union[bytes, str], fast: bool = False) -> Any:
+    """解析JSON响应体。
+
+    Args:
+        data: 响应体
+        fast: 是否使用 orjson 解析，需要安装 x123pan[orjson]
+
+    Returns:
+        解析后的对象
+
+    Raises:
+        json.JSONDecodeError: 当数据不是合法JSON时抛出（见 DECODE_ERRORS）
+    """
+    if fast and orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def unpack(payload: Any, validate: bool = True) -> Tuple[int, str, Any]:
+    """拆解API响应外层结构。
+
+    Args:
+        payload: 已解析的响应体
+        validate: 是否使用 DataResponse 校验，关闭后直接读取字典字段
+
+    Returns:
+        (code, message, data) 元组
+    """
+    if validate:
+        r = DataResponse(**payload)
+        return r.code, r.message, r.data
+    return payload.get("code", 0), payload.get("message", ""), payload.get("data")
+
+
+@contextlib.contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    """跨进程文件锁，锁文件为 ``path + ".lock"``。
+
+    Args:
+        path: 被保护的文件路径，为空时不加锁
+    """
+    if not path:
+        yield
+        return
+    with open(path + ".lock", "a+b") as f:
+        if sys.platform == "win32":  # pragma: no cover
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if sys.platform == "win32":  # pragma: no cover
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def parse_expire(expiredAt: Any) -> float:
+    """将接口返回的过期时间转换为时间戳。
+
+    Args:
+        expiredAt: ISO 8601 格式的过期时间，如 "2025-03-23T15:48:37+08:00"
+
+    Returns:
+        Unix 时间戳，无法解析时返回 0
+    """
+    if not expiredAt:
+        return 0.0
+    try:
+        return datetime.datetime.fromisoformat(str(expiredAt)).timestamp()
+    except ValueError:
+        return 0.0
+
+
+def read_token(path: str) -> Tuple[str, float]:
+    """读取令牌文件。
+
+    文件第一行为访问令牌，第二行（可选）为 ISO 8601 格式的过期时间。
+
+    Args:
+        path: 令牌文件路径
+
+    Returns:
+        (令牌, 过期时间戳) 元组，文件不存在时返回 ("", 0)
+    """
+    try:
+        with open(path) as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return "", 0.0
+    token = lines[0].strip() if lines else ""
+    return token, parse_expire(lines[1].strip()) if len(lines) > 1 else 0.0
+
+
+def write_token(path: str, token: str, expire: float = 0) -> None:
+    """原子地写入令牌文件。
+
+    Args:
+        path: 令牌文件路径
+        token: 访问令牌
+        expire: 过期时间戳，0表示未知
+    """
+    content = token
+    if expire:
+        content += "\n" + datetime.datetime.fromtimestamp(expire).astimezone().isoformat()
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(content)
+    os.replace(tmp, path)
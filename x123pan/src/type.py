@@ -1,52 +1,74 @@
+import contextlib
 import hashlib
 import io
-import queue
+import mmap
+import os
 import threading
-from dataclasses import dataclass
-from typing import Any, Optional, Tuple
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, List, Optional, Tuple, Union
 
 from pydantic import BaseModel, Field
 
+from .limiter import TokenBucket
+
 
 @dataclass
 class API_INFO:
     """API信息配置类。
 
-    用于存储API的基本信息和QPS限制配置。
+    用于存储API的基本信息和QPS限制配置。同一个端点的所有请求共享一个令牌桶。
 
     Attributes:
         url: API的URL地址
         method: HTTP请求方法
         qps: 每秒查询数限制，0表示无限制
+        burst: 突发请求上限，0表示与qps相同
+        timeout: 单次请求的读超时秒数，0表示使用 RetryPolicy 的默认值
     """
 
     url: str
     method: str
     qps: int = 0
+    burst: int = 0
+    timeout: float = 0
 
     def __post_init__(self) -> None:
         """初始化后处理。
 
-        根据QPS限制设置请求和释放方法。
+        根据QPS限制创建令牌桶。
         """
-        if self.qps == 0:
-            self.require = lambda: None
-            self.release = lambda: None
-        else:
-            self.__queue = queue.Queue(maxsize=self.qps)
+        self.limiter = TokenBucket(self.qps, self.burst or None)
+
+    def require(self) -> float:
+        """请求访问权限（阻塞直到可用）。
+
+        Returns:
+            等待令牌的秒数
+        """
+        return self.limiter.acquire()
+
+    def requireAuto(self) -> float:
+        """请求访问权限（令牌桶无需释放，与 require 等价）。"""
+        return self.limiter.acquire()
 
-    def require(self) -> None:
-        """请求访问权限（阻塞直到可用）。"""
-        self.__queue.put(None)
+    def try_require(self) -> bool:
+        """尝试请求访问权限（非阻塞）。
 
-    def requireAuto(self) -> None:
-        """请求访问权限（自动释放）。"""
-        self.__queue.put(None)
-        threading.Timer(1, self.__queue.get).start()
+        Returns:
+            获取成功返回True，否则返回False
+        """
+        return self.limiter.try_acquire()
+
+    async def require_async(self) -> float:
+        """异步请求访问权限。
+
+        Returns:
+            等待令牌的秒数
+        """
+        return await self.limiter.acquire_async()
 
     def release(self) -> None:
-        """释放访问权限（延迟1秒）。"""
-        threading.Timer(1, self.__queue.get).start()
+        """释放访问权限（令牌按速率自动补充，无需操作）。"""
 
     def __enter__(self) -> "API_INFO":
         """进入上下文管理器。"""
@@ -58,6 +80,54 @@ class API_INFO:
         self.release()
 
 
+@dataclass
+class Mutation:
+    """文件变更事件。
+
+    Access 在 trash、delete、recover、move、rename、name、mkdir 以及上传成功后，
+    将变更通知给通过 Access.add_listener 注册的监听器。
+
+    Attributes:
+        kind: 变更类型，如 "trash"、"move"、"upload"
+        fileIDs: 被修改的文件ID
+        parentIDs: 子项发生变化的目录ID，None表示受影响的目录未知
+        names: 与 fileIDs 一一对应的新文件名（name、rename、mkdir），其它变更为None
+    """
+
+    kind: str
+    fileIDs: List[int] = field(default_factory=list)
+    parentIDs: Optional[List[int]] = field(default_factory=list)
+    names: Optional[List[str]] = None
+
+
+@dataclass
+class FileDigest:
+    """文件摘要，由 tool.digest 一次读取计算。
+
+    Attributes:
+        size: 文件大小
+        md5: 整个文件的MD5
+        sliceSize: 计算分片MD5使用的分片大小，0表示未计算分片MD5
+        sliceMD5s: 按分片编号排列的分片MD5
+    """
+
+    size: int
+    md5: str
+    sliceSize: int = 0
+    sliceMD5s: List[str] = field(default_factory=list)
+
+    def slices(self, sliceSize: int) -> Optional[List[str]]:
+        """获取指定分片大小的分片MD5。
+
+        Args:
+            sliceSize: 分片大小
+
+        Returns:
+            分片MD5列表，分片大小与计算时不同则返回None
+        """
+        return self.sliceMD5s if sliceSize and sliceSize == self.sliceSize else None
+
+
 class DataResponse(BaseModel):
     """
     data: 服务器返回的数据
@@ -66,7 +136,7 @@ class DataResponse(BaseModel):
     x_traceID: 服务器返回的 traceID
     """
 
-    data: Optional[Any] = Field(default_factory=Any)
+    data: Optional[Any] = None
     code: int = 0
     message: str = ""
     x_traceID: str = Field(default="", alias="x-traceID")
@@ -116,23 +186,171 @@ class Ctx:
         return self.info is not None
 
 
+# 可直接按缓冲区协议读取的数据类型，整个缓冲区都是数据，不受 mmap 的当前位置影响
+BUFFER_TYPES = (bytes, bytearray, memoryview, mmap.mmap)
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+# 上传接口接受的数据源：文件路径、缓冲区或可 seek 的二进制文件对象
+FileSource = Union[str, Buffer, BinaryIO]
+
+
+def is_stream(source: Any) -> bool:
+    """判断是否为可 seek 的二进制文件对象（缓冲区类型除外）。"""
+    return (
+        not isinstance(source, (str, *BUFFER_TYPES))
+        and hasattr(source, "read")
+        and hasattr(source, "seek")
+        and hasattr(source, "tell")
+    )
+
+
+class SharedFile:
+    """多个分段读取器共享的只读文件。
+
+    传入路径时整个文件只打开一个文件描述符并用 mmap 映射，分段读取直接返回映射区的 memoryview，
+    不复制数据；无法映射时（如空文件）退回 os.pread 按偏移读取，不移动共享的文件位置。
+    传入文件对象时以其当前位置为起点：io.BytesIO 直接使用其内部缓冲区，有文件描述符的对象同样
+    映射或 pread，其它对象在锁内 seek 后读取；关闭时将文件对象的位置恢复到起点，但不关闭它。
+    文件描述符由创建者（通常是一次上传）负责关闭，分段读取器关闭时不会关闭它。
+
+    Attributes:
+        path: 文件路径，文件对象没有路径时为空字符串
+        base: 数据在文件中的起始偏移
+        size: 打开时的数据大小
+    """
+
+    def __init__(self, path: Union[str, BinaryIO]) -> None:
+        """打开文件。
+
+        Args:
+            path: 文件路径或可 seek 的二进制文件对象
+
+        Raises:
+            FileNotFoundError: 当文件不存在时抛出
+            PermissionError: 当没有文件读取权限时抛出
+        """
+        self._lock = threading.Lock()
+        self._mm: Optional[mmap.mmap] = None
+        self._view: Optional[memoryview] = None
+        self._source: Optional[BinaryIO] = None
+        self._stream: Optional[BinaryIO] = None
+        self.base, self.fd, self._owned = 0, -1, isinstance(path, str)
+        if isinstance(path, str):
+            self.path = path
+            try:
+                self.fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+            except FileNotFoundError as err:
+                raise FileNotFoundError(f"文件不存在：{path}") from err
+            except PermissionError as err:
+                raise PermissionError(f"没有权限读取文件：{path}") from err
+            self.size = os.fstat(self.fd).st_size
+            self._map()
+            return
+        name = getattr(path, "name", "")
+        self.path = name if isinstance(name, str) else ""
+        self._source = path
+        self.base = path.tell()
+        if isinstance(path, io.BytesIO):
+            with path.getbuffer() as buffer:
+                self._view = buffer[self.base :]
+            self.size = len(self._view)
+            return
+        self.size = path.seek(0, io.SEEK_END) - self.base
+        path.seek(self.base)
+        try:
+            self.fd = path.fileno()
+        except (AttributeError, OSError, ValueError):
+            self.fd = -1
+        if self.fd >= 0:
+            # 映射与 pread 看不到尚在写缓冲中的数据
+            path.flush()
+            self._map()
+        if self._view is None and (self.fd < 0 or not hasattr(os, "pread")):
+            self._stream = path
+
+    def _map(self) -> None:
+        """映射文件描述符，失败时保持未映射。"""
+        try:
+            self._mm = mmap.mmap(self.fd, 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            return
+        with memoryview(self._mm) as whole:
+            self._view = whole[self.base : self.base + self.size]
+
+    def __enter__(self) -> "SharedFile":
+        """进入上下文管理器。"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        """退出上下文管理器。"""
+        self.close()
+
+    def view(self, start: int, end: int) -> Union[memoryview, bytes]:
+        """读取 [start, end) 区间。
+
+        Args:
+            start: 相对起点的起始偏移
+            end: 相对起点的结束偏移（不含）
+
+        Returns:
+            映射成功时为不复制数据的 memoryview，否则为读取的字节
+        """
+        if self._view is not None:
+            return self._view[start:end]
+        end = min(end, self.size)
+        if start >= end:
+            return b""
+        if self._stream is not None:
+            with self._lock:
+                self._stream.seek(self.base + start)
+                return self._stream.read(end - start)
+        if hasattr(os, "pread"):
+            return os.pread(self.fd, end - start, self.base + start)
+        with self._lock:  # pragma: no cover
+            os.lseek(self.fd, self.base + start, os.SEEK_SET)
+            return os.read(self.fd, end - start)
+
+    def close(self) -> None:
+        """关闭映射与文件描述符，文件对象只恢复位置。"""
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._mm is not None:
+            # 仍有读取结果引用映射区时，映射在这些引用释放后由垃圾回收关闭
+            with contextlib.suppress(BufferError):
+                self._mm.close()
+            self._mm = None
+        if self._owned and self.fd >= 0:
+            os.close(self.fd)
+        self.fd = -1
+        if self._source is not None:
+            with contextlib.suppress(ValueError, OSError):
+                self._source.seek(self.base)
+            self._source = self._stream = None
+
+
 class SectionFileReader(io.IOBase):
     """文件分段读取器，用于读取文件的指定区间。
 
     继承自 io.IOBase，实现了基本的文件读取接口。支持上下文管理器。
+    传入文件路径时每个读取器单独打开文件；传入 SharedFile 时多个读取器共享同一个文件描述符，
+    read 返回不复制数据的 memoryview，关闭读取器不会关闭共享的文件。
+    传入文件对象时以其当前位置为区间起点，读取器为其创建 SharedFile 并在关闭时关闭。
     Attributes:
         path (str): 文件路径
         limit (Tuple[int, int]): 读取范围的起始和结束位置
         position (int): 当前相对于区间起始位置的偏移量
         stop_event (Optional[threading.Event]): 用于控制读取停止的事件对象
-        f (io.BufferedRandom): 文件对象
+        f (Optional[BinaryIO]): 文件对象，共享文件时或关闭后为None
+        shared (Optional[SharedFile]): 共享的文件
     """
 
-    def __init__(self, ctx: Ctx, path: str, limit: Tuple[int, int]) -> None:
+    def __init__(
+        self, ctx: Ctx, path: Union[str, SharedFile, BinaryIO], limit: Tuple[int, int]
+    ) -> None:
         """初始化文件分段读取器。
 
         Args:
-            path: 要读取的文件路径
+            path: 要读取的文件路径、共享的文件或可 seek 的二进制文件对象
             limit: 读取范围，格式为 (start, end)
             stop_event: 用于控制读取停止的事件对象
 
@@ -141,22 +359,32 @@ class SectionFileReader(io.IOBase):
             FileNotFoundError: 当文件不存在时抛出
             PermissionError: 当没有文件读取权限时抛出
         """
-        self.path = path
         self.limit = limit
         self.position = 0
         self.ctx = ctx
+        self.f: Optional[BinaryIO] = None
+        self.shared: Optional[SharedFile] = None
+        self._owned = False
 
         if not isinstance(limit, tuple) or len(limit) != 2:
             raise ValueError("limit 必须是包含两个整数的元组")
         if limit[0] < 0 or limit[0] >= limit[1]:
             raise ValueError("limit[0] 必须大于等于 0 且小于 limit[1]")
 
-        try:
-            self.f = open(self.path, "rb")  # noqa: SIM115
-        except FileNotFoundError as err:
-            raise FileNotFoundError(f"文件不存在：{self.path}") from err
-        except PermissionError as err:
-            raise PermissionError(f"没有权限读取文件：{self.path}") from err
+        if isinstance(path, str):
+            self.path = path
+            try:
+                self.f = open(path, "rb")  # noqa: SIM115
+            except FileNotFoundError as err:
+                raise FileNotFoundError(f"文件不存在：{path}") from err
+            except PermissionError as err:
+                raise PermissionError(f"没有权限读取文件：{path}") from err
+            return
+        if isinstance(path, SharedFile):
+            self.shared = path
+        else:
+            self.shared, self._owned = SharedFile(path), True
+        self.path = self.shared.path
 
     def __enter__(self) -> "SectionFileReader":
         """进入上下文管理器。
@@ -166,14 +394,14 @@ class SectionFileReader(io.IOBase):
         """
         return self
 
-    def read(self, size: int = -1) -> bytes:
+    def read(self, size: int = -1) -> Union[bytes, memoryview]:
         """读取指定大小的数据。
 
         Args:
             size: 要读取的字节数，-1 表示读取到区间末尾
 
         Returns:
-            读取的数据
+            读取的数据，共享文件时为 memoryview
 
         Raises:
             Exception: 当被标记停止读取时抛出
@@ -190,6 +418,12 @@ class SectionFileReader(io.IOBase):
         abs_start = self.limit[0] + self.position
         abs_end = min(abs_start + size, self.limit[1])
 
+        if self.shared is not None:
+            view = self.shared.view(abs_start, abs_end)
+            self.position += len(view)
+            return view
+        if self.f is None:
+            raise ValueError("读取器已关闭")
         self.f.seek(abs_start)
         chunk = self.f.read(abs_end - abs_start)
         self.position += len(chunk)
@@ -236,9 +470,14 @@ class SectionFileReader(io.IOBase):
         return self.position
 
     def close(self) -> None:
-        """关闭文件。"""
+        """关闭文件，共享的文件只在由读取器创建时关闭。"""
         if self.f is not None:
             self.f.close()
+            self.f = None
+        if self._owned and self.shared is not None:
+            self.shared.close()
+            self._owned = False
+        super().close()
 
     def __exit__(self, exc_type, exc_val, exc_tb) -> None:
         """退出上下文管理器。"""
@@ -262,47 +501,51 @@ class SectionDataReader(io.IOBase):
     """内存数据分段读取器，用于读取字节数据的指定区间。
 
     继承自 io.IOBase，实现了基本的数据读取接口。支持上下文管理器。
+    接受 bytes、bytearray、memoryview、mmap 等支持缓冲区协议的对象，read 返回不复制数据的
+    memoryview；读取器存在期间 bytearray 不能改变大小、mmap 不能关闭，关闭读取器后解除。
 
     Attributes:
-        data (bytes): 要读取的字节数据
+        data (memoryview): 要读取的数据（按字节展开）
         limit (Tuple[int, int]): 读取范围的起始和结束位置
         position (int): 当前相对于区间起始位置的偏移量
         stop_event (Optional[threading.Event]): 用于控制读取停止的事件对象
     """
 
-    def __init__(self, ctx: Ctx, data: bytes, limit: Tuple[int, int]) -> None:
+    def __init__(self, ctx: Ctx, data: Buffer, limit: Tuple[int, int]) -> None:
         """初始化内存数据分段读取器。
 
         Args:
-            data: 要读取的字节数据
+            data: 要读取的字节数据或缓冲区
             limit: 读取范围，格式为 (start, end)
             stop_event: 用于控制读取停止的事件对象
 
         Raises:
             ValueError: 当 limit 参数无效时抛出
-            TypeError: 当 data 不是字节类型时抛出
+            TypeError: 当 data 不是连续的缓冲区时抛出
         """
-        if not isinstance(data, bytes):
-            raise TypeError("data 必须是字节类型")
-
-        self.data = data
+        if not isinstance(limit, tuple) or len(limit) != 2:
+            raise ValueError("limit 必须是包含两个整数的元组")
+        try:
+            with memoryview(data) as view:
+                self.data = view.cast("B")
+        except TypeError as err:
+            raise TypeError("data 必须是字节类型或连续的缓冲区") from err
         self.limit = limit
         self.position = 0
         self.ctx = ctx
 
-        if not isinstance(limit, tuple) or len(limit) != 2:
-            raise ValueError("limit 必须是包含两个整数的元组")
-        if limit[0] < 0 or limit[0] >= limit[1] or limit[1] > len(data):
+        if limit[0] < 0 or limit[0] >= limit[1] or limit[1] > len(self.data):
+            self.data.release()
             raise ValueError("无效的 limit 范围")
 
-    def read(self, size: int = -1) -> bytes:
+    def read(self, size: int = -1) -> Union[bytes, memoryview]:
         """读取指定大小的数据。
 
         Args:
             size: 要读取的字节数，-1 表示读取到区间末尾
 
         Returns:
-            读取的数据
+            读取的数据，为不复制数据的 memoryview
 
         Raises:
             Exception: 当被标记停止读取时抛出
@@ -364,11 +607,14 @@ class SectionDataReader(io.IOBase):
         return self.position
 
     def close(self) -> None:
-        """关闭读取器（对于内存数据，这是一个空操作）。"""
-        pass
+        """关闭读取器，释放对数据的引用（已读取的 memoryview 仍然有效）。"""
+        # 构造时参数无效则没有 data，垃圾回收仍会调用 close
+        if hasattr(self, "data"):
+            self.data.release()
+        super().close()
 
-    def getMD5(self):
-        """计算当前区间数据的MD5值。
+    def getMD5(self) -> str:
+        """计算当前区间数据的MD5值（直接计算 memoryview，不复制数据）。
 
         Returns:
             MD5哈希值的十六进制字符串
@@ -415,3 +661,33 @@ class ApiResponseFailed(Exception):
             异常信息字符串
         """
         return f"[API响应失败|Code:{self.code}]:{self.message}"
+
+
+class DeadlineExceeded(TimeoutError):
+    """请求超过截止时间异常类。
+
+    当一次调用（含重试、退避与轮询）在截止时间内未能完成时抛出。
+
+    Attributes:
+        url: 超时的请求地址
+        elapsed: 从开始到放弃时经过的秒数
+    """
+
+    def __init__(self, url: str, elapsed: float) -> None:
+        """初始化异常对象。
+
+        Args:
+            url: 超时的请求地址
+            elapsed: 经过的秒数
+        """
+        super().__init__(url, elapsed)
+        self.url = url
+        self.elapsed = elapsed
+
+    def __str__(self) -> str:
+        """返回异常的字符串表示。
+
+        Returns:
+            异常信息字符串
+        """
+        return f"[请求超时|{self.elapsed:.1f}s]:{self.url}"
@@ -1,11 +1,15 @@
+import fnmatch
 import math
 import os
-import threading
 import time
-from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, List, Optional
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
 from x123pan.src.api import Access
+from x123pan.src.const import ConstAPI
+from x123pan.src.record import FileRecord, FileTable
+from x123pan.util.path import PathResolver
 
 
 def formatName(name: str) -> str:
@@ -39,7 +43,8 @@ def listMulti(
     orderDirection: str = "asc",
     trashed: bool = False,
     searchData: Optional[str] = None,
-) -> List[Dict]:
+    compact: bool = False,
+) -> Union[List[Dict], FileTable]:
     """多线程获取文件列表。
 
     Args:
@@ -51,27 +56,82 @@ def listMulti(
         orderDirection: 排序方向，默认为'asc'
         trashed: 是否包含回收站文件，默认为False
         searchData: 搜索数据，默认为None
+        compact: 是否返回按列存储的 FileTable 代替字典列表，大量文件时显著节省内存，默认为False
 
     Returns:
-        文件列表
+        按页码顺序排列的文件列表
     """
-    from x123pan.src.const import ConstAPI
+    res: Union[List[Any], FileTable] = FileTable() if compact else []
+    for fileList in listMultiIter(
+        access, parentFileId, page, limit, orderBy, orderDirection, trashed, searchData
+    ):
+        res.extend(fileList)
+    return res
+
+
+def listMultiIter(
+    access: Access,
+    parentFileId: int = 0,
+    page: int = 1,
+    limit: int = 100,
+    orderBy: str = "file_name",
+    orderDirection: str = "asc",
+    trashed: bool = False,
+    searchData: Optional[str] = None,
+    workers: int = 0,
+    window: int = 0,
+    compact: bool = False,
+) -> Iterator[List[Union[Dict, FileRecord]]]:
+    """多线程获取文件列表，按页码顺序逐页生成。
+
+    第一页返回后根据 total 计算总页数，其余页在线程池中并发获取，
+    最多提前获取 window 页，按页码顺序交给调用方，后面的页在处理前面的页时继续下载。
+
+    Args:
+        access: Access对象
+        parentFileId: 父文件夹ID，默认为0（根目录）
+        page: 起始页码，默认为1
+        limit: 每页数量，默认为100
+        orderBy: 排序字段，默认为'file_name'
+        orderDirection: 排序方向，默认为'asc'
+        trashed: 是否包含回收站文件，默认为False
+        searchData: 搜索数据，默认为None
+        workers: 并发线程数，默认为 FILE_LIST 的 QPS
+        window: 最多缓存的未交付页数，默认为 workers 的两倍
+        compact: 是否以紧凑的 FileRecord 代替字典（在工作线程中转换），默认为False
+
+    Yields:
+        每页的文件列表
+    """
+
+    def convert(fileList: List[Any]) -> List[Union[Dict, FileRecord]]:
+        return [FileRecord.from_dict(i) for i in fileList] if compact else fileList
+
+    def fetch(p: int) -> List[Union[Dict, FileRecord]]:
+        return convert(
+            access.file.list(parentFileId, p, limit, orderBy, orderDirection, trashed, searchData)[
+                "fileList"
+            ]
+        )
 
     resp = access.file.list(parentFileId, page, limit, orderBy, orderDirection, trashed, searchData)
-    res = resp["fileList"]
-    total = resp["total"]
-    lock = threading.Lock()
-
-    def f(p: int) -> None:
-        r = access.file.list(
-            parentFileId, p + 1, limit, orderBy, orderDirection, trashed, searchData
-        )["fileList"]
-        with lock:
-            res.extend(r)
-
-    with ThreadPoolExecutor(max_workers=ConstAPI.FILE_LIST.qps) as executor:
-        executor.map(f, range(1, math.ceil(total / 100)))
-    return res
+    yield convert(resp["fileList"])
+    last = math.ceil(resp["total"] / limit)
+    workers = workers or ConstAPI.FILE_LIST.qps or 8
+    window = max(window or workers * 2, 1)
+    pending: Deque[Any] = deque()
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        nxt = page + 1
+        while nxt <= last or pending:
+            while nxt <= last and len(pending) < window:
+                pending.append(executor.submit(fetch, nxt))
+                nxt += 1
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
 
 
 def createPath(access: Access, path: str) -> int:
@@ -163,19 +223,129 @@ def copy(access: Access, sourceId: int, descId: int, check: bool = True) -> None
             raise Exception("未知类型")
 
 
-def get_path(access: Access, fid: int) -> str:
+def get_path(access: Access, fid: int, resolver: Optional[PathResolver] = None) -> str:
     """获取文件或目录的完整路径。
 
     Args:
         access: Access对象
         fid: 文件/目录ID
+        resolver: 共享的路径解析器，传入后复用其缓存的上级目录，默认为None
 
     Returns:
         完整路径字符串
+
+    Raises:
+        ValueError: 当文件或其上级目录不存在时抛出
+    """
+    if resolver is None:
+        resolver = PathResolver(access, listen=False)
+    path = resolver.path(fid)
+    if path is None:
+        raise ValueError(f"文件不存在: {fid}")
+    return path
+
+
+def _match(name: str, patterns: Sequence[str] = ()) -> bool:
+    """判断名称是否匹配任一通配符模式，没有模式时不匹配。"""
+    return any(fnmatch.fnmatchcase(name, p) for p in patterns)
+
+
+def walk(
+    access: Access,
+    rootId: int = 0,
+    maxdepth: Optional[int] = None,
+    include: Union[str, Sequence[str], None] = None,
+    exclude: Union[str, Sequence[str], None] = None,
+    trashed: bool = False,
+    workers: int = 0,
+    max_frontier: int = 10000,
+) -> Iterator[Tuple[str, List[Dict[str, Any]], List[Dict[str, Any]]]]:
+    """并发递归遍历目录。
+
+    按广度优先用线程池并发列出多个目录，线程数默认与 FILE_LIST_V2 的 QPS 相同，
+    每收到一页就生成一个 (dirpath, dirs, files) 元组，因此一个目录可能对应多个元组。
+    与 os.walk 相同，可以原地修改 dirs 列表来跳过部分子目录。
+    各页通过 file.list_pages 获取，开启缓存或搜索索引时与 list_v2 同样读写缓存、更新索引。
+
+    Args:
+        access: Access对象
+        rootId: 起始目录ID，默认为0（根目录）
+        maxdepth: 最大深度，起始目录为0，None表示不限制
+        include: 文件名通配符（或列表），只返回匹配的文件，不影响目录遍历
+        exclude: 文件名通配符（或列表），匹配的文件和目录（及其子目录）都会被跳过
+        trashed: 是否包含回收站文件，默认为False
+        workers: 并发线程数，默认为 FILE_LIST_V2 的 QPS
+        max_frontier: 待遍历目录数上限，达到后暂停获取已列出目录的后续页，
+            并优先深入最新发现的目录，使待遍历队列最多超出上限每层一页的目录数
+
+    Yields:
+        (dirpath, dirs, files) 元组，dirpath 为相对起始目录的路径（起始目录为 "/"），
+        dirs 和 files 为该页中的目录和文件信息
+    """
+    includes: Sequence[str] = [include] if isinstance(include, str) else include or ()
+    excludes: Sequence[str] = [exclude] if isinstance(exclude, str) else exclude or ()
+    for _, path, depth, page, children in _walk_pages(
+        access, [(rootId, "/")], workers, max_frontier
+    ):
+        dirs, files = [], []
+        for item in page:
+            if (item["trashed"] and not trashed) or _match(item["filename"], excludes):
+                continue
+            if item["type"] == 1:
+                dirs.append(item)
+            elif not includes or _match(item["filename"], includes):
+                files.append(item)
+        yield path, dirs, files
+        if maxdepth is None or depth < maxdepth:
+            children.extend((d["fileId"], path.rstrip("/") + "/" + d["filename"]) for d in dirs)
+
+
+# 正在列出的目录：(目录ID, 分页迭代器, 路径, 深度)
+_Task = Tuple[int, Iterator[List[Dict[str, Any]]], str, int]
+
+
+def _walk_pages(
+    access: Access,
+    roots: Iterable[Tuple[int, str]],
+    workers: int = 0,
+    max_frontier: int = 10000,
+) -> Iterator[Tuple[int, str, int, List[Dict[str, Any]], List[Tuple[int, str]]]]:
+    """walk 的并发调度：按页生成 (目录ID, 路径, 深度, 原始文件列表, 子目录列表)。
+
+    子目录列表初始为空，调用方在取下一项之前向其中追加需要继续遍历的 (目录ID, 路径)，
+    未追加的子目录不会被列出。文件列表未经过滤（包含回收站文件）。
     """
-    path = []
-    while fid != 0:
-        data = access.file.detail(fid)
-        fid = data["parentFileID"]
-        path.append(data["filename"])
-    return "/" + "/".join(path[::-1])
+    workers = workers or ConstAPI.FILE_LIST_V2.qps or 8
+    # 尚未开始列出的目录：(目录ID, 路径, 深度)
+    frontier: Deque[Tuple[int, str, int]] = deque((dirId, path, 0) for dirId, path in roots)
+    # 已开始列出、等待获取下一页的目录
+    paused: List[_Task] = []
+    running: Dict[Future, _Task] = {}
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        while frontier or paused or running:
+            while len(running) < workers and (frontier or paused):
+                if paused and (not frontier or len(frontier) < max_frontier):
+                    task = paused.pop()
+                else:
+                    full = len(frontier) >= max_frontier
+                    dirId, path, depth = frontier.pop() if full else frontier.popleft()
+                    task = (dirId, access.file.list_pages(dirId), path, depth)
+                # 同一目录的下一页只在上一页返回后提交，分页迭代器不会被并发推进
+                running[executor.submit(next, task[1], None)] = task
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                task = running.pop(future)
+                page = future.result()
+                if page is None:
+                    continue
+                paused.append(task)
+                dirId, _, path, depth = task
+                children: List[Tuple[int, str]] = []
+                yield dirId, path, depth, page, children
+                frontier.extend((sub, subpath, depth + 1) for sub, subpath in children)
+    finally:
+        # 提前停止迭代时取消尚未开始的请求，不等待正在进行的请求
+        for future in running:
+            future.cancel()
+        executor.shutdown(wait=False)
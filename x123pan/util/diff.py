@@ -0,0 +1,273 @@
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from x123pan.src.api import Access
+from x123pan.src.record import FileRecord
+from x123pan.src.type import Mutation
+from x123pan.util.snapshot import Snapshot, dump
+
+Item = Union[Dict[str, Any], FileRecord]
+
+
+@dataclass
+class Change:
+    """文件变化。
+
+    Attributes:
+        kinds: 变化类型，可以同时包含多个：
+            "added"、"removed"、"replaced"（同一目录下同名文件的 fileId 改变）、
+            "moved"、"renamed"、"modified"（etag 或 size 改变）、"trashed"、"recovered"
+        old: 旧记录，新增时为None
+        new: 新记录，删除时为None
+    """
+
+    kinds: Tuple[str, ...]
+    old: Optional[FileRecord] = None
+    new: Optional[FileRecord] = None
+
+    @property
+    def fileId(self) -> int:
+        """变化后（删除时为变化前）的文件ID。"""
+        record = self.new if self.new is not None else self.old
+        assert record is not None
+        return record.fileId
+
+
+def _record(item: Item) -> FileRecord:
+    """统一转换为 FileRecord。"""
+    return item if isinstance(item, FileRecord) else FileRecord.from_dict(item)
+
+
+def compare(old: FileRecord, new: FileRecord) -> Tuple[str, ...]:
+    """比较同一 fileId 的新旧记录。
+
+    Returns:
+        变化类型元组，没有变化时为空
+    """
+    kinds = []
+    if old.parentFileId != new.parentFileId:
+        kinds.append("moved")
+    if old.filename != new.filename:
+        kinds.append("renamed")
+    if old.etag != new.etag or old.size != new.size:
+        kinds.append("modified")
+    if old.trashed != new.trashed:
+        kinds.append("trashed" if new.trashed else "recovered")
+    return tuple(kinds)
+
+
+def _pair(removed: List[FileRecord], added: List[FileRecord]) -> Iterator[Change]:
+    """将同一目录下同名的删除与新增配对为 replaced，其余照常输出。"""
+    slots: Dict[Tuple[int, str], List[FileRecord]] = {}
+    for record in removed:
+        slots.setdefault((record.parentFileId, record.filename), []).append(record)
+    for record in added:
+        olds = slots.get((record.parentFileId, record.filename))
+        if olds:
+            yield Change(("replaced",), olds.pop(), record)
+        else:
+            yield Change(("added",), None, record)
+    for olds in slots.values():
+        for record in olds:
+            yield Change(("removed",), record, None)
+
+
+def _sorted(items: Iterable[Item], name: str) -> Iterator[FileRecord]:
+    """逐个转换并校验按 fileId 升序。"""
+    last = None
+    for item in items:
+        record = _record(item)
+        if last is not None and record.fileId <= last:
+            raise ValueError(f"{name} 未按 fileId 升序排列: {record.fileId} <= {last}")
+        last = record.fileId
+        yield record
+
+
+def diff(old: Iterable[Item], new: Iterable[Item]) -> Iterator[Change]:
+    """比较两份按 fileId 升序排列的清单（如两个 Snapshot）。
+
+    以归并方式同时遍历两份清单，线性时间完成；只有新增与删除的记录需要保留到最后，
+    用于按 (parentFileId, filename) 识别被替换的文件，内存与变化数量成正比而与清单大小无关。
+
+    Args:
+        old: 旧清单，按 fileId 升序
+        new: 新清单，按 fileId 升序
+
+    Yields:
+        Change 对象，同一 fileId 的变化先输出，新增、删除与替换最后输出
+
+    Raises:
+        ValueError: 清单未按 fileId 升序排列时抛出
+    """
+    olds, news = _sorted(old, "old"), _sorted(new, "new")
+    removed: List[FileRecord] = []
+    added: List[FileRecord] = []
+    a, b = next(olds, None), next(news, None)
+    while a is not None or b is not None:
+        if b is None or (a is not None and a.fileId < b.fileId):
+            removed.append(a)  # type: ignore[arg-type]
+            a = next(olds, None)
+        elif a is None or b.fileId < a.fileId:
+            added.append(b)
+            b = next(news, None)
+        else:
+            kinds = compare(a, b)
+            if kinds:
+                yield Change(kinds, a, b)
+            a, b = next(olds, None), next(news, None)
+    yield from _pair(removed, added)
+
+
+class ChangeTracker:
+    """收集本客户端修改过的目录，供 diff_live 只重新列出这些目录。
+
+    注册为 Access 的变更监听器，被修改文件在快照中所在的目录、事件给出的目录都会被记录；
+    所在目录未知的文件（如 containDir 上传）记录其ID，diff_live 会查询其当前所在目录。
+
+    Attributes:
+        dirs: 可能发生变化的目录ID
+        fileIds: 所在目录未知的文件ID
+    """
+
+    def __init__(self, access: Access, snapshot: Snapshot) -> None:
+        """初始化并注册监听。
+
+        Args:
+            access: Access对象
+            snapshot: 作为比较基准的快照
+        """
+        self.access = access
+        self.snapshot = snapshot
+        self.dirs: Set[int] = set()
+        self.fileIds: Set[int] = set()
+        access.add_listener(self.on_mutation)
+
+    def close(self) -> None:
+        """注销监听。"""
+        self.access.remove_listener(self.on_mutation)
+
+    def on_mutation(self, mutation: Mutation) -> None:
+        """变更监听器。"""
+        self.dirs.update(mutation.parentIDs or ())
+        for fileId in mutation.fileIDs:
+            record = self.snapshot.find(fileId)
+            if record is not None:
+                self.dirs.add(record.parentFileId)
+            elif mutation.parentIDs is None:
+                self.fileIds.add(fileId)
+
+
+def _descendants(snapshot: Snapshot, dirIds: Set[int]) -> List[FileRecord]:
+    """扫描快照获取目录的全部子孙（每层扫描一次）。"""
+    found: List[FileRecord] = []
+    frontier = set(dirIds)
+    while frontier:
+        level = set()
+        for index, row in enumerate(snapshot.scan()):
+            if row[1] in frontier:
+                record = snapshot[index]
+                found.append(record)
+                if record.type == 1:
+                    level.add(record.fileId)
+        frontier = level
+    return found
+
+
+def diff_live(
+    access: Access,
+    snapshot: Snapshot,
+    dirs: Optional[Iterable[int]] = None,
+    fileIds: Iterable[int] = (),
+    rootId: int = 0,
+    trashed: bool = True,
+) -> Iterator[Change]:
+    """比较快照与当前账号。
+
+    给出 dirs（如 ChangeTracker.dirs）时只重新列出这些目录以及其中新出现的子目录：
+    从这些目录移走的文件用 file.infos 查询去向，查不到的视为删除（目录连同快照中的子孙）。
+    不给出 dirs 时完整遍历 rootId 下的目录树写入临时快照，再与 snapshot 归并比较。
+
+    Args:
+        access: Access对象
+        snapshot: 作为比较基准的快照
+        dirs: 需要重新列出的目录ID，None表示完整遍历
+        fileIds: 所在目录未知、需要查询的文件ID（如 ChangeTracker.fileIds）
+        rootId: 完整遍历时的起始目录ID，默认为0（根目录）
+        trashed: 是否列出回收站中的文件，应与生成 snapshot 时的设置一致，默认为True
+
+    Yields:
+        Change 对象
+    """
+    if dirs is None:
+        fd, path = tempfile.mkstemp(suffix=".snap")
+        os.close(fd)
+        try:
+            dump(access, path, rootId, trashed)
+            with Snapshot(path) as snap:
+                yield from diff(snapshot, snap)
+        finally:
+            os.remove(path)
+        return
+    pending = set(dirs)
+    for info in map(_record, access.file.infos(list(fileIds), compact=True)):
+        pending.add(info.parentFileId)
+    # 快照中这些目录下的旧记录（一次扫描）
+    old: Dict[int, FileRecord] = {}
+    for index, row in enumerate(snapshot.scan()):
+        if row[1] in pending:
+            old[row[0]] = snapshot[index]
+    live: Dict[int, FileRecord] = {}
+    listed: Set[int] = set()
+    while pending:
+        dirId = pending.pop()
+        listed.add(dirId)
+        for record in map(_record, access.file.list_v2(dirId, trashed=trashed, compact=True)):
+            live[record.fileId] = record
+            # 快照中没有的子目录是新出现的，其内容也需要列出
+            isNew = record.type == 1 and record.fileId not in listed
+            if isNew and snapshot.find(record.fileId) is None:
+                pending.add(record.fileId)
+    # 从列出的目录移走的文件：查询去向
+    gone = [fileId for fileId in old if fileId not in live]
+    for info in map(_record, access.file.infos(gone, compact=True) if gone else ()):
+        live[info.fileId] = info
+    removed: List[FileRecord] = []
+    added: List[FileRecord] = []
+    removed_dirs: Set[int] = set()
+    for fileId, record in old.items():
+        current = live.get(fileId)
+        if current is None:
+            removed.append(record)
+            if record.type == 1:
+                removed_dirs.add(fileId)
+            continue
+        kinds = compare(record, current)
+        if kinds:
+            yield Change(kinds, record, current)
+    for fileId, record in live.items():
+        if fileId in old:
+            continue
+        previous = snapshot.find(fileId)
+        if previous is None:
+            added.append(record)
+        else:
+            kinds = compare(previous, record)
+            if kinds:
+                yield Change(kinds, previous, record)
+    removed += [
+        r
+        for r in _descendants(snapshot, removed_dirs)
+        if r.fileId not in old and r.fileId not in live
+    ]
+    yield from _pair(removed, added)
+
+
+def summary(changes: Iterable[Change]) -> Dict[str, int]:
+    """统计各类变化的数量。"""
+    counts: Dict[str, int] = {}
+    for change in changes:
+        for kind in change.kinds:
+            counts[kind] = counts.get(kind, 0) + 1
+    return counts
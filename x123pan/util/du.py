@@ -0,0 +1,240 @@
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from x123pan.src.api import Access
+from x123pan.src.const import ConstAPI
+from x123pan.src.type import Mutation
+from x123pan.util.all import _walk_pages
+
+# 目录直接包含的内容：(文件总大小, 文件数, 子目录ID)
+Listing = Tuple[int, int, Tuple[int, ...]]
+
+
+@dataclass(frozen=True)
+class Usage:
+    """目录占用统计（不含回收站中的文件）。
+
+    Attributes:
+        size: 目录下全部文件的总大小（字节）
+        files: 目录下的文件数
+        dirs: 目录下的子目录数（不含目录本身）
+    """
+
+    size: int = 0
+    files: int = 0
+    dirs: int = 0
+
+    def __add__(self, other: "Usage") -> "Usage":
+        """合并两个统计。"""
+        return Usage(self.size + other.size, self.files + other.files, self.dirs + other.dirs)
+
+
+class DiskUsage:
+    """并发统计目录占用并按目录缓存小计。
+
+    每个目录缓存直接包含的内容与整个子树的小计，统计父目录时直接使用已缓存的子目录小计，
+    只列出缺少缓存的目录，多个目录一起统计时共同的子树只遍历一次。
+    目录与 util.all.walk 使用相同的调度并发列出，线程数默认为 FILE_LIST_V2 的 QPS。
+
+    默认注册为 Access 的变更监听器，本客户端修改文件后失效所在目录的内容及其全部上级目录的小计
+    （重命名不影响占用，不会失效缓存）；无法确定受影响的目录时清空全部缓存。
+
+    Attributes:
+        access: Access对象
+        workers: 并发列出目录的线程数
+    """
+
+    def __init__(self, access: Access, workers: int = 0, listen: bool = True) -> None:
+        """初始化统计器。
+
+        Args:
+            access: Access对象
+            workers: 并发列出目录的线程数，默认为 FILE_LIST_V2 的 QPS
+            listen: 是否注册变更监听，默认为True
+        """
+        self.access = access
+        self.workers = workers or ConstAPI.FILE_LIST_V2.qps or 8
+        self._lock = threading.Lock()
+        self._listings: Dict[int, Listing] = {}
+        self._totals: Dict[int, Usage] = {}
+        # fileId -> parentFileId，用于变更时找到所在目录及其上级目录
+        self._parents: Dict[int, int] = {}
+        self._generation = 0
+        self._listening = listen
+        if listen:
+            access.add_listener(self.invalidate)
+
+    def close(self) -> None:
+        """注销变更监听。"""
+        if self._listening:
+            self.access.remove_listener(self.invalidate)
+            self._listening = False
+
+    def usage(self, dirId: int = 0) -> Usage:
+        """统计目录占用。
+
+        Args:
+            dirId: 目录ID，默认为0（根目录）
+
+        Returns:
+            Usage 对象
+        """
+        return self.usage_many([dirId])[dirId]
+
+    def usage_many(self, dirIds: Iterable[int]) -> Dict[int, Usage]:
+        """批量统计目录占用。
+
+        先并发列出所有目录下缺少缓存的目录，再自底向上汇总小计。
+
+        Args:
+            dirIds: 目录ID列表
+
+        Returns:
+            {目录ID: Usage} 字典
+        """
+        dirIds = list(dirIds)
+        with self._lock:
+            generation = self._generation
+            totals = {d: self._totals[d] for d in dirIds if d in self._totals}
+        if len(totals) == len(set(dirIds)):
+            return totals
+        listings = self._collect([d for d in dirIds if d not in totals], totals)
+        # 后序遍历，子目录先于父目录汇总；(目录ID, 子目录是否已入栈)
+        computed: Dict[int, Usage] = {}
+        stack = [(d, False) for d in dirIds if d not in totals]
+        while stack:
+            dirId, expanded = stack.pop()
+            if dirId in computed or dirId in totals:
+                continue
+            size, files, subdirs = listings[dirId]
+            if not expanded:
+                stack.append((dirId, True))
+                stack.extend((sub, False) for sub in subdirs)
+                continue
+            total = Usage(size, files, len(subdirs))
+            for sub in subdirs:
+                total += totals.get(sub) or computed[sub]
+            computed[dirId] = total
+        with self._lock:
+            # 统计期间收到过变更事件时不缓存结果，但仍返回给调用方
+            if generation == self._generation:
+                self._totals.update(computed)
+        totals.update(computed)
+        return {d: totals[d] for d in dirIds}
+
+    def _collect(self, dirIds: List[int], totals: Dict[int, Usage]) -> Dict[int, Listing]:
+        """用 walk 的调度并发列出目录树中缺少缓存的目录，已有小计的子树不再深入。
+
+        只读取这些目录的子树用到的缓存项：小计写入 totals，返回子树中各目录直接包含的内容。
+        """
+        with self._lock:
+            generation = self._generation
+        listings: Dict[int, Listing] = {}
+        seen: Set[int] = set()
+
+        def expand(dirId: int) -> List[Tuple[int, str]]:
+            """沿已缓存的内容向下展开，返回需要列出的目录。"""
+            missing, stack = [], [dirId]
+            with self._lock:
+                while stack:
+                    current = stack.pop()
+                    if current in seen:
+                        continue
+                    seen.add(current)
+                    if current in self._totals:
+                        totals[current] = self._totals[current]
+                    elif current in self._listings:
+                        listings[current] = self._listings[current]
+                        stack.extend(listings[current][2])
+                    else:
+                        missing.append((current, ""))
+            return missing
+
+        roots = [task for dirId in dirIds for task in expand(dirId)]
+        # 列出中的目录：[文件总大小, 文件数, 子目录ID]
+        fetched: Dict[int, Tuple[int, int, List[int]]] = {}
+        parents: Dict[int, int] = {}
+        for dirId, _, _, page, children in _walk_pages(self.access, roots, self.workers):
+            size, files, subdirs = fetched.get(dirId, (0, 0, []))
+            for item in page:
+                parents[item["fileId"]] = dirId
+                if item["trashed"]:
+                    continue
+                if item["type"] == 1:
+                    subdirs.append(item["fileId"])
+                    children += expand(item["fileId"])
+                else:
+                    size += item["size"]
+                    files += 1
+            fetched[dirId] = (size, files, subdirs)
+        new = {
+            dirId: (size, files, tuple(subdirs))
+            for dirId, (size, files, subdirs) in fetched.items()
+        }
+        with self._lock:
+            self._parents.update(parents)
+            if generation == self._generation:
+                self._listings.update(new)
+        listings.update(new)
+        return listings
+
+    def invalidate(self, mutation: Mutation) -> None:
+        """处理变更事件，失效受影响目录的内容及其全部上级目录的小计。
+
+        Args:
+            mutation: 变更事件
+        """
+        if mutation.kind in ("name", "rename"):
+            return
+        with self._lock:
+            self._generation += 1
+            dirs = set(mutation.parentIDs or ())
+            target = mutation.parentIDs[0] if mutation.parentIDs else None
+            for fileID in mutation.fileIDs:
+                parent = self._parents.get(fileID)
+                if parent is not None:
+                    dirs.add(parent)
+                elif mutation.parentIDs is None:
+                    self._listings.clear()
+                    self._totals.clear()
+                    return
+                if mutation.kind == "delete":
+                    self._parents.pop(fileID, None)
+                    self._listings.pop(fileID, None)
+                    self._totals.pop(fileID, None)
+                elif target is not None:
+                    self._parents[fileID] = target
+            for dirId in dirs:
+                self._listings.pop(dirId, None)
+                self._drop(dirId)
+
+    def _drop(self, dirId: Optional[int]) -> None:
+        """失效目录及其全部上级目录的小计（调用方需持有锁）。"""
+        seen: Set[int] = set()
+        while dirId is not None and dirId not in seen:
+            seen.add(dirId)
+            self._totals.pop(dirId, None)
+            dirId = self._parents.get(dirId)
+
+    def clear(self) -> None:
+        """清空全部缓存。"""
+        with self._lock:
+            self._generation += 1
+            self._listings.clear()
+            self._totals.clear()
+            self._parents.clear()
+
+
+def du(access: Access, dirId: int = 0, workers: int = 0) -> Usage:
+    """并发统计单个目录的占用（不缓存）。
+
+    Args:
+        access: Access对象
+        dirId: 目录ID，默认为0（根目录）
+        workers: 并发列出目录的线程数，默认为 FILE_LIST_V2 的 QPS
+
+    Returns:
+        Usage 对象
+    """
+    return DiskUsage(access, workers, listen=False).usage(dirId)
@@ -0,0 +1,434 @@
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from x123pan.src.api import Access
+from x123pan.src.const import ConstAPI
+from x123pan.src.type import ApiResponseFailed, Mutation
+from x123pan.util.all import walk
+
+# 索引中保存的文件字段（与 list_v2 返回的字段名一致）
+FIELDS = ("fileId", "parentFileId", "filename", "type", "etag", "size", "trashed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    fileId INTEGER PRIMARY KEY,
+    parentFileId INTEGER NOT NULL,
+    filename TEXT NOT NULL,
+    type INTEGER NOT NULL,
+    etag TEXT,
+    size INTEGER,
+    trashed INTEGER NOT NULL DEFAULT 0,
+    synced INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS files_parent ON files (parentFileId, filename);
+CREATE INDEX IF NOT EXISTS files_etag ON files (etag);
+CREATE TABLE IF NOT EXISTS stale (dirId INTEGER PRIMARY KEY, marked INTEGER NOT NULL DEFAULT 0);
+CREATE TABLE IF NOT EXISTS pending (fileId INTEGER PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+# 目录 ? 下所有子孙目录（含自身）
+_SUBTREE = """
+WITH RECURSIVE sub(id) AS (
+    SELECT ?
+    UNION ALL
+    SELECT f.fileId FROM files f JOIN sub ON f.parentFileId = sub.id WHERE f.type = 1
+)
+"""
+
+
+class TreeIndex:
+    """远程目录树的本地 SQLite 镜像。
+
+    首次调用 crawl 完整遍历目录树并写入数据库，之后通过 refresh 只重新列出
+    被本 Access 修改过（通过变更监听自动标记）或被 mark_stale 标记的目录。
+    按ID、路径、etag 的查询都在本地完成，不再请求接口。
+
+    每次写入都会记录同步批次号，重新列出目录后，未出现在新结果中的旧文件
+    （及其子孙）会被删除。待同步标记同样记录标记时的批次号，同步只清除开始前的标记，
+    同步期间产生的标记保留到下一次 refresh。
+
+    Attributes:
+        access: Access对象
+        database: 数据库文件路径，":memory:" 表示内存数据库
+    """
+
+    def __init__(self, access: Access, database: str, listen: bool = True) -> None:
+        """初始化索引。
+
+        Args:
+            access: Access对象
+            database: 数据库文件路径，":memory:" 表示内存数据库
+            listen: 是否注册变更监听，自动标记被修改的目录，默认为True
+        """
+        self.access = access
+        self.database = database
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(database, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._listening = listen
+        if listen:
+            access.add_listener(self.on_mutation)
+
+    def close(self) -> None:
+        """注销监听并关闭数据库。"""
+        if self._listening:
+            self.access.remove_listener(self.on_mutation)
+            self._listening = False
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> "TreeIndex":
+        """进入上下文管理器。"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        """退出上下文管理器。"""
+        self.close()
+
+    def _generation(self) -> int:
+        """获取新的同步批次号（调用方需持有锁）。"""
+        self._db.execute(
+            "INSERT INTO meta VALUES ('generation', 1) "
+            "ON CONFLICT(key) DO UPDATE SET value = value + 1"
+        )
+        return int(
+            self._db.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()[0]
+        )
+
+    def _upsert(self, items: Iterable[Dict[str, Any]], generation: int) -> None:
+        """写入文件信息（调用方需持有锁并处于事务中）。"""
+        self._db.executemany(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    i["fileId"],
+                    i["parentFileId"],
+                    i["filename"],
+                    i["type"],
+                    i.get("etag"),
+                    i.get("size"),
+                    i.get("trashed", 0),
+                    generation,
+                )
+                for i in items
+            ),
+        )
+
+    def _write(self, items: List[Dict[str, Any]], generation: int) -> int:
+        """在一个事务中写入一批文件信息。"""
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._upsert(items, generation)
+            self._db.execute("COMMIT")
+        return len(items)
+
+    def crawl(self, rootId: int = 0, workers: int = 0, batch_size: int = 10000) -> int:
+        """完整遍历目录树并写入索引。
+
+        遍历完成后删除该目录下本次未出现的旧记录，并清除其中目录在遍历开始前的待同步标记。
+
+        Args:
+            rootId: 起始目录ID，默认为0（根目录）
+            workers: 并发线程数，默认为 FILE_LIST_V2 的 QPS
+            batch_size: 每个事务写入的记录数，默认为10000
+
+        Returns:
+            写入的文件数
+        """
+        with self._lock:
+            generation = self._generation()
+        count = 0
+        batch: List[Dict[str, Any]] = []
+        for _, dirs, files in walk(self.access, rootId, trashed=True, workers=workers):
+            batch += dirs
+            batch += files
+            if len(batch) >= batch_size:
+                count += self._write(batch, generation)
+                batch = []
+        count += self._write(batch, generation)
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.execute(
+                _SUBTREE + "DELETE FROM files WHERE synced < ? AND parentFileId IN sub",
+                (rootId, generation),
+            )
+            self._db.execute(
+                _SUBTREE + "DELETE FROM stale WHERE dirId IN sub AND marked < ?",
+                (rootId, generation),
+            )
+            self._db.execute("COMMIT")
+        return count
+
+    def sync_dir(self, dirId: int) -> int:
+        """重新列出单个目录并更新索引。
+
+        目录中不再存在的文件连同其子孙一并删除，新出现的子目录会被标记为待同步。
+
+        Args:
+            dirId: 目录ID
+
+        Returns:
+            目录中的文件数
+        """
+        with self._lock:
+            generation = self._generation()
+        items: List[Dict[str, Any]] = []
+        lastFileId = 0
+        while lastFileId != -1:
+            resp = self.access.request(
+                ConstAPI.FILE_LIST_V2,
+                {"parentFileId": dirId, "limit": 100, "lastFileId": lastFileId},
+            )
+            items.extend(resp["fileList"])
+            lastFileId = resp["lastFileId"]
+        with self._lock:
+            self._db.execute("BEGIN")
+            # 新出现的子目录（如从其它位置移入）需要继续列出
+            dirIds = [i["fileId"] for i in items if i["type"] == 1]
+            known: Set[int] = set()
+            for start in range(0, len(dirIds), 500):
+                chunk = dirIds[start : start + 500]
+                known.update(
+                    r[0]
+                    for r in self._db.execute(
+                        f"SELECT fileId FROM files WHERE fileId IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    )
+                )
+            self.mark_stale(i for i in dirIds if i not in known)
+            self._upsert(items, generation)
+            self._db.execute(
+                """
+                WITH RECURSIVE gone(id) AS (
+                    SELECT fileId FROM files WHERE parentFileId = ? AND synced < ?
+                    UNION ALL
+                    SELECT f.fileId FROM files f JOIN gone ON f.parentFileId = gone.id
+                )
+                DELETE FROM files WHERE fileId IN gone
+                """,
+                (dirId, generation),
+            )
+            self._db.execute(
+                "DELETE FROM stale WHERE dirId = ? AND marked < ?", (dirId, generation)
+            )
+            self._db.execute("COMMIT")
+        return len(items)
+
+    def mark_stale(self, dirIds: Iterable[int]) -> None:
+        """标记目录需要重新列出。
+
+        标记记录当前的同步批次号，已标记的目录更新为当前批次号。
+
+        Args:
+            dirIds: 目录ID列表
+        """
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO stale SELECT ?, "
+                "COALESCE((SELECT value FROM meta WHERE key = 'generation'), 0)",
+                ((i,) for i in dirIds),
+            )
+
+    def on_mutation(self, mutation: Mutation) -> None:
+        """变更监听器：标记受影响的目录。
+
+        被修改文件原来所在的目录、事件给出的目录以及被修改的目录本身都会被标记；
+        事件未给出目录且索引中也没有该文件时，记录文件ID，在 refresh 时查询其所在目录
+        （删除与移入回收站除外）。
+
+        Args:
+            mutation: 变更事件
+        """
+        with self._lock:
+            dirs = set(mutation.parentIDs or ())
+            for fileID in mutation.fileIDs:
+                row = self._db.execute(
+                    "SELECT parentFileId, type FROM files WHERE fileId = ?", (fileID,)
+                ).fetchone()
+                if row is not None:
+                    dirs.add(row["parentFileId"])
+                    if row["type"] == 1:
+                        dirs.add(fileID)
+                elif mutation.parentIDs is None and mutation.kind not in ("trash", "delete"):
+                    # 索引中没有的文件被删除或移入回收站不影响已索引的目录，且已无法查询所在目录
+                    self._db.execute("INSERT OR IGNORE INTO pending VALUES (?)", (fileID,))
+            self.mark_stale(dirs)
+
+    def stale_dirs(self) -> List[int]:
+        """获取待重新列出的目录ID。"""
+        with self._lock:
+            return [r[0] for r in self._db.execute("SELECT dirId FROM stale")]
+
+    def refresh(self) -> int:
+        """增量同步：重新列出所有被标记的目录。
+
+        Returns:
+            重新列出的目录数
+        """
+        with self._lock:
+            pending = [r[0] for r in self._db.execute("SELECT fileId FROM pending")]
+        for fileID in pending:
+            # 沿父目录向上查找，直到遇到索引中已有的目录，路径上的目录都需要重新列出
+            dirs, current = [], fileID
+            try:
+                while True:
+                    parent = self.access.file.detail(current)["parentFileID"]
+                    dirs.append(parent)
+                    if parent == 0 or self.get(parent) is not None:
+                        break
+                    current = parent
+            except ApiResponseFailed:
+                # 文件或其上级目录已被永久删除，已找到的目录仍需重新列出
+                pass
+            self.mark_stale(dirs)
+            with self._lock:
+                self._db.execute("DELETE FROM pending WHERE fileId = ?", (fileID,))
+        count = 0
+        while True:
+            dirs = self.stale_dirs()
+            if not dirs:
+                return count
+            for dirId in dirs:
+                self.sync_dir(dirId)
+                count += 1
+
+    @staticmethod
+    def _record(row: sqlite3.Row) -> Dict[str, Any]:
+        """将数据库行转换为文件信息字典。"""
+        return {k: row[k] for k in FIELDS}
+
+    def get(self, fileId: int) -> Optional[Dict[str, Any]]:
+        """按ID查询文件信息。
+
+        Args:
+            fileId: 文件ID
+
+        Returns:
+            文件信息，不存在返回None
+        """
+        with self._lock:
+            row = self._db.execute("SELECT * FROM files WHERE fileId = ?", (fileId,)).fetchone()
+        return self._record(row) if row is not None else None
+
+    def children(self, parentFileId: int, trashed: bool = False) -> List[Dict[str, Any]]:
+        """查询目录下的文件。
+
+        Args:
+            parentFileId: 目录ID
+            trashed: 是否包含回收站文件，默认为False
+
+        Returns:
+            按文件名排序的文件信息列表
+        """
+        sql = "SELECT * FROM files WHERE parentFileId = ?"
+        if not trashed:
+            sql += " AND trashed = 0"
+        with self._lock:
+            rows = self._db.execute(sql + " ORDER BY filename", (parentFileId,)).fetchall()
+        return [self._record(r) for r in rows]
+
+    def by_etag(self, etag: str, trashed: bool = False) -> List[Dict[str, Any]]:
+        """按 etag 查询文件。
+
+        Args:
+            etag: 文件MD5
+            trashed: 是否包含回收站文件，默认为False
+
+        Returns:
+            文件信息列表
+        """
+        sql = "SELECT * FROM files WHERE etag = ?"
+        if not trashed:
+            sql += " AND trashed = 0"
+        with self._lock:
+            rows = self._db.execute(sql, (etag,)).fetchall()
+        return [self._record(r) for r in rows]
+
+    def path(self, fileId: int) -> Optional[str]:
+        """查询文件的完整路径。
+
+        Args:
+            fileId: 文件ID
+
+        Returns:
+            以 "/" 开头的路径，文件或其某个上级目录不在索引中时返回None
+        """
+        if fileId == 0:
+            return "/"
+        with self._lock:
+            rows = self._db.execute(
+                """
+                WITH RECURSIVE up(id, parent, name, depth) AS (
+                    SELECT fileId, parentFileId, filename, 0 FROM files WHERE fileId = ?
+                    UNION ALL
+                    SELECT f.fileId, f.parentFileId, f.filename, up.depth + 1
+                    FROM files f JOIN up ON f.fileId = up.parent
+                )
+                SELECT parent, name FROM up ORDER BY depth DESC
+                """,
+                (fileId,),
+            ).fetchall()
+        if not rows or rows[0]["parent"] != 0:
+            return None
+        return "/" + "/".join(r["name"] for r in rows)
+
+    def resolve(self, path: str, trashed: bool = False) -> Optional[int]:
+        """按路径查询文件ID。
+
+        Args:
+            path: 以 "/" 分隔的路径，根目录为 "/"
+            trashed: 是否允许路径经过回收站中的文件，默认为False
+
+        Returns:
+            文件ID，不存在返回None
+        """
+        sql = "SELECT fileId FROM files WHERE parentFileId = ? AND filename = ?"
+        if not trashed:
+            sql += " AND trashed = 0"
+        fileId = 0
+        with self._lock:
+            for name in (p for p in path.split("/") if p):
+                row = self._db.execute(sql, (fileId, name)).fetchone()
+                if row is None:
+                    return None
+                fileId = row[0]
+        return fileId
+
+    def walk(self, rootId: int = 0, chunk_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """遍历索引中目录下的全部子孙文件（不含回收站文件）。
+
+        结果按块从游标读取，每读一块持有一次锁，内存占用与子树大小无关。
+
+        Args:
+            rootId: 起始目录ID，默认为0（根目录）
+            chunk_size: 每次从游标读取的行数，默认为1000
+
+        Yields:
+            文件信息字典
+        """
+        with self._lock:
+            cursor = self._db.execute(
+                _SUBTREE + "SELECT * FROM files WHERE parentFileId IN sub AND trashed = 0",
+                (rootId,),
+            )
+        try:
+            while True:
+                with self._lock:
+                    rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                for row in rows:
+                    yield self._record(row)
+        finally:
+            with self._lock:
+                cursor.close()
+
+    def count(self) -> int:
+        """索引中的文件总数。"""
+        with self._lock:
+            return int(self._db.execute("SELECT COUNT(*) FROM files").fetchone()[0])
@@ -0,0 +1,247 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+from x123pan.src.api import Access
+from x123pan.src.cache import CREATE_KINDS
+from x123pan.src.const import ConstAPI
+from x123pan.src.record import FileRecord
+from x123pan.src.type import Mutation
+
+
+def split_path(path: str) -> Tuple[str, ...]:
+    """将以 "/" 分隔的路径拆分为各级名称，忽略空段。"""
+    return tuple(p for p in path.replace("\\", "/").split("/") if p)
+
+
+class PathResolver:
+    """路径与文件ID的双向解析器。
+
+    缓存已查询过的文件节点（所在目录、名称、类型）与已列出目录的子项名称，
+    ID 转路径时按层级用一次 file.infos 查询所有路径在这一层缺少的上级目录，
+    路径转 ID 时按层级并发列出所有路径在这一层需要的目录，公共前缀只查询一次。
+    多个线程可以共享同一个解析器，同一目录同时只会被列出一次。
+
+    默认注册为 Access 的变更监听器，本客户端修改文件后自动失效相关节点与目录。
+
+    Attributes:
+        access: Access对象
+        workers: 并发列出目录的线程数
+    """
+
+    def __init__(self, access: Access, workers: int = 0, listen: bool = True) -> None:
+        """初始化解析器。
+
+        Args:
+            access: Access对象
+            workers: 并发列出目录的线程数，默认为 FILE_LIST_V2 的 QPS
+            listen: 是否注册变更监听，默认为True
+        """
+        self.access = access
+        self.workers = workers or ConstAPI.FILE_LIST_V2.qps or 8
+        self._lock = threading.Lock()
+        # fileId -> (parentFileId, filename, type)
+        self._nodes: Dict[int, Tuple[int, str, int]] = {}
+        # 目录ID -> {文件名: fileId}（不含回收站中的文件）
+        self._children: Dict[int, Dict[str, int]] = {}
+        self._loading: Dict[int, Future[Dict[str, int]]] = {}
+        self._generation = 0
+        self._listening = listen
+        if listen:
+            access.add_listener(self.invalidate)
+
+    def close(self) -> None:
+        """注销变更监听。"""
+        if self._listening:
+            self.access.remove_listener(self.invalidate)
+            self._listening = False
+
+    def path(self, fileId: int) -> Optional[str]:
+        """获取文件或目录的完整路径。
+
+        Args:
+            fileId: 文件ID
+
+        Returns:
+            以 "/" 开头的路径，文件或其上级目录不存在时返回None
+        """
+        return self.paths([fileId])[fileId]
+
+    def paths(self, fileIds: Iterable[int]) -> Dict[int, Optional[str]]:
+        """批量获取完整路径。
+
+        每轮找出所有路径上第一个未缓存的上级节点，合并为一次 file.infos 查询，
+        查询轮数等于最深的未缓存层数。
+
+        Args:
+            fileIds: 文件ID列表
+
+        Returns:
+            {fileId: 路径} 字典，文件或其上级目录不存在时值为None
+        """
+        fileIds = list(fileIds)
+        absent: Set[int] = set()
+        while True:
+            with self._lock:
+                missing = set()
+                for fileId in fileIds:
+                    node = fileId
+                    while node != 0 and node not in absent:
+                        parent = self._nodes.get(node)
+                        if parent is None:
+                            missing.add(node)
+                            break
+                        node = parent[0]
+            if not missing:
+                break
+            found = self._store(self.access.file.infos(list(missing)))
+            absent.update(missing - found)
+        result: Dict[int, Optional[str]] = {}
+        with self._lock:
+            for fileId in fileIds:
+                names, node = [], fileId
+                while node != 0:
+                    parent = self._nodes.get(node)
+                    if parent is None:
+                        break
+                    names.append(parent[1])
+                    node = parent[0]
+                result[fileId] = "/" + "/".join(reversed(names)) if node == 0 else None
+        return result
+
+    def resolve(self, path: str) -> Optional[int]:
+        """获取路径对应的文件ID。
+
+        Args:
+            path: 以 "/" 分隔的路径，根目录为 "/"
+
+        Returns:
+            文件ID，不存在返回None
+        """
+        return self.resolve_many([path])[path]
+
+    def resolve_many(self, paths: Iterable[str]) -> Dict[str, Optional[int]]:
+        """批量获取路径对应的文件ID（不含回收站中的文件）。
+
+        路径的中间一级已知是文件时直接判定为不存在，不再列出。
+
+        Args:
+            paths: 路径列表
+
+        Returns:
+            {路径: fileId} 字典，不存在时值为None
+        """
+        parts = {path: split_path(path) for path in paths}
+        # 各路径当前解析到的目录ID，None 表示不存在
+        current: Dict[str, Optional[int]] = dict.fromkeys(parts, 0)
+        depth = 0
+        while True:
+            # 需要继续向下解析的路径 -> 当前所在的目录ID
+            pending: Dict[str, int] = {}
+            with self._lock:
+                for p, names in parts.items():
+                    node = current[p]
+                    if node is None or len(names) <= depth:
+                        continue
+                    if node != 0 and node in self._nodes and self._nodes[node][2] != 1:
+                        current[p] = None
+                        continue
+                    pending[p] = node
+            if not pending:
+                return current
+            dirIds = set(pending.values())
+            listings = dict(zip(dirIds, self._map(self.children, dirIds)))
+            for p, dirId in pending.items():
+                current[p] = listings[dirId].get(parts[p][depth])
+            depth += 1
+
+    def _map(
+        self, func: Callable[[int], Dict[str, int]], items: Iterable[int]
+    ) -> List[Dict[str, int]]:
+        """并发调用 func，只有一项时直接在当前线程调用。"""
+        items = list(items)
+        if len(items) <= 1 or self.workers <= 1:
+            return [func(i) for i in items]
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(items))) as executor:
+            return list(executor.map(func, items))
+
+    def children(self, dirId: int) -> Dict[str, int]:
+        """获取目录下的 {文件名: fileId}（不含回收站中的文件）。
+
+        Args:
+            dirId: 目录ID
+
+        Returns:
+            子项名称到ID的字典
+        """
+        with self._lock:
+            names = self._children.get(dirId)
+            if names is not None:
+                return names
+            loading = self._loading.get(dirId)
+            if loading is None:
+                future: Future[Dict[str, int]] = Future()
+                self._loading[dirId] = future
+                generation = self._generation
+        if loading is not None:
+            return loading.result()
+        try:
+            items = list(self.access.file.list_v2(dirId))
+        except BaseException as e:
+            with self._lock:
+                self._loading.pop(dirId, None)
+            future.set_exception(e)
+            raise
+        names = {}
+        for item in items:
+            names.setdefault(item["filename"], item["fileId"])
+        with self._lock:
+            self._loading.pop(dirId, None)
+            self._store_locked(items)
+            # 列出期间收到过变更事件时不缓存列表，但仍返回给调用方
+            if generation == self._generation:
+                self._children[dirId] = names
+        future.set_result(names)
+        return names
+
+    def _store(self, items: Sequence[Union[Dict[str, Any], FileRecord]]) -> Set[int]:
+        """缓存文件节点，返回其ID集合。"""
+        with self._lock:
+            return self._store_locked(items)
+
+    def _store_locked(self, items: Sequence[Union[Dict[str, Any], FileRecord]]) -> Set[int]:
+        """缓存文件节点（调用方需持有锁）。"""
+        for item in items:
+            self._nodes[item["fileId"]] = (item["parentFileId"], item["filename"], item["type"])
+        return {item["fileId"] for item in items}
+
+    def invalidate(self, mutation: Mutation) -> None:
+        """处理变更事件，失效被修改的节点及相关目录的子项列表。
+
+        无法确定受影响的目录时清空全部子项列表（节点缓存保留）。
+
+        Args:
+            mutation: 变更事件
+        """
+        with self._lock:
+            self._generation += 1
+            unknown = mutation.parentIDs is None and mutation.kind in CREATE_KINDS
+            dirs = set(mutation.parentIDs or ())
+            for fileID in mutation.fileIDs:
+                node = self._nodes.pop(fileID, None)
+                if node is not None:
+                    dirs.add(node[0])
+                elif mutation.kind not in CREATE_KINDS:
+                    unknown = True
+                dirs.add(fileID)
+            if unknown:
+                self._children.clear()
+            for dirId in dirs:
+                self._children.pop(dirId, None)
+
+    def clear(self) -> None:
+        """清空全部缓存。"""
+        with self._lock:
+            self._generation += 1
+            self._nodes.clear()
+            self._children.clear()
@@ -0,0 +1,417 @@
+import heapq
+import json
+import mmap
+import os
+import struct
+import tempfile
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from x123pan.src.api import Access
+from x123pan.src.record import FileRecord
+from x123pan.util.all import walk
+
+MAGIC = b"X123SNAP"
+VERSION = 1
+
+# 文件头：魔数、版本、保留、记录数、字符串表偏移、字符串表字节数
+HEADER = struct.Struct("<8sHHIQQQ")
+# 记录：fileId、parentFileId、size、文件名偏移、文件名字节数、etag、标志位、type、status、category
+RECORD = struct.Struct("<qqqQI16sBbhh")
+# etag 不是32位十六进制时，etag 字段保存其在字符串表中的 (偏移, 字节数)
+ODD_ETAG = struct.Struct("<QI4x")
+
+FLAG_TRASHED = 1
+FLAG_ODD_ETAG = 2
+
+Item = Union[Dict[str, Any], FileRecord]
+
+
+class SnapshotWriter:
+    """流式写入二进制快照。
+
+    每个文件一条定长记录，文件名与非标准 etag 存入字符串表。写入的记录先在内存中
+    攒成 ``run_size`` 条的有序段写入临时文件，关闭时归并为按 fileId 排序的记录区，
+    内存占用与文件总数无关。
+
+    文件结构：HEADER | 按 fileId 排序的 RECORD × count | 字符串表（UTF-8）。
+    """
+
+    def __init__(self, path: str, run_size: int = 262144) -> None:
+        """创建快照文件。
+
+        Args:
+            path: 快照文件路径
+            run_size: 每个有序段的记录数，默认为262144
+        """
+        self.path = path
+        self.run_size = run_size
+        self.count = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        self._strings = tempfile.TemporaryFile(dir=directory)  # noqa: SIM115
+        self._strings_size = 0
+        self._names: Dict[str, Tuple[int, int]] = {}
+        self._runs: List[IO[bytes]] = []
+        self._buffer: List[Tuple[int, bytes]] = []
+        self._directory = directory
+        self._closed = False
+
+    def __enter__(self) -> "SnapshotWriter":
+        """进入上下文管理器。"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        """退出上下文管理器，正常退出时完成写入。"""
+        if exc_type is None:
+            self.close()
+        else:
+            self._discard()
+
+    def _string(self, text: str) -> Tuple[int, int]:
+        """写入字符串表，返回 (偏移, 字节数)，重复的字符串只保存一份。"""
+        ref = self._names.get(text)
+        if ref is None:
+            data = text.encode()
+            ref = (self._strings_size, len(data))
+            self._strings.write(data)
+            self._strings_size += len(data)
+            if len(self._names) >= 65536:
+                self._names.clear()
+            self._names[text] = ref
+        return ref
+
+    def write(self, item: Item) -> None:
+        """写入一个文件。
+
+        Args:
+            item: 文件信息字典或 FileRecord
+        """
+        record = item if isinstance(item, FileRecord) else FileRecord.from_dict(item)
+        offset, length = self._string(record.filename)
+        flags = FLAG_TRASHED if record.trashed else 0
+        etag = record.etag
+        try:
+            raw = bytes.fromhex(etag) if etag else bytes(16)
+        except ValueError:
+            raw = b""
+        if len(raw) != 16 or (etag and raw.hex() != etag):
+            flags |= FLAG_ODD_ETAG
+            raw = ODD_ETAG.pack(*self._string(etag))
+        packed = RECORD.pack(
+            record.fileId,
+            record.parentFileId,
+            record.size,
+            offset,
+            length,
+            raw,
+            flags,
+            record.type,
+            record.status,
+            record.category,
+        )
+        self._buffer.append((record.fileId, packed))
+        self.count += 1
+        if len(self._buffer) >= self.run_size:
+            self._flush()
+
+    def write_many(self, items: Iterable[Item]) -> int:
+        """写入多个文件，返回写入的数量。"""
+        count = 0
+        for item in items:
+            self.write(item)
+            count += 1
+        return count
+
+    def _flush(self) -> None:
+        """将缓冲区排序后写为一个有序段。"""
+        if not self._buffer:
+            return
+        self._buffer.sort(key=lambda r: r[0])
+        run = tempfile.TemporaryFile(dir=self._directory)  # noqa: SIM115
+        run.write(b"".join(r[1] for r in self._buffer))
+        run.seek(0)
+        self._runs.append(run)
+        self._buffer = []
+
+    @staticmethod
+    def _read_run(run: IO[bytes]) -> Iterator[Tuple[int, bytes]]:
+        """逐条读取有序段。"""
+        while True:
+            chunk = run.read(RECORD.size * 4096)
+            if not chunk:
+                return
+            for i in range(0, len(chunk), RECORD.size):
+                packed = chunk[i : i + RECORD.size]
+                yield struct.unpack_from("<q", packed)[0], packed
+
+    def close(self) -> None:
+        """归并有序段并写入文件头与字符串表。"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._buffer and not self._runs:
+            self._buffer.sort(key=lambda r: r[0])
+            records: Iterable[Tuple[int, bytes]] = self._buffer
+        else:
+            self._flush()
+            records = heapq.merge(*(self._read_run(run) for run in self._runs))
+        strings_offset = HEADER.size + self.count * RECORD.size
+        with open(self.path, "wb") as f:
+            f.write(
+                HEADER.pack(MAGIC, VERSION, 0, 0, self.count, strings_offset, self._strings_size)
+            )
+            for _, packed in records:
+                f.write(packed)
+            self._strings.seek(0)
+            while True:
+                chunk = self._strings.read(1 << 20)
+                if not chunk:
+                    break
+                f.write(chunk)
+        self._discard()
+
+    def _discard(self) -> None:
+        """关闭临时文件。"""
+        self._closed = True
+        for run in self._runs:
+            run.close()
+        self._runs, self._buffer = [], []
+        self._strings.close()
+
+
+class Snapshot:
+    """内存映射读取二进制快照。
+
+    文件不会整体读入内存，按行号或 fileId（二分查找）随机读取，``scan`` 逐条解析定长记录。
+
+    Attributes:
+        path: 快照文件路径
+        count: 文件数
+    """
+
+    def __init__(self, path: str) -> None:
+        """打开快照。
+
+        Args:
+            path: 快照文件路径
+
+        Raises:
+            ValueError: 文件不是快照或版本不支持时抛出
+        """
+        self.path = path
+        self._file = open(path, "rb")  # noqa: SIM115
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"不是有效的快照文件: {path}") from None
+        magic, version, _, _, self.count, self._strings, _ = HEADER.unpack_from(self._mm)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"不是有效的快照文件: {path}")
+
+    def close(self) -> None:
+        """关闭快照。"""
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self) -> "Snapshot":
+        """进入上下文管理器。"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        """退出上下文管理器。"""
+        self.close()
+
+    def __len__(self) -> int:
+        """文件数。"""
+        return self.count
+
+    def _text(self, offset: int, length: int) -> str:
+        """读取字符串表。"""
+        start = self._strings + offset
+        return self._mm[start : start + length].decode()
+
+    def _decode(self, row: Tuple[Any, ...]) -> FileRecord:
+        """将记录元组转换为 FileRecord。"""
+        fileId, parentFileId, size, offset, length, raw, flags, type, status, category = row
+        if flags & FLAG_ODD_ETAG:
+            etag = self._text(*ODD_ETAG.unpack(raw))
+        else:
+            etag = raw.hex() if any(raw) else ""
+        return FileRecord(
+            fileId,
+            parentFileId,
+            self._text(offset, length),
+            type,
+            size,
+            etag,
+            status,
+            category,
+            flags & FLAG_TRASHED,
+        )
+
+    def __getitem__(self, index: int) -> FileRecord:
+        """按行号（fileId 升序）读取文件。"""
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return self._decode(RECORD.unpack_from(self._mm, HEADER.size + index * RECORD.size))
+
+    def __iter__(self) -> Iterator[FileRecord]:
+        """按 fileId 升序逐个生成 FileRecord。"""
+        for row in self.scan():
+            yield self._decode(row)
+
+    def scan(self) -> Iterator[Tuple[Any, ...]]:
+        """按 fileId 升序逐条生成未解码的记录元组（不读取字符串表，用于快速统计）。
+
+        Yields:
+            (fileId, parentFileId, size, 文件名偏移, 文件名字节数, etag, 标志位, type, status, category)
+        """
+        view = memoryview(self._mm)[HEADER.size : self._strings]
+        try:
+            yield from RECORD.iter_unpack(view)
+        finally:
+            view.release()
+
+    def find(self, fileId: int) -> Optional[FileRecord]:
+        """按 fileId 二分查找文件。
+
+        Args:
+            fileId: 文件ID
+
+        Returns:
+            FileRecord，不存在返回None
+        """
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            current = struct.unpack_from("<q", self._mm, HEADER.size + mid * RECORD.size)[0]
+            if current < fileId:
+                low = mid + 1
+            else:
+                high = mid
+        if low < self.count:
+            record = self[low]
+            if record.fileId == fileId:
+                return record
+        return None
+
+    def to_ndjson(self, path: str) -> int:
+        """导出为 NDJSON（每行一个 list_v2 格式的 JSON 对象）。
+
+        Args:
+            path: 输出文件路径
+
+        Returns:
+            导出的文件数
+        """
+        return write_ndjson(path, self)
+
+
+def write_ndjson(path: str, items: Iterable[Item]) -> int:
+    """流式写入 NDJSON。
+
+    Args:
+        path: 输出文件路径
+        items: 文件信息字典或 FileRecord
+
+    Returns:
+        写入的文件数
+    """
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for item in items:
+            record = item if isinstance(item, FileRecord) else FileRecord.from_dict(item)
+            f.write(json.dumps(record.to_dict(), ensure_ascii=False))
+            f.write("\n")
+            count += 1
+    return count
+
+
+def read_ndjson(path: str) -> Iterator[FileRecord]:
+    """流式读取 NDJSON。
+
+    Args:
+        path: NDJSON 文件路径
+
+    Yields:
+        FileRecord
+    """
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield FileRecord.from_dict(json.loads(line))
+
+
+def crawl(
+    access: Access, rootId: int = 0, trashed: bool = False, workers: int = 0
+) -> Iterator[Dict[str, Any]]:
+    """用 util.all.walk 并发列出目录下的全部文件（不含起始目录本身）。
+
+    Args:
+        access: Access对象
+        rootId: 起始目录ID，默认为0（根目录）
+        trashed: 是否包含回收站中的文件（及其子目录），默认为False
+        workers: 并发线程数，默认为 FILE_LIST_V2 的 QPS
+
+    Yields:
+        list_v2 格式的文件信息字典（顺序取决于各目录返回的先后）
+    """
+    for _, dirs, files in walk(access, rootId, trashed=trashed, workers=workers):
+        yield from dirs
+        yield from files
+
+
+def dump(
+    access: Access,
+    path: str,
+    rootId: int = 0,
+    trashed: bool = False,
+    ndjson: bool = False,
+    workers: int = 0,
+) -> int:
+    """将目录树写为快照。
+
+    目录树由 crawl 并发列出，二进制快照按 fileId 排序写入，与列出的顺序无关。
+
+    Args:
+        access: Access对象
+        path: 快照文件路径
+        rootId: 起始目录ID，默认为0（根目录）
+        trashed: 是否包含回收站中的文件，默认为False
+        ndjson: 是否写为 NDJSON 而不是二进制快照，默认为False
+        workers: 并发线程数，默认为 FILE_LIST_V2 的 QPS
+
+    Returns:
+        写入的文件数
+    """
+    items = crawl(access, rootId, trashed, workers)
+    if ndjson:
+        return write_ndjson(path, items)
+    with SnapshotWriter(path) as writer:
+        return writer.write_many(items)
+
+
+def dump_ids(access: Access, path: str, fileIds: List[int], ndjson: bool = False) -> int:
+    """用 file.infos 查询指定文件并写为快照。
+
+    Args:
+        access: Access对象
+        path: 快照文件路径
+        fileIds: 文件ID列表
+        ndjson: 是否写为 NDJSON 而不是二进制快照，默认为False
+
+    Returns:
+        写入的文件数
+    """
+
+    def items() -> Iterator[Item]:
+        for i in range(0, len(fileIds), 1000):
+            yield from access.file.infos(fileIds[i : i + 1000], compact=True)
+
+    if ndjson:
+        return write_ndjson(path, items())
+    with SnapshotWriter(path) as writer:
+        return writer.write_many(items())